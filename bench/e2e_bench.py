@@ -0,0 +1,240 @@
+"""
+End-to-end benchmark: runs real uploads through lib against the local fake
+API (bench/fake_youtube.py, started as a separate process so it doesn't share
+the GIL) and checks three numbers against their limits:
+
+  throughput  one upload over a capped, high-latency link, as a share of the cap
+  recovery    time from a dropped connection or 503 until the upload sends
+              again, over a few uploads
+  polling     videos.list calls per video while a batch of uploads processes
+
+    python bench/e2e_bench.py [--only throughput,recovery,polling] [--size-mb 128]
+                              [--mbit 200] [--latency-ms 40] [--videos 20]
+
+Nothing touches the real API or the app's own data folder. Exits with status
+1 if any number is past its limit.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+# Sessions, the upload index, history and the quota ledger go to a scratch folder.
+os.environ["APPDATA"] = tempfile.mkdtemp(prefix="ytupload-bench-")
+os.chdir(ROOT)  # lib finds its bundled files relative to the working directory
+
+from bench.fake_youtube import point_uploader_at  # noqa: E402
+
+SCENARIOS = ("throughput", "recovery", "polling")
+RECOVERY_UPLOADS = 4
+
+
+class FakeServer:
+    """
+    bench/fake_youtube.py in a child process, driven over its control API.
+    """
+
+    def __init__(self):
+        self.process = subprocess.Popen(
+            [sys.executable, os.path.join(ROOT, "bench", "fake_youtube.py"), "--seed", "1"],
+            stdout=subprocess.PIPE,
+            text=True,
+        )
+        self.url = json.loads(self.process.stdout.readline())["url"]
+
+    def _call(self, path, body=None):
+        data = json.dumps(body).encode() if body is not None else None
+        with urllib.request.urlopen(self.url + path, data=data) as resp:
+            return json.load(resp)
+
+    def configure(self, **settings):
+        return self._call("_fake/config", settings)
+
+    def reset(self):
+        self._call("_fake/reset", {})
+
+    def stats(self):
+        return self._call("_fake/stats")
+
+    def videos(self):
+        return self._call("_fake/videos")
+
+    def stop(self):
+        self.process.terminate()
+        self.process.wait()
+
+
+def make_files(count, size):
+    folder = tempfile.mkdtemp(prefix="ytupload-bench-files-")
+    paths = []
+    for i in range(count):
+        path = os.path.join(folder, f"clip{i:03d}.mp4")
+        with open(path, "wb") as f:
+            left = size
+            while left:
+                block = os.urandom(min(left, 8 * 1024 * 1024))
+                f.write(block)
+                left -= len(block)
+        paths.append(path)
+    return paths
+
+
+def upload(path):
+    """
+    One upload stage with an adaptive chunk size, as the queue runs it.
+    Returns (status, seconds).
+    """
+    from lib.chunking import ChunkTuner
+    from lib.uploader import UploadStatus, authenticate, send_video
+
+    status = UploadStatus()
+    start = time.perf_counter()
+    video_id = send_video(authenticate(), path, status, chunk_tuner=ChunkTuner())
+    elapsed = time.perf_counter() - start
+    if not video_id:
+        raise RuntimeError(f"Upload of {path} failed: {status.error}")
+    status.video_id = video_id
+    return status, elapsed
+
+
+def check(ok, text):
+    print(f"{'ok  ' if ok else 'FAIL'} {text}")
+    return ok
+
+
+def bench_throughput(server, args):
+    cap = args.mbit * 1e6 / 8
+    server.reset()
+    server.configure(latency=args.latency_ms / 1000, bandwidth=cap, fault_rate=0, drop_rate=0)
+    (path,) = make_files(1, args.size_mb * 1024 * 1024)
+    try:
+        status, elapsed = upload(path)
+    finally:
+        os.remove(path)
+    efficiency = status.total_bytes / elapsed / cap * 100
+    mbit = status.total_bytes * 8 / elapsed / 1e6
+    print(
+        f"throughput: {args.size_mb} MB in {elapsed:.1f}s = {mbit:.0f} Mbit/s"
+        f" over a {args.mbit:g} Mbit/s link with {args.latency_ms:g} ms latency"
+    )
+    return check(
+        efficiency >= args.min_efficiency, f"link use {efficiency:.0f}% (limit {args.min_efficiency:g}%)"
+    )
+
+
+def bench_recovery(server, args):
+    server.reset()
+    server.configure(
+        latency=args.latency_ms / 1000,
+        bandwidth=args.mbit * 1e6 / 8,
+        fault_rate=args.fault_rate,
+        drop_rate=args.fault_rate,
+    )
+    # Several smaller files give more (smaller) chunks, so more faults to time.
+    paths = make_files(RECOVERY_UPLOADS, args.size_mb * 1024 * 1024 // RECOVERY_UPLOADS)
+    statuses = []
+    elapsed = 0
+    try:
+        for path in paths:
+            status, seconds = upload(path)
+            statuses.append(status)
+            elapsed += seconds
+    finally:
+        for path in paths:
+            os.remove(path)
+    server.configure(fault_rate=0, drop_rate=0)
+    stats = server.stats()
+    stored = server.videos()
+    recoveries = stats["recoveries"]
+    resent = stats["bytes_read"] - sum(status.total_bytes for status in statuses)
+    print(
+        f"recovery: {stats['faults']} faults and {stats['drops']} dropped connections in {elapsed:.1f}s,"
+        f" {resent / 1e6:.1f} MB sent twice"
+    )
+    if not recoveries:
+        return check(False, "no faults were injected; raise --size-mb or --fault-rate")
+    median = statistics.median(recoveries)
+    intact = all(stored[status.video_id]["sha256"] == status.sha256 for status in statuses)
+    ok = check(intact, "server copies match the files")
+    ok &= check(
+        median <= args.max_recovery,
+        f"median recovery {median:.2f}s, worst {max(recoveries):.2f}s (limit {args.max_recovery:g}s median)",
+    )
+    return ok
+
+
+def bench_polling(server, args):
+    from lib.quota import QuotaLedger
+    from lib.upload_queue import UploadJob, UploadQueue
+
+    server.reset()
+    server.configure(
+        latency=0.005, bandwidth=None, fault_rate=0, drop_rate=0, processing_seconds=args.processing
+    )
+    paths = make_files(args.videos, 256 * 1024)
+    ledger = QuotaLedger(os.path.join(os.environ["APPDATA"], "bench-quota.db"), settings_path=None)
+    ledger.daily_limit = 10**9  # A batch this size would otherwise wait for the quota reset
+    queue = UploadQueue(max_workers=4, quota=ledger)
+    start = time.perf_counter()
+    jobs = [queue.submit(UploadJob(path)) for path in paths]
+    finished = queue.wait(timeout=args.processing * 10 + 60)
+    elapsed = time.perf_counter() - start
+    queue.shutdown()
+    for path in paths:
+        os.remove(path)
+
+    calls = server.stats()["calls"].get("videos.list", 0)
+    per_video = calls / args.videos
+    # What polling each video on its own every 3 seconds (wait_for_processing) would take.
+    naive = int(args.processing / 3) + 1
+    print(
+        f"polling: {args.videos} videos processing for {args.processing:g}s each, done in {elapsed:.1f}s;"
+        f" {calls} videos.list calls ({naive * args.videos} polling one by one)"
+    )
+    ok = check(finished and all(job.status.step == "Finished" for job in jobs), "every video finished")
+    ok &= check(per_video <= args.max_polls, f"{per_video:.2f} calls per video (limit {args.max_polls:g})")
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--only", default=",".join(SCENARIOS), help="Comma-separated scenarios to run")
+    parser.add_argument("--size-mb", type=int, default=128, help="Upload size for throughput and recovery")
+    parser.add_argument("--mbit", type=float, default=200, help="Simulated link speed")
+    parser.add_argument("--latency-ms", type=float, default=40)
+    parser.add_argument("--min-efficiency", type=float, default=85, help="Least link use in percent")
+    parser.add_argument(
+        "--fault-rate", type=float, default=0.1, help="Share of chunks answered with 503, and again dropped"
+    )
+    parser.add_argument("--max-recovery", type=float, default=3, help="Longest median recovery in seconds")
+    parser.add_argument("--videos", type=int, default=20)
+    parser.add_argument("--processing", type=float, default=10, help="Server-side processing time per video")
+    parser.add_argument("--max-polls", type=float, default=1.5, help="Most videos.list calls per video")
+    args = parser.parse_args()
+
+    scenarios = [name.strip() for name in args.only.split(",") if name.strip()]
+    unknown = set(scenarios) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"unknown scenario: {', '.join(sorted(unknown))}")
+
+    server = FakeServer()
+    try:
+        point_uploader_at(server.url)
+        ok = True
+        for name in scenarios:
+            ok &= globals()[f"bench_{name}"](server, args)
+    finally:
+        server.stop()
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,452 @@
+"""
+Local stand-in for the parts of the YouTube Data API the uploader uses, for
+benchmarks and offline checks: resumable uploads (videos.insert), videos.list
+with processing states, playlists.list, playlistItems.insert and
+channels.list. It can add latency, cap bandwidth and inject faults.
+
+    python bench/fake_youtube.py [--port 8080] [--latency-ms 20] [--mbit 100]
+                                 [--fault-rate 0.05] [--drop-rate 0.02] [--processing 5]
+
+Prints {"url": ...} once listening. Settings can be changed and counters
+read while it runs over a small control API:
+
+    GET  /_fake/stats    calls per method, bytes received, faults injected and
+                         how long each faulted upload took to start sending again
+    GET  /_fake/videos   size and SHA-256 of every uploaded video
+    POST /_fake/config   JSON object with any FakeYouTube setting
+    POST /_fake/reset    forget videos, sessions and counters
+
+Uploaded bytes are hashed, not kept, so memory stays flat whatever the size.
+point_uploader_at() makes lib.uploader talk to a running fake.
+"""
+import argparse
+import hashlib
+import json
+import random
+import re
+import socket
+import sys
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+READ_BLOCK = 64 * 1024
+LINK_BURST = 0.02  # Seconds of idle link that can be caught up on, so oversleeping doesn't cost bandwidth
+SETTINGS = (
+    "latency",  # Seconds added before every response
+    "bandwidth",  # Bytes/s shared by all uploads (the link), None for unlimited
+    "processing_seconds",  # Time from upload completion until a video is "processed"
+    "embed_delay",  # Further time until the player embed appears (verification)
+    "fault_rate",  # Share of upload chunks answered with 503 (the chunk is discarded)
+    "drop_rate",  # Share of upload chunks whose connection is dropped half way through
+    "quota_exceeded",  # Refuse videos.insert with 403 quotaExceeded
+)
+
+_RANGE_RE = re.compile(r"bytes (\d+)-(\d+)/(\d+|\*)")
+_STATUS_RE = re.compile(r"bytes \*/(\d+|\*)")
+
+
+class _Link:
+    """
+    A shared bandwidth cap: each block of request body waits for its slot on
+    the link, so parallel uploads split the rate between them.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._free_at = 0.0
+
+    def transfer(self, nbytes, rate):
+        if not rate:
+            return
+        with self._lock:
+            now = time.monotonic()
+            self._free_at = max(self._free_at, now - LINK_BURST) + nbytes / rate
+            done_at = self._free_at
+        delay = done_at - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+
+
+class FakeYouTube:
+    """
+    The fake API server. start() runs it on a background thread and returns
+    its base URL.
+    """
+
+    def __init__(
+        self,
+        latency=0.0,
+        bandwidth=None,
+        processing_seconds=2.0,
+        embed_delay=0.0,
+        fault_rate=0.0,
+        drop_rate=0.0,
+        quota_exceeded=False,
+        seed=None,
+    ):
+        self.latency = latency
+        self.bandwidth = bandwidth
+        self.processing_seconds = processing_seconds
+        self.embed_delay = embed_delay
+        self.fault_rate = fault_rate
+        self.drop_rate = drop_rate
+        self.quota_exceeded = quota_exceeded
+        self.random = random.Random(seed)
+        self.link = _Link()
+        self.lock = threading.Lock()
+        self.server = None
+        self.playlists = {"PLfake1": "Fake playlist 1", "PLfake2": "Fake playlist 2"}
+        self.reset()
+
+    def reset(self):
+        with self.lock:
+            self.sessions = {}
+            self.videos = {}
+            self.playlist_items = []
+            self.calls = {}
+            self.bytes_received = 0
+            self.bytes_read = 0  # Including bytes that were thrown away or sent twice
+            self.faults = 0
+            self.drops = 0
+            self.recoveries = []  # Seconds from each fault until the client sent data again
+
+    def configure(self, **settings):
+        for name, value in settings.items():
+            if name not in SETTINGS:
+                raise ValueError(f"Unknown setting {name!r}")
+            setattr(self, name, value)
+
+    def stats(self):
+        with self.lock:
+            return {
+                "calls": dict(self.calls),
+                "bytes_received": self.bytes_received,
+                "bytes_read": self.bytes_read,
+                "faults": self.faults,
+                "drops": self.drops,
+                "sessions": len(self.sessions),
+                "videos": len(self.videos),
+                "playlist_items": len(self.playlist_items),
+                "recoveries": list(self.recoveries),
+            }
+
+    def count(self, method):
+        with self.lock:
+            self.calls[method] = self.calls.get(method, 0) + 1
+
+    @property
+    def url(self):
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}/"
+
+    def start(self, host="127.0.0.1", port=0):
+        self.server = ThreadingHTTPServer((host, port), _Handler)
+        self.server.daemon_threads = True
+        self.server.fake = self
+        threading.Thread(target=self.server.serve_forever, name="fake-youtube", daemon=True).start()
+        return self.url
+
+    def stop(self):
+        if self.server:
+            self.server.shutdown()
+            self.server.server_close()
+            self.server = None
+
+    def video_resource(self, video_id):
+        """
+        The videos.list item for a video, following its processing timeline.
+        """
+        video = self.videos[video_id]
+        elapsed = time.monotonic() - video["completed"]
+        processed = elapsed >= self.processing_seconds
+        embedded = elapsed >= self.processing_seconds + self.embed_delay
+        time_left = max(0.0, self.processing_seconds - elapsed)
+        parts = 1000 if processed else int(1000 * elapsed / self.processing_seconds)
+        return {
+            "kind": "youtube#video",
+            "id": video_id,
+            "status": {
+                "uploadStatus": "processed" if processed else "uploaded",
+                "privacyStatus": video["privacy"],
+            },
+            "processingDetails": {
+                "processingStatus": "succeeded" if processed else "processing",
+                "processingProgress": {
+                    "partsTotal": "1000",
+                    "partsProcessed": str(parts),
+                    "timeLeftMs": str(int(time_left * 1000)),
+                },
+            },
+            "player": {
+                "embedHtml": f'<iframe src="//www.youtube.com/embed/{video_id}"></iframe>' if embedded else ""
+            },
+        }
+
+
+def _error(code, reason, message):
+    return {"error": {"code": code, "message": message, "errors": [{"reason": reason, "message": message}]}}
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    @property
+    def fake(self):
+        return self.server.fake
+
+    def log_message(self, *args):
+        pass
+
+    def _send(self, code, body=None, headers=()):
+        if self.fake.latency:
+            time.sleep(self.fake.latency)
+        data = json.dumps(body).encode() if body is not None else b""
+        self.send_response(code)
+        for name, value in headers:
+            self.send_header(name, value)
+        if body is not None:
+            self.send_header("Content-Type", "application/json; charset=UTF-8")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _read_body(self, on_block=None, drop_after=None):
+        """
+        Reads the request body at the link's pace. With `on_block` each block
+        is handed to it as it arrives and nothing is returned; otherwise the
+        body is. With `drop_after` the connection is cut once that many bytes
+        have arrived.
+        """
+        remaining = int(self.headers.get("Content-Length") or 0)
+        chunks = []
+        received = 0
+        while remaining:
+            block = self.rfile.read(min(READ_BLOCK, remaining))
+            if not block:
+                break
+            self.fake.link.transfer(len(block), self.fake.bandwidth)
+            remaining -= len(block)
+            received += len(block)
+            if on_block:
+                on_block(block)
+            else:
+                chunks.append(block)
+            if drop_after is not None and received >= drop_after:
+                self.close_connection = True
+                self.connection.shutdown(socket.SHUT_RDWR)
+                break
+        with self.fake.lock:
+            self.fake.bytes_read += received
+        return b"".join(chunks)
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        query = parse_qs(url.query)
+        if url.path == "/_fake/stats":
+            return self._send(200, self.fake.stats())
+        if url.path == "/_fake/videos":
+            with self.fake.lock:
+                videos = {
+                    video_id: {"size": video["size"], "sha256": video["sha256"], "title": video["title"]}
+                    for video_id, video in self.fake.videos.items()
+                }
+            return self._send(200, videos)
+        if url.path.endswith("/youtube/v3/videos"):
+            self.fake.count("videos.list")
+            ids = [i for value in query.get("id", []) for i in value.split(",") if i]
+            with self.fake.lock:
+                items = [self.fake.video_resource(i) for i in ids if i in self.fake.videos]
+            return self._send(200, {"kind": "youtube#videoListResponse", "items": items})
+        if url.path.endswith("/youtube/v3/playlists"):
+            self.fake.count("playlists.list")
+            items = [
+                {"kind": "youtube#playlist", "id": pid, "snippet": {"title": title}}
+                for pid, title in self.fake.playlists.items()
+            ]
+            return self._send(200, {"kind": "youtube#playlistListResponse", "items": items})
+        if url.path.endswith("/youtube/v3/channels"):
+            self.fake.count("channels.list")
+            snippet = {"title": "Fake Channel", "thumbnails": {"default": {"url": ""}}}
+            return self._send(200, {"items": [{"id": "UCfake", "snippet": snippet}]})
+        self._send(404, _error(404, "notFound", f"No fake for GET {url.path}"))
+
+    def do_POST(self):
+        url = urlparse(self.path)
+        if url.path.startswith("/_fake/"):
+            body = json.loads(self._read_body() or b"{}")
+            if url.path == "/_fake/config":
+                try:
+                    self.fake.configure(**body)
+                except ValueError as e:
+                    return self._send(400, {"error": str(e)})
+                return self._send(200, {name: getattr(self.fake, name) for name in SETTINGS})
+            if url.path == "/_fake/reset":
+                self.fake.reset()
+                return self._send(200, {})
+        if url.path.endswith("/upload/youtube/v3/videos"):
+            return self._start_upload()
+        if url.path.endswith("/youtube/v3/playlistItems"):
+            self.fake.count("playlistItems.insert")
+            body = json.loads(self._read_body() or b"{}")
+            snippet = body.get("snippet", {})
+            if snippet.get("playlistId") not in self.fake.playlists:
+                return self._send(404, _error(404, "playlistNotFound", "Playlist not found"))
+            item_id = uuid.uuid4().hex[:16]
+            video_id = snippet.get("resourceId", {}).get("videoId")
+            with self.fake.lock:
+                self.fake.playlist_items.append((snippet["playlistId"], video_id))
+            return self._send(200, {"kind": "youtube#playlistItem", "id": item_id, "snippet": snippet})
+        self._send(404, _error(404, "notFound", f"No fake for POST {url.path}"))
+
+    def do_PUT(self):
+        url = urlparse(self.path)
+        if url.path.startswith("/upload/session/"):
+            return self._upload_chunk(url.path.rsplit("/", 1)[1])
+        self._send(404, _error(404, "notFound", f"No fake for PUT {url.path}"))
+
+    def _start_upload(self):
+        self.fake.count("videos.insert")
+        metadata = json.loads(self._read_body() or b"{}")
+        if self.fake.quota_exceeded:
+            message = "The request cannot be completed because you have exceeded your quota."
+            return self._send(403, _error(403, "quotaExceeded", message))
+        size = self.headers.get("X-Upload-Content-Length")
+        session_id = uuid.uuid4().hex
+        with self.fake.lock:
+            self.fake.sessions[session_id] = {
+                "size": int(size) if size else None,
+                "offset": 0,
+                "sha256": hashlib.sha256(),
+                "metadata": metadata,
+                "video_id": None,
+            }
+        location = f"http://{self.headers['Host']}/upload/session/{session_id}"
+        self._send(200, headers=[("Location", location)])
+
+    def _upload_chunk(self, session_id):
+        fake = self.fake
+        session = fake.sessions.get(session_id)
+        length = int(self.headers.get("Content-Length") or 0)
+        if session is None:
+            self._read_body()
+            return self._send(404, _error(404, "notFound", "Upload session not found"))
+        fault = drop = False
+        if length:
+            with fake.lock:
+                if "fault_at" in session:  # The client is sending again
+                    fake.recoveries.append(time.monotonic() - session.pop("fault_at"))
+                drop = fake.drop_rate and fake.random.random() < fake.drop_rate
+                fault = not drop and fake.fault_rate and fake.random.random() < fake.fault_rate
+
+        if fault:
+            self._read_body(on_block=lambda block: None)
+            with fake.lock:
+                fake.faults += 1
+                session["fault_at"] = time.monotonic()
+            return self._send(503, _error(503, "backendError", "Injected fault"))
+
+        # Bytes are stored as they arrive, so a dropped connection keeps
+        # what got through, as with the real API.
+        content_range = self.headers.get("Content-Range", "")
+        match = _RANGE_RE.match(content_range)
+        position = [int(match[1])] if match else None
+
+        def store(block):
+            with fake.lock:
+                if block and position[0] <= session["offset"] < position[0] + len(block):
+                    new = memoryview(block)[session["offset"] - position[0]:]
+                    session["sha256"].update(new)
+                    session["offset"] += len(new)
+                    fake.bytes_received += len(new)
+            position[0] += len(block)
+
+        self._read_body(on_block=store if match else None, drop_after=length // 2 if drop else None)
+        if drop:
+            with fake.lock:
+                fake.drops += 1
+                session["fault_at"] = time.monotonic()
+            return
+
+        with fake.lock:
+            if match and match[3] != "*":
+                session["size"] = int(match[3])
+            status = _STATUS_RE.match(content_range)
+            if status and status[1] != "*":
+                session["size"] = int(status[1])
+            complete = session["size"] is not None and session["offset"] >= session["size"]
+            if complete and session["video_id"] is None:
+                video_id = uuid.uuid4().hex[:11]
+                session["video_id"] = video_id
+                fake.videos[video_id] = {
+                    "completed": time.monotonic(),
+                    "size": session["offset"],
+                    "sha256": session["sha256"].hexdigest(),
+                    "privacy": session["metadata"].get("status", {}).get("privacyStatus", "private"),
+                    "title": session["metadata"].get("snippet", {}).get("title"),
+                }
+            offset = session["offset"]
+            video_id = session["video_id"]
+        if video_id:
+            snippet = {"title": fake.videos[video_id]["title"]}
+            return self._send(200, {"kind": "youtube#video", "id": video_id, "snippet": snippet})
+        headers = [("Range", f"bytes=0-{offset - 1}")] if offset else []
+        self._send(308, headers=headers)
+
+
+def point_uploader_at(url):
+    """
+    Makes lib.uploader use the fake at `url`: the bundled discovery document
+    with its root URL swapped, and anonymous credentials. Set APPDATA to a
+    scratch folder before importing lib to keep sessions, the upload index
+    and the quota ledger apart from real ones.
+    """
+    from google.auth.credentials import AnonymousCredentials
+
+    import lib.uploader as uploader
+
+    with open(uploader.DISCOVERY_FILE, "r", encoding="utf-8") as f:
+        document = json.load(f)
+    document["rootUrl"] = url
+    document["baseUrl"] = url + document["servicePath"]
+    uploader._discovery_document = document
+    uploader.load_credentials = AnonymousCredentials
+    uploader.invalidate_service()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=0, help="0 picks a free port")
+    parser.add_argument("--latency-ms", type=float, default=0)
+    parser.add_argument("--mbit", type=float, default=0, help="Shared upload bandwidth cap; 0 for none")
+    parser.add_argument("--processing", type=float, default=2.0, help="Seconds of server-side processing")
+    parser.add_argument("--embed-delay", type=float, default=0.0)
+    parser.add_argument("--fault-rate", type=float, default=0.0)
+    parser.add_argument("--drop-rate", type=float, default=0.0)
+    parser.add_argument("--seed", type=int)
+    args = parser.parse_args()
+
+    fake = FakeYouTube(
+        latency=args.latency_ms / 1000,
+        bandwidth=args.mbit * 1e6 / 8 or None,
+        processing_seconds=args.processing,
+        embed_delay=args.embed_delay,
+        fault_rate=args.fault_rate,
+        drop_rate=args.drop_rate,
+        seed=args.seed,
+    )
+    url = fake.start(args.host, args.port)
+    print(json.dumps({"url": url}), flush=True)
+    try:
+        while True:
+            time.sleep(1)  # Short sleeps keep Ctrl+C working on Windows
+    except KeyboardInterrupt:
+        fake.stop()
+        sys.exit(0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""
+Upload-time hashing benchmark: feeds a file through the upload reader
+(lib.media.PrefetchFileUpload) over a simulated link, with and without the
+running SHA-256, and reports the throughput of each.
+
+    python bench/hash_bench.py [--size-mb 512] [--mbit 1000] [--runs 3] [--max-loss 2]
+
+The link is simulated by sleeping for each chunk's transfer time, which like
+a socket send releases the GIL. Exits with status 1 if hashing costs more than
+--max-loss percent of throughput.
+"""
+import argparse
+import hashlib
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from lib.media import PrefetchFileUpload  # noqa: E402
+
+CHUNK = 8 * 1024 * 1024
+
+
+def make_file(size):
+    fd, path = tempfile.mkstemp(suffix=".mp4")
+    block = os.urandom(CHUNK)
+    with os.fdopen(fd, "wb") as f:
+        for _ in range(size // len(block)):
+            f.write(block)
+        f.write(block[: size % len(block)])
+    return path
+
+
+def upload(path, rate, hashing):
+    """
+    Returns (bytes/s, sha256 or None) for one pass over the file.
+    """
+    media = PrefetchFileUpload(path, "video/mp4", CHUNK)
+    if not hashing:
+        media.content_hash.valid = False  # update() becomes a no-op
+    size = media.size()
+    start = time.perf_counter()
+    offset = 0
+    while offset < size:
+        data = media.getbytes(offset, CHUNK)
+        if rate:
+            time.sleep(len(data) / rate)  # The chunk on the wire
+        offset += len(data)
+    elapsed = time.perf_counter() - start
+    digest = media.sha256()
+    media.close()
+    return size / elapsed, digest
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--size-mb", type=int, default=512)
+    parser.add_argument("--mbit", type=float, default=1000, help="Simulated link speed; 0 for none")
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--max-loss", type=float, default=2.0, help="Allowed throughput loss in percent")
+    args = parser.parse_args()
+
+    rate = args.mbit * 1e6 / 8
+    path = make_file(args.size_mb * 1024 * 1024)
+    try:
+        start = time.perf_counter()
+        with open(path, "rb") as f:
+            expected = hashlib.file_digest(f, "sha256").hexdigest() if hasattr(hashlib, "file_digest") else None
+        print(f"plain sha256 over the file: {args.size_mb / (time.perf_counter() - start):.0f} MB/s")
+
+        best = {False: 0, True: 0}
+        for _ in range(args.runs):
+            for hashing in (False, True):  # Alternate so the page cache favours neither
+                throughput, digest = upload(path, rate, hashing)
+                best[hashing] = max(best[hashing], throughput)
+                if hashing and expected and digest != expected:
+                    print("FAIL digest mismatch")
+                    sys.exit(1)
+    finally:
+        os.remove(path)
+
+    loss = (1 - best[True] / best[False]) * 100
+    link = f"{args.mbit:g} Mbit/s link" if args.mbit else "no link limit"
+    print(f"{link}: without hash {best[False] * 8 / 1e6:.0f} Mbit/s, with hash {best[True] * 8 / 1e6:.0f} Mbit/s")
+    ok = loss <= args.max_loss
+    print(f"{'ok  ' if ok else 'FAIL'} throughput loss {loss:.1f}% (limit {args.max_loss:g}%)")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""
+Import-time benchmark for each entry point, based on `python -X importtime`.
+
+    python bench/import_bench.py [--runs 5] [--scale 1.0]
+
+Each scenario fails if its best import time goes over its threshold (times
+--scale, for slower machines) or if it imports a module it should not need.
+Exits with status 1 on any regression.
+"""
+import argparse
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+HEAVY = ["PyQt6", "googleapiclient", "requests", "winreg", "win32crypt"]
+
+# name: (python arguments, threshold in ms, modules that must not be imported)
+SCENARIOS = {
+    "help": (["main_gui.py", "--help"], 30, HEAVY + ["lib.uploader"]),
+    "uploader": (["-c", "import lib.uploader"], 80, HEAVY),
+    "queue": (["-c", "import lib.upload_queue"], 100, HEAVY),
+    "cli": (["upload_cli.py", "--help"], 80, HEAVY + ["lib.uploader"]),
+    "gui": (["-c", "import lib.gui"], 400, ["googleapiclient", "requests", "winreg", "win32crypt"]),
+}
+
+
+def import_profile(args):
+    """
+    Runs python with -X importtime and returns (total ms, imported module names).
+    Raises RuntimeError with the error output if the process fails.
+    """
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime"] + args,
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+    )
+    if proc.returncode != 0:
+        errors = [line for line in proc.stderr.splitlines() if not line.startswith("import time:")]
+        raise RuntimeError(f"exit code {proc.returncode}\n" + "\n".join(errors[-10:]))
+    total_us = 0
+    modules = set()
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line.split("|", 2)
+        if not cumulative.strip().isdigit():
+            continue  # Header line
+        modules.add(name.strip())
+        if not name[1:].startswith(" "):  # Top-level import
+            total_us += int(cumulative)
+    return total_us / 1000, modules
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--scale", type=float, default=1.0, help="Multiply every threshold")
+    parser.add_argument("scenarios", nargs="*", default=list(SCENARIOS))
+    args = parser.parse_args()
+
+    failed = False
+    for name in args.scenarios:
+        cmd, threshold, forbidden = SCENARIOS[name]
+        threshold *= args.scale
+        best = None
+        modules = set()
+        try:
+            for _ in range(args.runs):
+                ms, modules = import_profile(cmd)
+                best = ms if best is None else min(best, ms)
+        except RuntimeError as e:
+            failed = True
+            print(f"FAIL {name:<9} did not import cleanly: {e}")
+            continue
+        leaked = sorted(
+            m for m in modules if any(m == f or m.startswith(f + ".") for f in forbidden)
+        )
+        ok = best <= threshold and not leaked
+        failed |= not ok
+        print(f"{'ok  ' if ok else 'FAIL'} {name:<9} {best:7.1f} ms (limit {threshold:.0f} ms)")
+        if leaked:
+            print(f"     imports {', '.join(leaked[:5])}{' ...' if len(leaked) > 5 else ''}")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
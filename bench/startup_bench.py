@@ -0,0 +1,51 @@
+"""
+Startup benchmark: time from launching main_gui.py until the Upload button is
+enabled (authentication, channel info and client construction included).
+
+    python bench/startup_bench.py [--runs 5]
+
+Needs a signed-in token, since it measures the real startup path.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def run_once():
+    start = time.perf_counter()
+    proc = subprocess.run(
+        [sys.executable, os.path.join(ROOT, "main_gui.py"), "--startup-bench"],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+    )
+    wall_ms = (time.perf_counter() - start) * 1000
+    for line in reversed(proc.stdout.splitlines()):
+        if line.startswith("{"):
+            result = json.loads(line)
+            if "error" in result:
+                raise RuntimeError(result["error"])
+            result["process_ms"] = round(wall_ms, 1)
+            return result
+    raise RuntimeError(f"No benchmark output (exit code {proc.returncode}): {proc.stderr.strip()}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    results = [run_once() for _ in range(args.runs)]
+    for key in ("upload_enabled_ms", "process_ms"):
+        values = [r[key] for r in results]
+        print(f"{key}: median {statistics.median(values):.0f} ms, min {min(values):.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
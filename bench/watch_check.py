@@ -0,0 +1,109 @@
+"""
+Watch-folder regression check: drives lib.watcher.FolderWatcher with real
+files, on both backends, and checks that every new recording is reported
+exactly once.
+
+    python bench/watch_check.py [--backend inotify|polling]
+
+Covers a new file, a file present at start() being modified, a reported file
+being appended to, and a file followed while it grows (--follow). Exits with
+status 1 if any file is reported a wrong number of times.
+"""
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from lib.watcher import CHECK_INTERVAL, POLL_INTERVAL, FolderWatcher  # noqa: E402
+
+SETTLE = 0.5
+
+
+def append(path, nbytes=64 * 1024):
+    with open(path, "ab") as f:
+        f.write(os.urandom(nbytes))
+
+
+def run_case(use_inotify, follow, before, during):
+    """
+    Starts a watcher on a scratch folder after `before(folder)`, runs
+    `during(folder)` and waits for things to settle. Returns the reported
+    file names in order.
+    """
+    folder = tempfile.mkdtemp(prefix="ytupload-watch-")
+    reported = []
+    try:
+        before(folder)
+        watcher = FolderWatcher(
+            [folder],
+            lambda path: reported.append(os.path.basename(path)),
+            settle_seconds=SETTLE,
+            use_inotify=use_inotify,
+            wait_for_settle=not follow,
+        )
+        watcher.start()
+        try:
+            during(folder)
+            time.sleep(SETTLE + CHECK_INTERVAL + POLL_INTERVAL + 0.5)
+        finally:
+            watcher.stop()
+        return reported, watcher.backend
+    finally:
+        shutil.rmtree(folder)
+
+
+def new_file(folder):
+    append(os.path.join(folder, "new.mkv"))
+
+
+def modify_existing(folder):
+    append(os.path.join(folder, "old.mkv"))
+    os.utime(os.path.join(folder, "old.mkv"))
+
+
+def append_after_report(folder):
+    path = os.path.join(folder, "clip.mkv")
+    append(path)
+    time.sleep(SETTLE + CHECK_INTERVAL + POLL_INTERVAL + 0.5)  # Reported by now
+    append(path)
+    os.utime(path)
+
+
+def grow(folder):
+    path = os.path.join(folder, "recording.mkv")
+    for _ in range(16):  # Four seconds of writing
+        append(path)
+        time.sleep(0.25)
+
+
+CASES = (
+    # name, follow, before start(), after start(), expected reports
+    ("new file", False, lambda folder: None, new_file, ["new.mkv"]),
+    ("pre-existing file modified", False, lambda folder: append(os.path.join(folder, "old.mkv")),
+     modify_existing, []),
+    ("reported file appended", False, lambda folder: None, append_after_report, ["clip.mkv"]),
+    ("growing file followed", True, lambda folder: None, grow, ["recording.mkv"]),
+)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--backend", choices=("inotify", "polling"), action="append")
+    args = parser.parse_args()
+
+    failed = False
+    for backend in args.backend or ("inotify", "polling"):
+        for name, follow, before, during, expected in CASES:
+            reported, used = run_case(backend == "inotify", follow, before, during)
+            ok = reported == expected
+            failed |= not ok
+            print(f"{'ok  ' if ok else 'FAIL'} {used:<8} {name}: reported {reported or 'nothing'}")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -7,6 +7,7 @@ pyinstaller ^
   --name "YouTubeUploader" ^
   --icon "lib/yt.ico" ^
   --add-data "lib/client_secret.json;lib" ^
+  --add-data "lib/youtube.v3.json;lib" ^
   --add-data "lib/yt.ico;lib" ^
   --hidden-import win32crypt ^
   main_gui.py
@@ -0,0 +1,99 @@
+import logging
+from collections import deque
+
+CHUNK_ALIGN = 256 * 1024  # Resumable uploads need chunks in multiples of 256 KiB
+DEFAULT_CHUNK_SIZE = 2 * 1024 * 1024
+MIN_CHUNK_SIZE = CHUNK_ALIGN
+MAX_CHUNK_SIZE = 64 * 1024 * 1024
+TARGET_CHUNK_SECONDS = 4  # Aim for chunks that take about this long to send
+RTT_FACTOR = 20  # ...and at least this many round trips, so stalls stay under ~5%
+SMOOTHING = 0.3
+
+
+def align_chunk_size(size):
+    """
+    Rounds `size` down to a multiple of 256 KiB (never below 256 KiB).
+    """
+    return max(CHUNK_ALIGN, int(size) // CHUNK_ALIGN * CHUNK_ALIGN)
+
+
+class ChunkTuner:
+    """
+    Picks the resumable upload chunk size from measured throughput and RTT.
+
+    Each acknowledged chunk is reported with record(). The tuner keeps an
+    exponentially smoothed throughput and sizes the next chunk so that it
+    takes about TARGET_CHUNK_SECONDS (or RTT_FACTOR round trips on high
+    latency links). It moves at most a factor of two per chunk and stays
+    inside [min_size, max_size]; cap() lowers max_size for a while (e.g. under
+    a bandwidth limit). `history` keeps the recent decisions as
+    (chunk_size, seconds, bytes_per_second) so convergence can be checked.
+    """
+
+    def __init__(
+        self,
+        initial=DEFAULT_CHUNK_SIZE,
+        min_size=MIN_CHUNK_SIZE,
+        max_size=MAX_CHUNK_SIZE,
+        target_seconds=TARGET_CHUNK_SECONDS,
+    ):
+        self.min_size = align_chunk_size(min_size)
+        self.max_size = max(self.min_size, align_chunk_size(max_size))
+        self._ceiling = self.max_size
+        self.target_seconds = target_seconds
+        self.chunk_size = self._clamp(initial)
+        self.throughput = None  # bytes/second, smoothed
+        self.rtt = None  # seconds
+        self.history = deque(maxlen=64)
+
+    def _clamp(self, size):
+        return min(self.max_size, max(self.min_size, align_chunk_size(size)))
+
+    def cap(self, size):
+        """
+        Keeps chunks at most `size` bytes (None lifts the cap) and applies it
+        to the current chunk size at once.
+        """
+        ceiling = self._ceiling if size is None else min(self._ceiling, size)
+        self.max_size = max(self.min_size, align_chunk_size(ceiling))
+        self.chunk_size = self._clamp(self.chunk_size)
+        return self.chunk_size
+
+    def record_rtt(self, seconds):
+        """
+        Records the duration of a request that carried no media (an offset
+        query), which is as close to a bare round trip as the protocol gets.
+        """
+        if self.rtt is None:
+            self.rtt = seconds
+        else:
+            self.rtt += SMOOTHING * (seconds - self.rtt)
+
+    def record(self, nbytes, seconds):
+        """
+        Records one acknowledged chunk and returns the size for the next one.
+        """
+        if nbytes <= 0 or seconds <= 0:
+            return self.chunk_size
+        rate = nbytes / seconds
+        if self.throughput is None:
+            self.throughput = rate
+        else:
+            self.throughput += SMOOTHING * (rate - self.throughput)
+
+        chunk_seconds = self.target_seconds
+        if self.rtt:
+            chunk_seconds = max(chunk_seconds, self.rtt * RTT_FACTOR)
+        wanted = self.throughput * chunk_seconds
+        wanted = min(wanted, self.chunk_size * 2)
+        wanted = max(wanted, self.chunk_size / 2)
+
+        self.history.append((self.chunk_size, seconds, rate))
+        new_size = self._clamp(wanted)
+        if new_size != self.chunk_size:
+            logging.debug(
+                "Chunk size %d -> %d (%.1f MB/s, rtt %s)",
+                self.chunk_size, new_size, self.throughput / 1e6, self.rtt,
+            )
+        self.chunk_size = new_size
+        return new_size
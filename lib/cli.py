@@ -0,0 +1,361 @@
+"""
+Headless uploader: runs files or a manifest through the upload queue and
+streams progress as JSON lines on stdout. Never imports PyQt6.
+"""
+import argparse
+import csv
+import json
+import logging
+import os
+import sys
+import threading
+import time
+
+PRIVACY_CHOICES = ["private", "unlisted", "public"]
+RATE_EVENT_INTERVAL = 5  # Seconds between "rate" events while uploads run
+
+
+def _split_list(value):
+    if not value:
+        return []
+    if isinstance(value, list):
+        return [str(v) for v in value if v]
+    return [v.strip() for v in str(value).split(";") if v.strip()]
+
+
+def load_manifest(path):
+    """
+    Reads a JSON or CSV manifest into a list of entries with the keys
+    file, title, description, privacy, playlists and tags.
+
+    JSON: a list of objects (or {"videos": [...]}) with those keys.
+    CSV: a header row with those columns; playlists and tags are separated
+    by semicolons. Relative file paths are relative to the manifest.
+    """
+    base = os.path.dirname(os.path.abspath(path))
+    if path.lower().endswith(".csv"):
+        with open(path, newline="", encoding="utf-8-sig") as f:
+            rows = list(csv.DictReader(f))
+    else:
+        with open(path, "r", encoding="utf-8") as f:
+            rows = json.load(f)
+        if isinstance(rows, dict):
+            rows = rows.get("videos", [])
+
+    entries = []
+    for row in rows:
+        file_path = (row.get("file") or "").strip()
+        if not file_path:
+            raise ValueError(f"Manifest entry without a file: {row}")
+        privacy = (row.get("privacy") or "").strip().lower() or None
+        if privacy and privacy not in PRIVACY_CHOICES:
+            raise ValueError(f"Invalid privacy {privacy!r} for {file_path}")
+        entries.append(
+            {
+                "file": os.path.join(base, file_path),
+                "title": row.get("title") or None,
+                "description": row.get("description") or None,
+                "privacy": privacy,
+                "playlists": _split_list(row.get("playlists")),
+                "tags": _split_list(row.get("tags")) or None,
+            }
+        )
+    return entries
+
+
+class JsonLinesReporter:
+    """
+    Writes one JSON object per job status change to `stream`.
+    Unchanged repeats (same step and progress) are skipped.
+    """
+
+    def __init__(self, stream=None):
+        self.stream = stream or sys.stdout
+        self._lock = threading.Lock()
+        self._last = {}
+
+    def emit(self, event):
+        with self._lock:
+            self.stream.write(json.dumps(event) + "\n")
+            self.stream.flush()
+
+    def report(self, job, status):
+        key = (status.step, status.progress, status.video_url)
+        with self._lock:
+            if self._last.get(job.id) == key:
+                return
+            self._last[job.id] = key
+        event = {
+            "event": "status",
+            "time": round(time.time(), 3),
+            "job": job.id,
+            "file": job.file_path,
+            "step": status.step,
+            "progress": status.progress,
+        }
+        if status.step == "Uploading" and status.bytes_sent:
+            event["bytes_sent"] = status.bytes_sent
+            event["mbit"] = round(status.smoothed_rate * 8 / 1e6, 2)
+            if status.eta is not None:
+                event["eta"] = round(status.eta, 1)
+        if status.video_url:
+            event["video_url"] = status.video_url
+        if status.error:
+            event["error"] = status.error
+        if status.retries:
+            event["retries"] = status.retries
+        if status.sha256:
+            event["sha256"] = status.sha256
+        self.emit(event)
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        prog="upload_cli.py",
+        description="Upload videos to YouTube without the GUI. "
+        "Progress is written to stdout as JSON lines.",
+    )
+    parser.add_argument("files", nargs="*", help="Video files to upload; - reads one from stdin")
+    parser.add_argument("-m", "--manifest", help="JSON or CSV manifest with per-file settings")
+    parser.add_argument("-j", "--jobs", type=int, default=2, help="Parallel uploads (default 2)")
+    parser.add_argument("--privacy", choices=PRIVACY_CHOICES, default="unlisted")
+    parser.add_argument("--title", help="Title (only with a single file)")
+    parser.add_argument(
+        "--name", default="stdin.mkv",
+        help="File name for the video read from stdin; its extension sets the MIME type",
+    )
+    parser.add_argument("--size", type=int, help="Length of the stdin video in bytes, if known")
+    parser.add_argument("--description", default="")
+    parser.add_argument("--playlist", action="append", default=[], help="Playlist ID (repeatable)")
+    parser.add_argument("--tag", action="append", default=[], help="Tag (repeatable)")
+    parser.add_argument(
+        "-w", "--watch", action="append", default=[], metavar="DIR",
+        help="Keep running and upload new videos that appear in DIR (repeatable)",
+    )
+    parser.add_argument(
+        "--settle", type=float, default=None, metavar="SECONDS",
+        help="How long a watched file must stay unchanged before it is uploaded",
+    )
+    parser.add_argument(
+        "-f", "--follow", action="store_true",
+        help="Start uploading files that are still being written (with --watch: as soon as they "
+        "appear) and finish once the writer closes them or they stop growing for --settle seconds",
+    )
+    parser.add_argument(
+        "--force", action="store_true",
+        help="Upload even if the same content was uploaded before (otherwise its URL is reported)",
+    )
+    parser.add_argument(
+        "--limit", type=float, metavar="MBIT",
+        help="Upload bandwidth limit in Mbit/s, 0 for none. Saved and applied to every "
+        "running uploader (GUI and CLI) within seconds",
+    )
+    parser.add_argument(
+        "--schedule", metavar="SPEC",
+        help='Time-of-day limits, e.g. "09:00-18:00=20" (Mbit/s; outside the windows --limit '
+        'applies). Saved like --limit; "" clears it',
+    )
+    parser.add_argument(
+        "--quota-limit", type=int, metavar="UNITS",
+        help="Daily API quota of the Google Cloud project (default 10000). Saved; uploads that "
+        "would exceed it wait for the reset at midnight Pacific time",
+    )
+    parser.add_argument(
+        "--trace", action="store_true",
+        help="Time every upload stage into traces.jsonl and ytupload.prom (Prometheus textfile) "
+        "in the app data folder; same as YTUPLOAD_TRACE=1",
+    )
+    parser.add_argument("-v", "--verbose", action="store_true", help="Log to stderr")
+    return parser
+
+
+def collect_entries(args):
+    entries = load_manifest(args.manifest) if args.manifest else []
+    if args.files.count("-") > 1:
+        raise ValueError("stdin can only be read once")
+    for file_path in args.files:
+        entries.append(
+            {
+                "file": args.name if file_path == "-" else os.path.abspath(file_path),
+                "stdin": file_path == "-",
+                "title": args.title if len(args.files) == 1 else None,
+                "description": None,
+                "privacy": None,
+                "playlists": [],
+                "tags": None,
+            }
+        )
+    for entry in entries:
+        entry["description"] = entry["description"] or args.description
+        entry["privacy"] = entry["privacy"] or args.privacy
+        entry["playlists"] = entry["playlists"] or list(args.playlist)
+        entry["tags"] = entry["tags"] or (list(args.tag) or None)
+    return entries
+
+
+def watch_entry(path, args):
+    """
+    Builds the manifest entry for a file that appeared in a watched folder,
+    using the folder's .ytupload.json over the command-line defaults.
+    """
+    from lib.watcher import load_folder_defaults
+
+    defaults = load_folder_defaults(os.path.dirname(path))
+    privacy = str(defaults.get("privacy") or args.privacy).lower()
+    if privacy not in PRIVACY_CHOICES:
+        privacy = args.privacy
+    return {
+        "file": path,
+        "title": defaults.get("title") or None,
+        "description": defaults.get("description") or args.description,
+        "privacy": privacy,
+        "playlists": _split_list(defaults.get("playlists")) or list(args.playlist),
+        "tags": _split_list(defaults.get("tags")) or (list(args.tag) or None),
+    }
+
+
+def quota_event(queue):
+    """
+    Today's API quota use and how many of the waiting jobs still fit.
+    """
+    from lib.quota import next_reset
+
+    fitting, waiting = queue.quota_forecast()
+    return {
+        "event": "quota",
+        "used": queue.quota.used(),
+        "limit": queue.quota.daily_limit,
+        "remaining": queue.quota.remaining(),
+        "jobs_waiting": waiting,
+        "jobs_fit": fitting,
+        "reset": time.strftime("%Y-%m-%dT%H:%M:%S%z", time.localtime(next_reset())),
+    }
+
+
+def _job(entry, args):
+    from lib.upload_queue import UploadJob
+
+    return UploadJob(
+        file_path=entry["file"],
+        playlist_ids=entry["playlists"],
+        privacy=entry["privacy"],
+        title=entry["title"],
+        description=entry["description"],
+        tags=entry["tags"],
+        growing=args.follow,
+        follow_idle=args.settle,
+        stream=sys.stdin.buffer if entry.get("stdin") else None,
+        stream_size=args.size if entry.get("stdin") else None,
+        force=args.force,
+    )
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    logging.basicConfig(
+        level=logging.INFO if args.verbose else logging.WARNING,
+        stream=sys.stderr,
+        format="%(asctime)s %(levelname)s %(message)s",
+    )
+
+    from lib.throttle import Throttle, parse_schedule
+
+    try:
+        entries = collect_entries(args)
+        schedule = None if args.schedule is None else parse_schedule(args.schedule)
+    except (OSError, ValueError) as e:
+        print(f"error: {e}", file=sys.stderr)
+        return 2
+
+    throttle = Throttle()
+    if args.limit is not None or schedule is not None:
+        throttle.configure(limit_mbit=args.limit, schedule=schedule)
+        if not entries and not args.watch:
+            print(json.dumps({"event": "throttle", **throttle.settings}))
+    if args.quota_limit is not None:
+        from lib.quota import get_ledger
+
+        get_ledger().configure(args.quota_limit)
+        if not entries and not args.watch:
+            print(json.dumps({"event": "quota", "limit": args.quota_limit}))
+    configured = args.limit is not None or schedule is not None or args.quota_limit is not None
+    if configured and not entries and not args.watch:
+        return 0
+    if not entries and not args.watch:
+        print("error: no files to upload", file=sys.stderr)
+        return 2
+
+    from lib.upload_queue import UploadQueue
+
+    if args.trace:
+        from lib.tracing import tracer
+
+        tracer.enable()
+    reporter = JsonLinesReporter()
+    queue = UploadQueue(args.jobs, callback=reporter.report, throttle=throttle)
+    jobs = [queue.submit(_job(entry, args)) for entry in entries]
+    if jobs:
+        reporter.emit(quota_event(queue))
+
+    watcher = None
+    if args.watch:
+        from lib.watcher import SETTLE_SECONDS, FolderWatcher
+
+        def on_ready(path):
+            # A file already queued or in flight (e.g. followed while growing) isn't new work.
+            done = ("Finished", "Error", "Duplicate")
+            if any(job.file_path == path and job.status.step not in done for job in jobs):
+                logging.info("Already queued, skipping: %s", path)
+                return
+            jobs.append(queue.submit(_job(watch_entry(path, args), args)))
+
+        settle = SETTLE_SECONDS if args.settle is None else args.settle
+        try:
+            watcher = FolderWatcher(
+                args.watch, on_ready, settle_seconds=settle, wait_for_settle=not args.follow
+            )
+            watcher.start()
+        except OSError as e:
+            print(f"error: {e}", file=sys.stderr)
+            queue.shutdown()
+            return 2
+        reporter.emit({"event": "watching", "folders": watcher.folders, "backend": watcher.backend})
+
+    next_rate = time.monotonic() + RATE_EVENT_INTERVAL
+    try:
+        while True:
+            if queue.wait(timeout=1):
+                if not watcher:
+                    break
+                time.sleep(1)  # Idle watch mode; short sleeps keep Ctrl+C working on Windows
+            if queue.active_count() and time.monotonic() >= next_rate:
+                next_rate = time.monotonic() + RATE_EVENT_INTERVAL
+                limit = throttle.current_limit()
+                reporter.emit(
+                    {
+                        "event": "rate",
+                        "mbit": round(throttle.measured_rate() * 8 / 1e6, 2),
+                        "limit_mbit": round(limit * 8 / 1e6, 2) if limit else None,
+                    }
+                )
+    except KeyboardInterrupt:
+        if watcher:
+            watcher.stop()
+        queue.shutdown()
+        reporter.emit({"event": "interrupted"})
+        return 130
+    queue.shutdown()
+
+    failed = [job for job in jobs if job.status.step not in ("Finished", "Duplicate")]
+    duplicates = [job for job in jobs if job.status.step == "Duplicate"]
+    reporter.emit(
+        {
+            "event": "done",
+            "finished": len(jobs) - len(failed) - len(duplicates),
+            "duplicates": len(duplicates),
+            "failed": len(failed),
+            "videos": {job.file_path: job.status.video_url for job in jobs if job.status.video_url},
+            "quota_used": queue.quota.used(),
+        }
+    )
+    return 1 if failed else 0
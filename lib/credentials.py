@@ -0,0 +1,216 @@
+import datetime
+import json
+import logging
+import os
+import pickle
+import stat
+import sys
+import threading
+
+REFRESH_MARGIN = 5 * 60  # Refresh this many seconds before the access token expires
+RETRY_DELAY = 60  # Wait before retrying a failed background refresh
+
+
+class TokenStore:
+    """
+    Where the OAuth credentials live between runs: a file at `path` that
+    subclasses know how to load and save.
+    """
+
+    def __init__(self, path):
+        self.path = path
+
+    def exists(self):
+        return os.path.exists(self.path)
+
+    def load(self):
+        raise NotImplementedError
+
+    def save(self, creds):
+        raise NotImplementedError
+
+    def clear(self):
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
+
+
+class DpapiTokenStore(TokenStore):
+    """
+    Windows: pickled credentials encrypted with DPAPI for the current user.
+    """
+
+    def load(self):
+        import win32crypt
+
+        with open(self.path, "rb") as f:
+            encrypted = f.read()
+        decrypted = win32crypt.CryptUnprotectData(encrypted, None, None, None, 0)[1]
+        return pickle.loads(decrypted)
+
+    def save(self, creds):
+        import win32crypt
+
+        data = pickle.dumps(creds)
+        encrypted = win32crypt.CryptProtectData(data, None, None, None, None, 0)
+        with open(self.path, "wb") as f:
+            f.write(encrypted)
+
+
+class FileTokenStore(TokenStore):
+    """
+    Linux/macOS: credentials as JSON in a file only the owner can read (0600).
+    """
+
+    def load(self):
+        from google.oauth2.credentials import Credentials
+
+        mode = os.stat(self.path).st_mode
+        if mode & (stat.S_IRWXG | stat.S_IRWXO):
+            logging.warning("Token file %s was readable by others; tightening permissions", self.path)
+            os.chmod(self.path, 0o600)
+        with open(self.path, "r", encoding="utf-8") as f:
+            info = json.load(f)
+        return Credentials.from_authorized_user_info(info)
+
+    def save(self, creds):
+        tmp = self.path + ".tmp"
+        fd = os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write(creds.to_json())
+        os.chmod(tmp, 0o600)
+        os.replace(tmp, self.path)
+
+
+def default_token_store(folder):
+    """
+    DPAPI on Windows, a permission-protected file everywhere else.
+    """
+    if sys.platform == "win32":
+        return DpapiTokenStore(os.path.join(folder, "token.enc"))
+    return FileTokenStore(os.path.join(folder, "token.json"))
+
+
+def _utcnow():
+    # google-auth keeps expiry as a naive UTC datetime.
+    return datetime.datetime.now(datetime.timezone.utc).replace(tzinfo=None)
+
+
+class CredentialManager:
+    """
+    Owns the process's OAuth credentials on top of a TokenStore.
+
+    Once loaded, the access token is refreshed on a background timer shortly
+    before it expires (and written back to the store), so requests never wait
+    on a refresh round trip. The credentials object stays the same across
+    refreshes, so anything holding it keeps working.
+    """
+
+    def __init__(self, store, client_secret_file, scopes):
+        self.store = store
+        self.client_secret_file = client_secret_file
+        self.scopes = scopes
+        self._lock = threading.RLock()
+        self._creds = None
+        self._timer = None
+
+    def get(self):
+        """
+        Returns valid credentials, loading, refreshing or running the OAuth
+        flow as needed.
+        """
+        with self._lock:
+            if self._creds is None or not self._creds.valid:
+                self._creds = self._load()
+                self._schedule_refresh()
+            return self._creds
+
+    def _load(self):
+        from google_auth_oauthlib.flow import InstalledAppFlow
+        from google.auth.transport.requests import Request
+
+        creds = self._creds
+        if creds is None and self.store.exists():
+            try:
+                creds = self.store.load()
+            except Exception as e:
+                logging.error("Failed to load token: %s", e)
+                self.store.clear()
+
+        if not creds or not creds.valid:
+            if creds and creds.expired and creds.refresh_token:
+                try:
+                    creds.refresh(Request())
+                except Exception as e:
+                    logging.error("Error refreshing credentials: %s", e)
+                    self.store.clear()
+                    creds = None
+
+            if not creds:
+                try:
+                    if not os.path.exists(self.client_secret_file):
+                        raise FileNotFoundError(
+                            f"client_secret.json not found at {self.client_secret_file}"
+                        )
+                    flow = InstalledAppFlow.from_client_secrets_file(
+                        self.client_secret_file, self.scopes
+                    )
+                    # Offline access returns a refresh token, which background refresh needs.
+                    creds = flow.run_local_server(
+                        port=0,
+                        authorization_url_params={"access_type": "offline", "prompt": "consent"},
+                    )
+                except FileNotFoundError as e:
+                    logging.error(f"Client secret file not found: {e}")
+                    raise
+                except Exception as e:
+                    logging.error(f"Auth error: {e}")
+                    raise
+
+            self.store.save(creds)
+
+        return creds
+
+    def refresh(self):
+        """
+        Refreshes the access token now and saves it.
+        """
+        from google.auth.transport.requests import Request
+
+        with self._lock:
+            creds = self._creds
+            if creds is None or not creds.refresh_token:
+                return
+            try:
+                creds.refresh(Request())
+                self.store.save(creds)
+            except Exception as e:
+                logging.error("Background token refresh failed: %s", e)
+                self._schedule_refresh(RETRY_DELAY)
+                return
+            self._schedule_refresh()
+
+    def _schedule_refresh(self, delay=None):
+        if self._timer:
+            self._timer.cancel()
+            self._timer = None
+        creds = self._creds
+        if creds is None or not creds.refresh_token or not creds.expiry:
+            return
+        if delay is None:
+            delay = (creds.expiry - _utcnow()).total_seconds() - REFRESH_MARGIN
+        self._timer = threading.Timer(max(delay, 0), self.refresh)
+        self._timer.daemon = True
+        self._timer.start()
+
+    def clear(self):
+        """
+        Forgets the credentials in memory and in the store.
+        """
+        with self._lock:
+            if self._timer:
+                self._timer.cancel()
+                self._timer = None
+            self._creds = None
+            self.store.clear()
@@ -0,0 +1,120 @@
+"""
+Local index of uploaded content, so the same video (or a renamed copy) is not
+uploaded twice. Files are matched on size plus a fingerprint of sampled
+blocks, which costs a few small reads; only a candidate match is confirmed
+with a full SHA-256 of the file.
+"""
+import hashlib
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+from lib.uploader import get_appdata_dir
+
+INDEX_DB = os.path.join(get_appdata_dir(), "uploads.db")
+SAMPLE_BLOCK = 64 * 1024
+SAMPLE_COUNT = 16  # Blocks read for the partial fingerprint (first, last, evenly between)
+HASH_BLOCK = 1024 * 1024
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS fingerprints (
+    sha256 TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    partial TEXT NOT NULL,
+    video_id TEXT NOT NULL,
+    file_path TEXT,
+    uploaded REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS fingerprints_partial ON fingerprints (size, partial);
+"""
+
+
+def partial_fingerprint(file_path):
+    """
+    Returns (size, fingerprint) from the file size and SAMPLE_COUNT blocks
+    spread over the file (the whole file if it is small).
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    with open(file_path, "rb") as f:
+        size = os.fstat(f.fileno()).st_size
+        digest.update(size.to_bytes(8, "little"))
+        if size <= SAMPLE_BLOCK * SAMPLE_COUNT:
+            digest.update(f.read())
+        else:
+            step = (size - SAMPLE_BLOCK) / (SAMPLE_COUNT - 1)
+            for i in range(SAMPLE_COUNT):
+                f.seek(int(i * step))
+                digest.update(f.read(SAMPLE_BLOCK))
+    return size, digest.hexdigest()
+
+
+def file_sha256(file_path):
+    digest = hashlib.sha256()
+    with open(file_path, "rb", buffering=0) as f:
+        buf = bytearray(HASH_BLOCK)
+        view = memoryview(buf)
+        while True:
+            n = f.readinto(buf)
+            if not n:
+                break
+            digest.update(view[:n])
+    return digest.hexdigest()
+
+
+class DedupIndex:
+    """
+    SQLite table of uploaded content (sha256 -> video ID). Safe to share
+    between threads.
+    """
+
+    def __init__(self, path=INDEX_DB):
+        self.path = path
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.executescript(_SCHEMA)
+
+    def lookup(self, file_path):
+        """
+        Returns (video_id, sha256) if this content was uploaded before, else
+        None. Hashes the whole file only if size and sampled blocks match.
+        """
+        size, partial = partial_fingerprint(file_path)
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT sha256, video_id FROM fingerprints WHERE size = ? AND partial = ?",
+                (size, partial),
+            ).fetchall()
+        if not rows:
+            return None
+        sha256 = file_sha256(file_path)
+        for candidate, video_id in rows:
+            if candidate == sha256:
+                return video_id, sha256
+        return None
+
+    def record(self, file_path, video_id, sha256=None):
+        """
+        Adds (or updates) the entry for an uploaded file. Hashes the file if
+        `sha256` isn't given.
+        """
+        size, partial = partial_fingerprint(file_path)
+        sha256 = sha256 or file_sha256(file_path)
+        with self._lock, self._db:
+            self._db.execute(
+                "INSERT OR REPLACE INTO fingerprints VALUES (?, ?, ?, ?, ?, ?)",
+                (sha256, size, partial, video_id, os.path.abspath(file_path), time.time()),
+            )
+        logging.info("Indexed %s as video %s", file_path, video_id)
+
+    def forget(self, video_id):
+        """
+        Drops entries for a video that no longer exists on YouTube.
+        """
+        with self._lock, self._db:
+            self._db.execute("DELETE FROM fingerprints WHERE video_id = ?", (video_id,))
+
+    def close(self):
+        with self._lock:
+            self._db.close()
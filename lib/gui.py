@@ -0,0 +1,866 @@
+import os
+import sys
+import json
+import logging
+import time
+import webbrowser
+
+from PyQt6 import QtWidgets, QtCore, QtGui
+
+from PyQt6.QtCore import Qt
+
+
+# Import the MultiSelectComboBox from the package
+from lib.multiselect_combobox import MultiSelectComboBox
+from lib.uploader import (
+    LATENCY_BUCKETS,
+    get_playlists,
+    get_channel_info,
+    latency_percentile,
+    revoke_auth,
+    resource_path,
+)
+from lib.upload_queue import UploadJob, UploadQueue, DEFAULT_WORKERS, MAX_WORKERS, resumable_jobs
+
+STEP_COLORS = {
+    "Queued": "#9e9e9e",
+    "Uploading": "#ff9800",
+    "Processing": "#2196f3",
+    "Verifying": "#9c27b0",
+    "Finished": "#4caf50",
+    "Duplicate": "#8bc34a",
+    "Deferred": "#795548",
+    "Error": "#f44336",
+}
+
+
+def _format_eta(seconds):
+    seconds = int(seconds)
+    if seconds >= 3600:
+        return f"{seconds // 3600}:{seconds % 3600 // 60:02d}:{seconds % 60:02d}"
+    return f"{seconds // 60}:{seconds % 60:02d}"
+
+
+def _format_latency(bound):
+    if bound is None:
+        return "-"
+    if bound == float("inf"):
+        return f">{LATENCY_BUCKETS[-1]:g}s"
+    return f"<={bound * 1000:.0f}ms" if bound < 1 else f"<={bound:g}s"
+
+
+def transfer_text(status):
+    """
+    Smoothed rate and time left, e.g. "18.5 Mb/s 2:10".
+    """
+    if not status.smoothed_rate:
+        return ""
+    text = f"{status.smoothed_rate * 8 / 1e6:.1f} Mb/s"
+    if status.eta is not None:
+        text += f" {_format_eta(status.eta)}"
+    return text
+
+
+def transfer_tooltip(status):
+    sent = f"{status.bytes_sent / 1e6:.1f} MB"
+    if status.total_bytes:
+        sent += f" of {status.total_bytes / 1e6:.1f} MB"
+    lines = [
+        f"Sent: {sent}",
+        f"Last chunk: {status.rate * 8 / 1e6:.1f} Mbit/s, smoothed {status.smoothed_rate * 8 / 1e6:.1f} Mbit/s",
+        f"Time left: {_format_eta(status.eta) if status.eta is not None else 'unknown'}",
+        f"Chunk size: {status.chunk_size / 2**20:g} MiB",
+        "Chunk latency p50 {} p90 {} p99 {}".format(
+            *(_format_latency(latency_percentile(status.chunk_latency, q)) for q in (0.5, 0.9, 0.99))
+        ),
+    ]
+    bounds = [_format_latency(b) for b in LATENCY_BUCKETS] + [_format_latency(float("inf"))]
+    lines += [f"  {bound:>8}  {count}" for bound, count in zip(bounds, status.chunk_latency) if count]
+    return "\n".join(lines)
+
+
+# Bridges upload queue callbacks (worker threads) onto the GUI thread.
+class QueueBridge(QtCore.QObject):
+    job_update = QtCore.pyqtSignal(object, object)  # Emits (UploadJob, StatusSnapshot)
+
+    def report(self, job, status):
+        self.job_update.emit(job, status)
+
+
+# Bridges files forwarded by later launches (server thread) onto the GUI thread.
+class InstanceBridge(QtCore.QObject):
+    files_received = QtCore.pyqtSignal(list)
+
+
+# Worker to run the authentication in a separate thread.
+class AuthWorker(QtCore.QObject):
+    finished = QtCore.pyqtSignal()             # Emits when auth is done (success or fail)
+    error = QtCore.pyqtSignal(str)               # Emits if there's an authentication error
+    channel_info_ready = QtCore.pyqtSignal(dict) # Emits the channel info
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+
+    def run(self):
+        try:
+            from lib.uploader import authenticate, get_channel_info
+            authenticate()
+            channel_info = get_channel_info()
+            if channel_info:
+                self.channel_info_ready.emit(channel_info)
+            else:
+                self.error.emit("Could not retrieve channel information.")
+        except Exception as e:
+            self.error.emit(str(e))
+        finally:
+            self.finished.emit()
+
+class ProfileImageWorker(QtCore.QObject):
+    image_loaded = QtCore.pyqtSignal(QtGui.QPixmap)
+    error = QtCore.pyqtSignal(str)
+    finished = QtCore.pyqtSignal()
+    
+    def __init__(self, url, parent=None):
+        super().__init__(parent)
+        self.url = url
+
+    def run(self):
+        try:
+            import requests
+
+            resp = requests.get(self.url)
+            if resp.status_code == 200:
+                pixmap = QtGui.QPixmap()
+                pixmap.loadFromData(resp.content)
+                self.image_loaded.emit(pixmap)
+            else:
+                self.error.emit(f"Error loading image: {resp.status_code}")
+        except Exception as e:
+            self.error.emit(str(e))
+        finally:
+            self.finished.emit()
+
+
+class PlaylistsWorker(QtCore.QObject):
+    playlists_loaded = QtCore.pyqtSignal(list)
+    error = QtCore.pyqtSignal(str)
+    finished = QtCore.pyqtSignal()
+    
+    def run(self):
+        try:
+            playlists = get_playlists()
+            self.playlists_loaded.emit(playlists)
+        except Exception as e:
+            self
+
+
+class SegmentedProgressBar(QtWidgets.QProgressBar):
+    def __init__(self, segments=20, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.segments = segments
+        self.setTextVisible(False)
+        self.setMinimum(0)
+        self.setMaximum(100)
+        self.setValue(0)
+
+    def paintEvent(self, event):
+        painter = QtGui.QPainter(self)
+        painter.setRenderHint(QtGui.QPainter.RenderHint.Antialiasing)
+        rect = self.rect()
+        rectF = QtCore.QRectF(rect)
+
+        radius = 10
+        painter.setPen(QtGui.QColor("#555"))
+        painter.setBrush(QtGui.QColor("#3c3c3c"))
+        painter.drawRoundedRect(rectF, radius, radius)
+
+        path = QtGui.QPainterPath()
+        path.addRoundedRect(rectF, radius, radius)
+        painter.setClipPath(path)
+
+        metrics = QtGui.QFontMetrics(self.font())
+        char_width = metrics.horizontalAdvance("M")
+        char_height = metrics.height()
+
+        spacing = 1
+        total_width = self.segments * char_width + (self.segments - 1) * spacing
+        start_x = (rect.width() - total_width) / 2 if rect.width() > total_width else 0
+        start_y = (rect.height() - char_height) / 2 if rect.height() > char_height else 0
+
+        total_range = self.maximum() - self.minimum()
+        progress_ratio = (self.value() - self.minimum()) / total_range if total_range != 0 else 0
+        num_filled = int(self.segments * progress_ratio + 0.5)
+
+        for i in range(self.segments):
+            x = start_x + i * (char_width + spacing)
+            block_rect = QtCore.QRectF(x, start_y, char_width, char_height)
+            if i < num_filled:
+                painter.setBrush(QtGui.QColor("#05B8CC"))
+            else:
+                painter.setBrush(QtGui.QColor("#2b2b2b"))
+            painter.drawRect(block_rect)
+        painter.end()
+
+
+class MainWindow(QtWidgets.QWidget):
+    def __init__(self, launch_time=None, startup_bench=False):
+        super().__init__()
+        self.launch_time = launch_time or time.perf_counter()
+        self.startup_bench = startup_bench  # Quit and report once Upload is enabled
+        self.setFixedSize(500, 560)
+        self.setWindowTitle("YouTube Uploader")
+
+        icon_path = resource_path("lib/yt.ico")
+        self.setWindowIcon(QtGui.QIcon(icon_path))
+
+        self.file_paths = []
+        self.auth_in_progress = False  # Keep track of authentication
+        self.job_rows = {}  # UploadJob.id -> table row
+        self.current_job = None  # Job shown in the progress/URL rows
+        self.historyDialog = None
+
+        self.queueBridge = QueueBridge()
+        self.queueBridge.job_update.connect(self.handle_job_update)
+        self.uploadQueue = UploadQueue(DEFAULT_WORKERS, callback=self.queueBridge.report)
+        self.instanceBridge = InstanceBridge()
+        self.instanceBridge.files_received.connect(self.enqueue_forwarded_files)
+
+        self.setupUI()
+        self.applyStyle()
+        self.start_authentication()
+
+        self.rateTimer = QtCore.QTimer(self)
+        self.rateTimer.timeout.connect(self.update_rate)
+        self.rateTimer.start(1000)
+
+    def setupUI(self):
+        main_layout = QtWidgets.QVBoxLayout(self)
+        main_layout.setContentsMargins(10, 10, 10, 10)
+        main_layout.setSpacing(10)
+        uniform_height = 30
+
+        # Title row: Title field on the left, channel info on the right.
+        title_layout = QtWidgets.QHBoxLayout()
+        self.lineEdit = QtWidgets.QLineEdit(self)
+        self.lineEdit.setPlaceholderText("Title...")
+        self.lineEdit.setFixedWidth(300)
+        self.lineEdit.setFixedHeight(uniform_height)
+        title_layout.addWidget(self.lineEdit)
+
+        # Channel info widget: channel name and profile picture.
+        self.channelWidget = QtWidgets.QWidget(self)
+        self.channelWidget.setFixedHeight(uniform_height)
+        ch_layout = QtWidgets.QHBoxLayout(self.channelWidget)
+        ch_layout.setContentsMargins(0, 0, 0, 0)
+        self.channelName = QtWidgets.QLabel("Authenticating...", self)
+        font = self.channelName.font()
+        font.setBold(True)
+        self.channelName.setFont(font)
+        ch_layout.addWidget(self.channelName)
+        self.channelPic = QtWidgets.QLabel(self)
+        self.channelPic.setFixedSize(uniform_height, uniform_height)
+        self.channelPic.setScaledContents(True)
+        ch_layout.addWidget(self.channelPic)
+        self.channelWidget.setContextMenuPolicy(QtCore.Qt.ContextMenuPolicy.CustomContextMenu)
+        self.channelWidget.customContextMenuRequested.connect(self.show_channel_menu)
+        title_layout.addWidget(self.channelWidget)
+        main_layout.addLayout(title_layout)
+
+        # Description field.
+        self.textBox = QtWidgets.QTextEdit(self)
+        self.textBox.setPlaceholderText("Description...")
+        self.textBox.setText("Uploaded via YouTube Uploader Library")
+        self.textBox.setFixedHeight(100)
+        main_layout.addWidget(self.textBox)
+
+        # File selection row.
+        file_layout = QtWidgets.QHBoxLayout()
+        self.selectFileButton = QtWidgets.QPushButton("Select File", self)
+        self.selectFileButton.setFixedHeight(uniform_height)
+        self.selectFileButton.clicked.connect(self.select_file)
+        file_layout.addWidget(self.selectFileButton)
+        self.filePathDisplay = QtWidgets.QLineEdit(self)
+        self.filePathDisplay.setReadOnly(True)
+        self.filePathDisplay.setFixedHeight(uniform_height)
+        file_layout.addWidget(self.filePathDisplay)
+        main_layout.addLayout(file_layout)
+
+        # Progress row.
+        progress_layout = QtWidgets.QHBoxLayout()
+        self.statusLabel = QtWidgets.QLabel("Idle", self)
+        self.statusLabel.setFixedWidth(120)
+        self.statusLabel.setFixedHeight(uniform_height)
+        self.statusLabel.setAlignment(QtCore.Qt.AlignmentFlag.AlignCenter)
+        font_status = self.statusLabel.font()
+        font_status.setBold(True)
+        self.statusLabel.setFont(font_status)
+        progress_layout.addWidget(self.statusLabel)
+        self.progressBar = SegmentedProgressBar(segments=20, parent=self)
+        self.progressBar.setFixedHeight(uniform_height)
+        progress_layout.addWidget(self.progressBar, 1)
+        self.progressNumber = QtWidgets.QLabel("0%", self)
+        self.progressNumber.setFixedWidth(50)
+        self.progressNumber.setFixedHeight(uniform_height)
+        self.progressNumber.setAlignment(QtCore.Qt.AlignmentFlag.AlignCenter)
+        font_number = self.progressNumber.font()
+        font_number.setBold(True)
+        self.progressNumber.setFont(font_number)
+        progress_layout.addWidget(self.progressNumber)
+        self.rateLabel = QtWidgets.QLabel("", self)
+        self.rateLabel.setFixedWidth(110)
+        self.rateLabel.setFixedHeight(uniform_height)
+        self.rateLabel.setAlignment(QtCore.Qt.AlignmentFlag.AlignCenter)
+        progress_layout.addWidget(self.rateLabel)
+        main_layout.addLayout(progress_layout)
+
+        # Upload controls row: visibility dropdown, playlist multiselect, Upload button.
+        upload_layout = QtWidgets.QHBoxLayout()
+        self.visibilityCombo = QtWidgets.QComboBox(self)
+        self.visibilityCombo.setFixedHeight(uniform_height)
+        self.visibilityCombo.setFixedWidth(100)
+        self.visibilityCombo.addItems(["Private", "Unlisted", "Public"])
+        self.visibilityCombo.setCurrentIndex(1)
+        upload_layout.addWidget(self.visibilityCombo)
+        
+        self.playlistCombo = MultiSelectComboBox(self)
+        self.playlistCombo.setFixedHeight(uniform_height)
+        self.playlistCombo.setPlaceholderText("Loading...")
+
+
+        self.playlistCombo.setFocusPolicy(Qt.FocusPolicy.NoFocus)
+        self.playlistCombo.setContextMenuPolicy(Qt.ContextMenuPolicy.NoContextMenu)
+        upload_layout.addWidget(self.playlistCombo)
+        
+        self.workersSpin = QtWidgets.QSpinBox(self)
+        self.workersSpin.setFixedHeight(uniform_height)
+        self.workersSpin.setRange(1, MAX_WORKERS)
+        self.workersSpin.setValue(DEFAULT_WORKERS)
+        self.workersSpin.setToolTip("Parallel uploads")
+        self.workersSpin.valueChanged.connect(self.uploadQueue.set_max_workers)
+        upload_layout.addWidget(self.workersSpin)
+
+        self.limitSpin = QtWidgets.QDoubleSpinBox(self)
+        self.limitSpin.setFixedHeight(uniform_height)
+        self.limitSpin.setRange(0, 10000)
+        self.limitSpin.setDecimals(1)
+        self.limitSpin.setSuffix(" Mb/s")
+        self.limitSpin.setSpecialValueText("No limit")
+        self.limitSpin.setValue(self.uploadQueue.throttle.settings.get("limit_mbit") or 0)
+        self.limitSpin.setToolTip("Upload bandwidth limit (Mbit/s), shared by all uploads")
+        self.limitSpin.valueChanged.connect(self.set_upload_limit)
+        upload_layout.addWidget(self.limitSpin)
+
+        self.uploadButton = QtWidgets.QPushButton("Upload", self)
+        self.uploadButton.setFixedHeight(uniform_height)
+        self.uploadButton.clicked.connect(self.upload_video)
+        self.uploadButton.setEnabled(False)  # Disable until authenticated.
+        upload_layout.addWidget(self.uploadButton)
+        main_layout.addLayout(upload_layout)
+
+        # Video URL row.
+        url_layout = QtWidgets.QHBoxLayout()
+        self.urlDisplay = QtWidgets.QLineEdit(self)
+        self.urlDisplay.setReadOnly(True)
+        self.urlDisplay.setFixedHeight(uniform_height)
+        self.urlDisplay.setPlaceholderText("Youtube Video URL")
+        url_layout.addWidget(self.urlDisplay)
+        self.copyButton = QtWidgets.QPushButton("Copy", self)
+        self.copyButton.setFixedHeight(uniform_height)
+        self.copyButton.clicked.connect(self.copy_url)
+        url_layout.addWidget(self.copyButton)
+        self.openButton = QtWidgets.QPushButton("Open", self)
+        self.openButton.setFixedHeight(uniform_height)
+        self.openButton.clicked.connect(self.open_browser)
+        url_layout.addWidget(self.openButton)
+        self.historyButton = QtWidgets.QPushButton("History", self)
+        self.historyButton.setFixedHeight(uniform_height)
+        self.historyButton.clicked.connect(self.show_history)
+        url_layout.addWidget(self.historyButton)
+        main_layout.addLayout(url_layout)
+
+        # Job queue: one row per enqueued file.
+        self.jobTable = QtWidgets.QTableWidget(0, 3, self)
+        self.jobTable.setHorizontalHeaderLabels(["File", "Status", "Progress"])
+        self.jobTable.verticalHeader().setVisible(False)
+        self.jobTable.setEditTriggers(QtWidgets.QAbstractItemView.EditTrigger.NoEditTriggers)
+        self.jobTable.setSelectionBehavior(QtWidgets.QAbstractItemView.SelectionBehavior.SelectRows)
+        self.jobTable.setSelectionMode(QtWidgets.QAbstractItemView.SelectionMode.SingleSelection)
+        header = self.jobTable.horizontalHeader()
+        header.setSectionResizeMode(0, QtWidgets.QHeaderView.ResizeMode.Stretch)
+        header.setSectionResizeMode(1, QtWidgets.QHeaderView.ResizeMode.ResizeToContents)
+        header.setSectionResizeMode(2, QtWidgets.QHeaderView.ResizeMode.ResizeToContents)
+        self.jobTable.itemSelectionChanged.connect(self.on_job_selected)
+        main_layout.addWidget(self.jobTable, 1)
+
+    def applyStyle(self):
+        styleSheet = """
+        QWidget {
+            background-color: #2b2b2b;
+            color: #f0f0f0;
+            font-size: 14px;
+        }
+        QLineEdit, QTextEdit, QLabel, QProgressBar {
+            border: 2px solid #555;
+            border-radius: 10px;
+            padding: 5px;
+            background-color: #3c3c3c;
+        }
+        QPushButton {
+            background-color: #5a5a5a;
+            font-weight: bold;
+            border: 2px solid #555;
+            border-radius: 10px;
+            padding: 5px;
+        }
+        QPushButton:hover {
+            background-color: #707070;
+        }
+        QPushButton::pressed {
+            background-color: #404040;
+        }
+        QComboBox {
+            font-weight: bold;
+        }
+        QProgressBar::chunk {
+            background-color: #fd5a5a;
+            border-radius: 10px;
+        }
+        """
+        self.setStyleSheet(styleSheet)
+
+   
+
+    def start_authentication(self):
+        self.authThread = QtCore.QThread()
+        self.authWorker = AuthWorker()
+        self.authWorker.moveToThread(self.authThread)
+        self.authThread.started.connect(self.authWorker.run)
+        self.authWorker.finished.connect(self.authThread.quit)
+        self.authWorker.finished.connect(self.authWorker.deleteLater)
+        self.authThread.finished.connect(self.authThread.deleteLater)
+        self.authWorker.channel_info_ready.connect(self.on_channel_info_ready)
+        self.authWorker.error.connect(self.on_auth_error)
+        self.authThread.start()
+        self.auth_in_progress = True
+
+    def on_channel_info_ready(self, info):
+        # Update channel name immediately.
+        self.channelName.setText(info.get("title", "Unknown"))
+        
+        # Start a thread to load the profile image.
+        profile_url = info.get("profile_image", "")
+        if profile_url:
+            self.profileThread = QtCore.QThread()
+            self.profileWorker = ProfileImageWorker(profile_url)
+            self.profileWorker.moveToThread(self.profileThread)
+            self.profileThread.started.connect(self.profileWorker.run)
+            self.profileWorker.image_loaded.connect(self.channelPic.setPixmap)
+            self.profileWorker.error.connect(lambda e: print("Profile image error:", e))
+            self.profileWorker.finished.connect(self.profileThread.quit)
+            self.profileWorker.finished.connect(self.profileWorker.deleteLater)
+            self.profileThread.finished.connect(self.profileThread.deleteLater)
+            self.profileThread.start()
+        else:
+            self.channelPic.clear()
+        
+        # Start a thread to load playlists.
+        self.playlistsThread = QtCore.QThread()
+        self.playlistsWorker = PlaylistsWorker()
+        self.playlistsWorker.moveToThread(self.playlistsThread)
+        self.playlistsThread.started.connect(self.playlistsWorker.run)
+        self.playlistsWorker.playlists_loaded.connect(self.handle_playlists)
+        self.playlistsWorker.error.connect(lambda e: print("Playlists error:", e))
+        self.playlistsWorker.finished.connect(self.playlistsThread.quit)
+        self.playlistsWorker.finished.connect(self.playlistsWorker.deleteLater)
+        self.playlistsThread.finished.connect(self.playlistsThread.deleteLater)
+        self.playlistsThread.start()
+        
+        self.uploadButton.setEnabled(True)
+        self.auth_in_progress = False
+        self.report_startup()
+        self.resume_unfinished_uploads()
+
+    def report_startup(self):
+        elapsed_ms = (time.perf_counter() - self.launch_time) * 1000
+        logging.info("Upload enabled %.0f ms after launch", elapsed_ms)
+        if self.startup_bench:
+            print(json.dumps({"upload_enabled_ms": round(elapsed_ms, 1)}), flush=True)
+            QtWidgets.QApplication.quit()
+
+    def resume_unfinished_uploads(self):
+        jobs = [job for job in resumable_jobs() if job.file_path not in self.queued_paths()]
+        if not jobs:
+            return
+        names = "\n".join(os.path.basename(job.file_path) for job in jobs)
+        answer = QtWidgets.QMessageBox.question(
+            self,
+            "Resume Uploads",
+            f"{len(jobs)} upload(s) did not finish last time:\n\n{names}\n\nResume them now?",
+        )
+        if answer != QtWidgets.QMessageBox.StandardButton.Yes:
+            return
+        for job in jobs:
+            self.add_job_row(job)
+            self.current_job = job
+            self.uploadQueue.submit(job)
+
+    def queued_paths(self):
+        # Deferred jobs are still the queue's: it starts them after the quota reset.
+        paths = set()
+        for row in range(self.jobTable.rowCount()):
+            job = self.jobTable.item(row, 0).data(Qt.ItemDataRole.UserRole)
+            if job.status.step not in ("Finished", "Error", "Duplicate"):
+                paths.add(job.file_path)
+        return paths
+
+    def handle_playlists(self, playlists):
+        self.playlistCombo.clear()
+        for pl in playlists:
+            title = pl["snippet"]["title"]
+            playlist_id = pl["id"]
+            self.playlistCombo.addItem(title, playlist_id)
+
+        self.playlistCombo.setPlaceholderText("Select Playlists")
+        self.playlistCombo.updateText()
+
+
+    def on_auth_error(self, message):
+        if self.startup_bench:
+            print(json.dumps({"error": message}), flush=True)
+            QtWidgets.QApplication.exit(1)
+            return
+        QtWidgets.QMessageBox.critical(self, "Auth Error", message)
+        self.channelName.setText("Auth Failed")
+        self.channelPic.clear()
+        self.auth_in_progress = False
+
+    def populate_playlists(self):
+        try:
+            playlists = get_playlists()
+            self.playlistCombo.clear()
+            for pl in playlists:
+                title = pl["snippet"]["title"]
+
+                playlist_id = pl["id"]
+                self.playlistCombo.addItem(title, playlist_id)
+                
+            self.playlistCombo.updateText()
+        except Exception as e:
+            print(f"Error retrieving playlists: {e}")
+            self.playlistCombo.clear()
+
+
+    def update_channel_info(self, info=None):
+        if info is None:
+            info = get_channel_info()
+        if info:
+            self.channelName.setText(info.get("title", "Unknown"))
+            try:
+                import requests
+
+                resp = requests.get(info.get("profile_image", ""))
+                if resp.status_code == 200:
+                    pixmap = QtGui.QPixmap()
+                    pixmap.loadFromData(resp.content)
+                    self.channelPic.setPixmap(pixmap)
+                else:
+                    self.channelPic.clear()
+            except Exception as e:
+                print("Error loading profile image:", e)
+                self.channelPic.clear()
+        else:
+            self.channelName.setText("Not Signed In")
+            self.channelPic.clear()
+
+    def show_channel_menu(self, pos):
+        menu = QtWidgets.QMenu(self)
+        menu.setStyleSheet(
+            """
+            QMenu {
+                background-color: #3c3c3c;
+                border: 2px solid #555;
+                border-radius: 10px;
+                padding: 5px;
+                color: #f0f0f0;
+            }
+            QMenu::item {
+                padding: 5px 25px;
+                background-color: transparent;
+                border-radius: 8px;  /* Add this to make selection look rounded */
+            }
+            QMenu::item:selected {
+                background-color: #fd5a5a;
+                border-radius: 8px;  /* Rounded corners on selection */
+            }
+            """
+        )
+
+        if self.channelName.text() in ["Not Signed In", "Auth Failed"]:
+            action = menu.addAction("Sign In")
+        else:
+            action = menu.addAction("Log Out")
+            if self.auth_in_progress:
+                action.setEnabled(False)
+        global_pos = self.channelWidget.mapToGlobal(pos)
+        global_main_rect = QtCore.QRect(self.mapToGlobal(QtCore.QPoint(0, 0)), self.size())
+        menu_size = menu.sizeHint()
+        if global_pos.x() + menu_size.width() > global_main_rect.right():
+            global_pos.setX(global_main_rect.right() - menu_size.width())
+        if global_pos.y() + menu_size.height() > global_main_rect.bottom():
+            global_pos.setY(global_main_rect.bottom() - menu_size.height())
+        selected = menu.exec(global_pos)
+        if selected == action:
+            if self.channelName.text() in ["Not Signed In", "Auth Failed"]:
+                self.start_authentication()
+            else:
+                if revoke_auth():
+                    self.channelName.setText("Not Signed In")
+                    self.channelPic.clear()
+                    self.playlistCombo.clear()
+                    self.playlistCombo.lineEdit().clear()
+
+    def select_file(self):
+        file_paths, _ = QtWidgets.QFileDialog.getOpenFileNames(
+            self, "Select Video Files", "", "Video Files (*.mp4 *.mkv)"
+        )
+        if file_paths:
+            self.set_file_paths(file_paths)
+
+    def set_file_path(self, file_path: str):
+        self.set_file_paths([file_path])
+
+    def set_file_paths(self, file_paths: list):
+        self.file_paths = list(file_paths)
+        if len(self.file_paths) == 1:
+            base = os.path.basename(self.file_paths[0])
+            self.filePathDisplay.setText(base)
+            title, _ = os.path.splitext(base)
+            self.lineEdit.setText(title)
+            self.lineEdit.setEnabled(True)
+        else:
+            self.filePathDisplay.setText(f"{len(self.file_paths)} files selected")
+            # Each file is titled after its own name.
+            self.lineEdit.clear()
+            self.lineEdit.setEnabled(False)
+        self.filePathDisplay.setAlignment(QtCore.Qt.AlignmentFlag.AlignLeft)
+        self.textBox.clear()
+
+    def copy_url(self):
+        clipboard = QtWidgets.QApplication.clipboard()
+        clipboard.setText(self.urlDisplay.text())
+
+    def open_browser(self):
+        url = self.urlDisplay.text().strip()
+        if url:
+            webbrowser.open(url)
+
+    def upload_video(self):
+        if not self.file_paths:
+            return
+        title = self.lineEdit.text().strip() if len(self.file_paths) == 1 else None
+        description = self.textBox.toPlainText().strip()
+        privacy = self.visibilityCombo.currentText().lower()
+        # Retrieve the list of selected playlist IDs using currentData().
+        playlist_ids = self.playlistCombo.currentData()
+
+        for file_path in self.file_paths:
+            job = UploadJob(
+                file_path=file_path,
+                playlist_ids=playlist_ids,
+                privacy=privacy,
+                title=title,
+                description=description,
+            )
+            self.add_job_row(job)
+            self.current_job = job
+            self.uploadQueue.submit(job)
+
+        self.file_paths = []
+        self.filePathDisplay.clear()
+        self.lineEdit.clear()
+        self.lineEdit.setEnabled(True)
+
+    def enqueue_forwarded_files(self, file_paths):
+        """
+        Queues files handed over by later launches, using the current
+        visibility/playlist/description settings, and brings the window up.
+        """
+        description = self.textBox.toPlainText().strip()
+        privacy = self.visibilityCombo.currentText().lower()
+        playlist_ids = self.playlistCombo.currentData()
+        queued = self.queued_paths()
+        for file_path in file_paths:
+            if file_path in queued or not os.path.exists(file_path):
+                continue
+            job = UploadJob(
+                file_path=file_path,
+                playlist_ids=playlist_ids,
+                privacy=privacy,
+                description=description,
+            )
+            self.add_job_row(job)
+            self.current_job = job
+            self.uploadQueue.submit(job)
+        self.showNormal()
+        self.raise_()
+        self.activateWindow()
+
+    def add_job_row(self, job):
+        row = self.jobTable.rowCount()
+        self.jobTable.insertRow(row)
+        name_item = QtWidgets.QTableWidgetItem(os.path.basename(job.file_path))
+        name_item.setToolTip(job.file_path)
+        name_item.setData(Qt.ItemDataRole.UserRole, job)
+        self.jobTable.setItem(row, 0, name_item)
+        self.jobTable.setItem(row, 1, QtWidgets.QTableWidgetItem(job.status.step))
+        self.jobTable.setItem(row, 2, QtWidgets.QTableWidgetItem("0%"))
+        self.job_rows[job.id] = row
+
+    def on_job_selected(self):
+        items = self.jobTable.selectedItems()
+        if not items:
+            return
+        job = self.jobTable.item(items[0].row(), 0).data(Qt.ItemDataRole.UserRole)
+        self.current_job = job
+        status = job.status.snapshot()
+        self.urlDisplay.setText(status.video_url)
+        self.handle_progress_update(status)
+
+    def handle_job_update(self, job, status):
+        row = self.job_rows.get(job.id)
+        if row is not None:
+            # Only touch what changed: every set repaints the cell.
+            status_item = self.jobTable.item(row, 1)
+            if status_item.text() != status.step:
+                status_item.setText(status.step)
+                status_item.setForeground(QtGui.QColor(STEP_COLORS.get(status.step, "#ffffff")))
+            tooltip = status.error or ""
+            if status.retries:
+                tooltip = f"{tooltip}\nRetries: {status.retries}, resent {status.wasted_bytes / 1e6:.1f} MB".strip()
+            if status.sha256:
+                tooltip = f"{tooltip}\nSHA-256: {status.sha256}".strip()
+            if status_item.toolTip() != tooltip:
+                status_item.setToolTip(tooltip)
+            progress = status.progress if status.step == "Uploading" else 100
+            if status.step in ("Queued", "Deferred"):
+                progress = 0
+            progress_item = self.jobTable.item(row, 2)
+            if progress_item.text() != f"{progress}%":
+                progress_item.setText(f"{progress}%")
+        if job is self.current_job:
+            self.handle_progress_update(status)
+        if status.step == "Duplicate":
+            self.offer_duplicate(job)
+
+    def offer_duplicate(self, job):
+        """
+        The file's content is already on the channel: offer its URL, or
+        upload it again anyway.
+        """
+        answer = QtWidgets.QMessageBox.question(
+            self,
+            "Already uploaded",
+            f"{os.path.basename(job.file_path)} was already uploaded:\n{job.status.video_url}\n\n"
+            "Upload it again anyway?",
+            QtWidgets.QMessageBox.StandardButton.Yes | QtWidgets.QMessageBox.StandardButton.No,
+            QtWidgets.QMessageBox.StandardButton.No,
+        )
+        if answer != QtWidgets.QMessageBox.StandardButton.Yes:
+            return
+        retry = UploadJob(
+            file_path=job.file_path,
+            playlist_ids=job.playlist_ids,
+            privacy=job.privacy,
+            title=job.title,
+            description=job.description,
+            tags=job.tags,
+            force=True,
+        )
+        self.add_job_row(retry)
+        self.current_job = retry
+        self.uploadQueue.submit(retry)
+
+    def handle_progress_update(self, status):
+        step = status.step
+        if self.statusLabel.text() != step:  # A style sheet change restyles the widget
+            self.statusLabel.setText(step)
+            self.statusLabel.setStyleSheet(
+                "color: {}; background-color: transparent;".format(STEP_COLORS.get(step, "#ffffff"))
+            )
+        if step in ("Queued", "Deferred", "Uploading"):
+            self.progressBar.setValue(status.progress)
+            self.progressNumber.setText(f"{status.progress}%")
+        else:
+            self.progressBar.setValue(100)
+            self.progressNumber.setText("100%")
+        if step == "Uploading":
+            self.rateLabel.setText(transfer_text(status))
+            self.rateLabel.setToolTip(transfer_tooltip(status))
+        elif self.rateLabel.text():
+            self.rateLabel.setText("")
+            self.rateLabel.setToolTip("")
+        if status.video_url and self.urlDisplay.text() != status.video_url:
+            self.urlDisplay.setText(status.video_url)
+
+    def show_history(self):
+        from lib.history_view import HistoryDialog  # Only loaded when asked for
+
+        if self.historyDialog is None:
+            self.historyDialog = HistoryDialog(self.uploadQueue.history.history, self)
+        else:
+            self.historyDialog.apply_filter()  # Pick up uploads since it was last shown
+        self.historyDialog.show()
+        self.historyDialog.raise_()
+        self.historyDialog.activateWindow()
+
+    def set_upload_limit(self, mbit):
+        self.uploadQueue.throttle.configure(limit_mbit=mbit)
+
+    def update_rate(self):
+        """
+        Shows the measured upload rate in the title while uploads run, and
+        follows limit changes made elsewhere (CLI or schedule). Today's API
+        quota use goes in the Upload button's tooltip.
+        """
+        throttle = self.uploadQueue.throttle
+        limit = throttle.current_limit()
+        saved = throttle.settings.get("limit_mbit") or 0
+        if not self.limitSpin.hasFocus() and abs(self.limitSpin.value() - saved) > 0.05:
+            self.limitSpin.blockSignals(True)
+            self.limitSpin.setValue(saved)
+            self.limitSpin.blockSignals(False)
+        limit_text = f"{limit * 8 / 1e6:g} Mbit/s" if limit else "none"
+        self.limitSpin.setToolTip(
+            f"Upload bandwidth limit (Mbit/s), shared by all uploads\nIn force now: {limit_text}"
+        )
+        quota = self.uploadQueue.quota
+        fitting, waiting = self.uploadQueue.quota_forecast()
+        quota_text = f"API quota today: {quota.used()} of {quota.daily_limit} units used"
+        if waiting:
+            quota_text += f"\n{fitting} of {waiting} waiting uploads fit before the reset"
+        self.uploadButton.setToolTip(quota_text)
+        if self.uploadQueue.active_count():
+            rate = throttle.measured_rate() * 8 / 1e6
+            self.setWindowTitle(f"YouTube Uploader - {rate:.1f} Mbit/s")
+        else:
+            self.setWindowTitle("YouTube Uploader")
+
+    def closeEvent(self, event):
+        self.uploadQueue.shutdown()
+        super().closeEvent(event)
+
+
+def run(file_paths=None, launch_time=None, startup_bench=False, instance_server=None):
+    app = QtWidgets.QApplication(sys.argv)
+    app.setApplicationName("YouTube Uploader")
+    window = MainWindow(launch_time, startup_bench)
+    if file_paths:
+        window.set_file_paths(file_paths)
+    if instance_server:
+        instance_server.attach(window.instanceBridge.files_received.emit)
+    window.show()
+    try:
+        return app.exec()
+    finally:
+        if instance_server:
+            instance_server.close()
@@ -0,0 +1,204 @@
+"""
+Upload history: one row per queued job (file, size, hash, video, state and
+when each stage started), kept in SQLite next to the dedup index. Rows are
+written on stage changes only, and read back newest first in pages for the
+GUI's history view.
+"""
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+from lib.uploader import get_appdata_dir
+
+HISTORY_DB = os.path.join(get_appdata_dir(), "uploads.db")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS history (
+    id INTEGER PRIMARY KEY,
+    created REAL NOT NULL,
+    file_path TEXT NOT NULL,
+    file_name TEXT NOT NULL COLLATE NOCASE,
+    size INTEGER,
+    sha256 TEXT,
+    video_id TEXT,
+    url TEXT,
+    state TEXT NOT NULL,
+    error TEXT,
+    stages TEXT NOT NULL DEFAULT '{}'
+);
+CREATE INDEX IF NOT EXISTS history_created ON history (created DESC, id DESC);
+-- Name search is a substring LIKE, which no index can serve; drop the one
+-- earlier versions created, as it only slowed inserts.
+DROP INDEX IF EXISTS history_name;
+"""
+
+COLUMNS = ("id", "created", "file_path", "file_name", "size", "sha256", "video_id", "url", "state", "error", "stages")
+
+
+class HistoryEntry:
+    """
+    One history row. `stages` maps each step name to the time it began.
+    """
+
+    __slots__ = COLUMNS
+
+    def __init__(self, row):
+        for name, value in zip(COLUMNS, row):
+            setattr(self, name, value)
+        self.stages = json.loads(self.stages or "{}")
+
+    def duration(self, step):
+        """
+        Seconds spent in `step` (until the next stage began), or None.
+        """
+        start = self.stages.get(step)
+        if start is None:
+            return None
+        later = [t for t in self.stages.values() if t > start]
+        return min(later) - start if later else None
+
+    def total_time(self):
+        if not self.stages:
+            return None
+        return max(self.stages.values()) - min(self.stages.values())
+
+
+class History:
+    """
+    Thread-safe access to the history table.
+    """
+
+    def __init__(self, path=HISTORY_DB):
+        self.path = path
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")  # Readers don't wait for the writers
+        self._db.executescript(_SCHEMA)
+
+    def add(self, file_path, size=None, state="Queued"):
+        """
+        Inserts a row for a newly queued job and returns its id.
+        """
+        now = time.time()
+        with self._lock, self._db:
+            cursor = self._db.execute(
+                "INSERT INTO history (created, file_path, file_name, size, state, stages)"
+                " VALUES (?, ?, ?, ?, ?, ?)",
+                (now, file_path, os.path.basename(file_path), size, state, json.dumps({state: now})),
+            )
+            return cursor.lastrowid
+
+    def update(self, entry_id, state, video_id=None, url=None, sha256=None, error=None):
+        """
+        Records a stage change: the new state, when it began, and whatever
+        results are known by now.
+        """
+        now = time.time()
+        with self._lock, self._db:
+            row = self._db.execute("SELECT stages FROM history WHERE id = ?", (entry_id,)).fetchone()
+            if row is None:
+                return
+            stages = json.loads(row[0] or "{}")
+            stages.setdefault(state, now)
+            self._db.execute(
+                "UPDATE history SET state = ?, stages = ?,"
+                " video_id = COALESCE(?, video_id), url = COALESCE(?, url),"
+                " sha256 = COALESCE(?, sha256), error = ? WHERE id = ?",
+                (state, json.dumps(stages), video_id, url or None, sha256, error, entry_id),
+            )
+
+    def _where(self, name=None, since=None, until=None):
+        clauses, params = [], []
+        if name:
+            clauses.append("file_name LIKE ? ESCAPE '\\'")
+            escaped = name.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+            params.append(f"%{escaped}%")
+        if since is not None:
+            clauses.append("created >= ?")
+            params.append(since)
+        if until is not None:
+            clauses.append("created < ?")
+            params.append(until)
+        return clauses, params
+
+    def page(self, limit, after=None, name=None, since=None, until=None):
+        """
+        Returns up to `limit` entries, newest first, matching a file name
+        substring and a created time range. `after` is the (created, id) of
+        the last entry of the previous page; paging by key instead of OFFSET
+        keeps every page as cheap as the first.
+        """
+        clauses, params = self._where(name, since, until)
+        if after is not None:
+            clauses.append("(created < ? OR (created = ? AND id < ?))")
+            params.extend([after[0], after[0], after[1]])
+        where = f" WHERE {' AND '.join(clauses)}" if clauses else ""
+        query = f"SELECT {', '.join(COLUMNS)} FROM history{where} ORDER BY created DESC, id DESC LIMIT ?"
+        with self._lock:
+            rows = self._db.execute(query, params + [limit]).fetchall()
+        return [HistoryEntry(row) for row in rows]
+
+    def count(self, name=None, since=None, until=None):
+        clauses, params = self._where(name, since, until)
+        where = f" WHERE {' AND '.join(clauses)}" if clauses else ""
+        with self._lock:
+            return self._db.execute(f"SELECT COUNT(*) FROM history{where}", params).fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+
+class HistoryRecorder:
+    """
+    Writes queue jobs into History. Call track() when a job is queued and
+    report() from the queue callback; only stage changes touch the database.
+    """
+
+    def __init__(self, history):
+        self.history = history
+        self._steps = {}  # job id -> last recorded step
+        self._lock = threading.Lock()
+
+    def track(self, job):
+        size = None
+        if job.stream is None:
+            try:
+                size = os.path.getsize(job.file_path)
+            except OSError:
+                pass
+        elif job.stream_size:
+            size = job.stream_size
+        try:
+            job.history_id = self.history.add(job.file_path, size, job.status.step or "Queued")
+        except sqlite3.Error as e:
+            logging.warning("Could not record %s in history: %s", job.file_path, e)
+            job.history_id = None
+            return
+        with self._lock:
+            self._steps[job.id] = job.status.step
+
+    def report(self, job, status):
+        entry_id = job.history_id
+        if entry_id is None:
+            return
+        with self._lock:
+            if self._steps.get(job.id) == status.step:
+                return
+            self._steps[job.id] = status.step
+            if status.step in ("Finished", "Duplicate", "Error"):
+                del self._steps[job.id]
+        try:
+            self.history.update(
+                entry_id,
+                status.step,
+                video_id=job.video_id,
+                url=status.video_url,
+                sha256=status.sha256,
+                error=status.error,
+            )
+        except sqlite3.Error as e:
+            logging.warning("Could not update history for %s: %s", job.file_path, e)
@@ -0,0 +1,208 @@
+"""
+History window: every upload recorded in lib.history, newest first, with a
+file name search and a date range. The table model fetches rows a page at a
+time as the view scrolls, so it opens at once however long the history is.
+"""
+import time
+import webbrowser
+
+from PyQt6 import QtWidgets, QtCore, QtGui
+from PyQt6.QtCore import Qt
+
+from lib.gui import STEP_COLORS
+
+PAGE_SIZE = 200
+SEARCH_DELAY_MS = 200  # Wait for typing to pause before querying
+
+
+def _format_size(size):
+    if size is None:
+        return ""
+    if size >= 1e9:
+        return f"{size / 1e9:.2f} GB"
+    return f"{size / 1e6:.1f} MB"
+
+
+def _format_duration(seconds):
+    if seconds is None:
+        return ""
+    seconds = int(round(seconds))
+    if seconds >= 3600:
+        return f"{seconds // 3600}h {seconds % 3600 // 60:02d}m"
+    if seconds >= 60:
+        return f"{seconds // 60}m {seconds % 60:02d}s"
+    return f"{seconds}s"
+
+
+class HistoryModel(QtCore.QAbstractTableModel):
+    """
+    Read-only view of lib.history.History. Only loaded rows count towards
+    rowCount(); canFetchMore()/fetchMore() pull the next page when the view
+    scrolls near the end.
+    """
+
+    HEADERS = ["Date", "File", "Size", "State", "Upload", "Total", "Video"]
+
+    def __init__(self, history, parent=None):
+        super().__init__(parent)
+        self.history = history
+        self.entries = []
+        self.filters = {}
+        self._exhausted = False
+
+    def set_filter(self, name=None, since=None, until=None):
+        self.beginResetModel()
+        self.filters = {"name": name, "since": since, "until": until}
+        self.entries = []
+        self._exhausted = False
+        self.endResetModel()
+        self.fetchMore()
+
+    def total(self):
+        return self.history.count(**self.filters)
+
+    def rowCount(self, parent=QtCore.QModelIndex()):
+        return 0 if parent.isValid() else len(self.entries)
+
+    def columnCount(self, parent=QtCore.QModelIndex()):
+        return 0 if parent.isValid() else len(self.HEADERS)
+
+    def canFetchMore(self, parent=QtCore.QModelIndex()):
+        return not parent.isValid() and not self._exhausted
+
+    def fetchMore(self, parent=QtCore.QModelIndex()):
+        if parent.isValid() or self._exhausted:
+            return
+        after = (self.entries[-1].created, self.entries[-1].id) if self.entries else None
+        page = self.history.page(PAGE_SIZE, after=after, **self.filters)
+        if len(page) < PAGE_SIZE:
+            self._exhausted = True
+        if not page:
+            return
+        first = len(self.entries)
+        self.beginInsertRows(QtCore.QModelIndex(), first, first + len(page) - 1)
+        self.entries.extend(page)
+        self.endInsertRows()
+
+    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
+        if role == Qt.ItemDataRole.DisplayRole and orientation == Qt.Orientation.Horizontal:
+            return self.HEADERS[section]
+        return None
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        entry = self.entries[index.row()]
+        column = index.column()
+        if role == Qt.ItemDataRole.DisplayRole:
+            if column == 0:
+                return time.strftime("%Y-%m-%d %H:%M", time.localtime(entry.created))
+            if column == 1:
+                return entry.file_name
+            if column == 2:
+                return _format_size(entry.size)
+            if column == 3:
+                return entry.state
+            if column == 4:
+                return _format_duration(entry.duration("Uploading"))
+            if column == 5:
+                return _format_duration(entry.total_time())
+            if column == 6:
+                return entry.video_id or ""
+        elif role == Qt.ItemDataRole.ToolTipRole:
+            if column == 1:
+                return entry.file_path
+            if column == 3:
+                lines = [entry.error or ""]
+                lines += [
+                    f"{step}: {time.strftime('%H:%M:%S', time.localtime(started))}"
+                    for step, started in sorted(entry.stages.items(), key=lambda item: item[1])
+                ]
+                if entry.sha256:
+                    lines.append(f"SHA-256: {entry.sha256}")
+                return "\n".join(filter(None, lines))
+            if column == 6:
+                return entry.url
+        elif role == Qt.ItemDataRole.ForegroundRole and column == 3:
+            return QtGui.QColor(STEP_COLORS.get(entry.state, "#ffffff"))
+        elif role == Qt.ItemDataRole.TextAlignmentRole and column in (2, 4, 5):
+            return int(Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter)
+        return None
+
+
+class HistoryDialog(QtWidgets.QDialog):
+    def __init__(self, history, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("Upload History")
+        self.resize(760, 480)
+
+        layout = QtWidgets.QVBoxLayout(self)
+        filter_layout = QtWidgets.QHBoxLayout()
+        self.searchEdit = QtWidgets.QLineEdit(self)
+        self.searchEdit.setPlaceholderText("Search file name")
+        self.searchEdit.setClearButtonEnabled(True)
+        filter_layout.addWidget(self.searchEdit, 1)
+
+        self.dateCheck = QtWidgets.QCheckBox("From", self)
+        filter_layout.addWidget(self.dateCheck)
+        today = QtCore.QDate.currentDate()
+        self.fromDate = QtWidgets.QDateEdit(today.addDays(-30), self)
+        self.toDate = QtWidgets.QDateEdit(today, self)
+        for edit in (self.fromDate, self.toDate):
+            edit.setCalendarPopup(True)
+            edit.setDisplayFormat("yyyy-MM-dd")
+            edit.setEnabled(False)
+        filter_layout.addWidget(self.fromDate)
+        filter_layout.addWidget(QtWidgets.QLabel("to", self))
+        filter_layout.addWidget(self.toDate)
+        layout.addLayout(filter_layout)
+
+        self.model = HistoryModel(history, self)
+        self.table = QtWidgets.QTableView(self)
+        self.table.setModel(self.model)
+        self.table.verticalHeader().setVisible(False)
+        self.table.setSelectionBehavior(QtWidgets.QAbstractItemView.SelectionBehavior.SelectRows)
+        self.table.setSelectionMode(QtWidgets.QAbstractItemView.SelectionMode.SingleSelection)
+        self.table.setWordWrap(False)
+        # Fixed row heights and column widths: no per-row measuring.
+        self.table.verticalHeader().setSectionResizeMode(QtWidgets.QHeaderView.ResizeMode.Fixed)
+        header = self.table.horizontalHeader()
+        header.setSectionResizeMode(QtWidgets.QHeaderView.ResizeMode.Interactive)
+        header.setSectionResizeMode(1, QtWidgets.QHeaderView.ResizeMode.Stretch)
+        for column, width in ((0, 120), (2, 80), (3, 90), (4, 70), (5, 70), (6, 110)):
+            self.table.setColumnWidth(column, width)
+        self.table.doubleClicked.connect(self.open_video)
+        layout.addWidget(self.table, 1)
+
+        self.countLabel = QtWidgets.QLabel(self)
+        layout.addWidget(self.countLabel)
+
+        self.searchTimer = QtCore.QTimer(self)
+        self.searchTimer.setSingleShot(True)
+        self.searchTimer.setInterval(SEARCH_DELAY_MS)
+        self.searchTimer.timeout.connect(self.apply_filter)
+        self.searchEdit.textChanged.connect(self.searchTimer.start)
+        self.dateCheck.toggled.connect(self.on_date_toggled)
+        self.fromDate.dateChanged.connect(self.searchTimer.start)
+        self.toDate.dateChanged.connect(self.searchTimer.start)
+
+        self.apply_filter()
+
+    def on_date_toggled(self, checked):
+        self.fromDate.setEnabled(checked)
+        self.toDate.setEnabled(checked)
+        self.apply_filter()
+
+    def apply_filter(self):
+        since = until = None
+        if self.dateCheck.isChecked():
+            since = self.fromDate.date().startOfDay().toSecsSinceEpoch()
+            until = self.toDate.date().addDays(1).startOfDay().toSecsSinceEpoch()
+        self.model.set_filter(self.searchEdit.text().strip() or None, since, until)
+        total = self.model.total()
+        self.countLabel.setText(f"{total} upload{'s' if total != 1 else ''}")
+
+    def open_video(self, index):
+        entry = self.model.entries[index.row()]
+        if entry.url:
+            webbrowser.open(entry.url)
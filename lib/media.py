@@ -0,0 +1,420 @@
+import hashlib
+import logging
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from googleapiclient.http import MediaUpload
+
+from lib.chunking import align_chunk_size
+
+FOLLOW_IDLE_SECONDS = 30  # A growing file that stops growing this long is done
+FOLLOW_POLL_INTERVAL = 0.5
+HEADER_CHECK_BYTES = 64 * 1024
+HASH_CATCH_UP_BLOCK = 1024 * 1024
+
+
+class ContentHash:
+    """
+    Running SHA-256 of the upload from byte 0, fed with the chunks as they
+    are read. Bytes already hashed are skipped, so a resent chunk counts once.
+    A gap (bytes never seen) makes the hash unavailable.
+    """
+
+    def __init__(self):
+        self._digest = hashlib.sha256()
+        self._lock = threading.Lock()
+        self.offset = 0  # Bytes hashed so far
+        self.valid = True
+
+    def update(self, begin, data):
+        end = begin + len(data)
+        with self._lock:
+            if not self.valid or end <= self.offset:
+                return
+            if begin > self.offset:
+                self.valid = False
+                return
+            self._digest.update(memoryview(data)[self.offset - begin :])
+            self.offset = end
+
+    def hexdigest(self, size):
+        """
+        Returns the hex digest if exactly `size` bytes from 0 were hashed, else None.
+        """
+        with self._lock:
+            if self.valid and size is not None and self.offset == size:
+                return self._digest.hexdigest()
+            return None
+
+
+def _hash_file_range(fd, content_hash, start, end):
+    buf = bytearray(HASH_CATCH_UP_BLOCK)
+    fd.seek(start)
+    while start < end:
+        n = fd.readinto(memoryview(buf)[: min(len(buf), end - start)])
+        if not n:
+            break
+        content_hash.update(start, memoryview(buf)[:n])
+        start += n
+
+
+class _ChunkedUpload(MediaUpload):
+    """
+    Resumable media served through getbytes() whose chunk size can be changed
+    between chunks. next_chunk() asks for chunksize() on every call, so a new
+    size applies from the next chunk on.
+    """
+
+    wait_seconds = 0  # Time the last getbytes() spent waiting for data, not sending
+
+    def __init__(self, mimetype, chunksize, throttle=None):
+        super().__init__()
+        self._mimetype = mimetype
+        self._chunksize = align_chunk_size(chunksize)
+        self.throttle = throttle  # lib.throttle.Throttle shared by every upload
+        self.content_hash = ContentHash()
+
+    def getbytes(self, begin, length):
+        """
+        Returns the chunk at `begin` once the shared bandwidth limit allows it
+        to go out, adding it to content_hash. Subclasses supply the bytes
+        through _read().
+        """
+        if self.content_hash.valid and begin > self.content_hash.offset:
+            # Resumed from a saved session: hash what was sent before.
+            self._hash_range(self.content_hash.offset, begin)
+        data = self._read(begin, length)
+        self.content_hash.update(begin, data)
+        if self.throttle:
+            self.wait_seconds += self.throttle.consume(len(data))
+        return data
+
+    def sha256(self):
+        """
+        Hex SHA-256 of everything uploaded, or None if it isn't complete.
+        """
+        return self.content_hash.hexdigest(self.size())
+
+    def _read(self, begin, length):
+        raise NotImplementedError
+
+    def _hash_range(self, start, end):
+        """
+        Feeds bytes [start, end) into content_hash; sources that can't re-read
+        them leave the hash unavailable.
+        """
+        self.content_hash.valid = False
+
+    def chunksize(self):
+        return self._chunksize
+
+    def set_chunksize(self, chunksize):
+        self._chunksize = align_chunk_size(chunksize)
+
+    def mimetype(self):
+        return self._mimetype
+
+    def resumable(self):
+        return True
+
+    def has_stream(self):
+        return False
+
+    def close(self):
+        pass
+
+
+class PrefetchFileUpload(_ChunkedUpload):
+    """
+    Media for a complete file. Chunks are read into two reusable buffers and
+    handed out as memoryviews, so nothing is copied on the way to the socket.
+    While one chunk is being sent, a background thread reads the next one into
+    the other buffer, overlapping disk (or NAS) reads with the upload. Memory
+    stays at two chunks whatever the file size.
+
+    A chunk is only read again if the upload has to resend from an offset the
+    read-ahead did not predict (after an error, or when the chunk size
+    changes), in which case it is read synchronously.
+    """
+
+    def __init__(self, file_path, mimetype, chunksize):
+        super().__init__(mimetype, chunksize)
+        self._fd = open(file_path, "rb", buffering=0)
+        self._size = os.fstat(self._fd.fileno()).st_size
+        self._buffers = [bytearray(), bytearray()]
+        self._current = 0  # Buffer handed out last; the other one is free
+        self._pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="read-ahead")
+        self._prefetch = None  # (begin, length, future)
+
+    def size(self):
+        return self._size
+
+    def _read_into(self, index, begin, length):
+        buf = self._buffers[index]
+        if len(buf) < length:
+            buf = self._buffers[index] = bytearray(length)
+        view = memoryview(buf)[:length]
+        self._fd.seek(begin)
+        filled = 0
+        while filled < length:
+            n = self._fd.readinto(view[filled:])
+            if not n:
+                break
+            filled += n
+        # On the read-ahead thread this overlaps hashing with the send in flight.
+        self.content_hash.update(begin, view[:filled])
+        return view[:filled]
+
+    def _hash_range(self, start, end):
+        if self._prefetch:
+            self._prefetch[2].result()
+            self._prefetch = None
+        _hash_file_range(self._fd, self.content_hash, start, end)
+
+    def _read(self, begin, length):
+        length = max(0, min(length, self._size - begin))
+        start = time.monotonic()
+        data = None
+        if self._prefetch:
+            p_begin, p_length, future = self._prefetch
+            self._prefetch = None
+            result = future.result()  # Also keeps the file from being read twice at once
+            if (p_begin, p_length) == (begin, length):
+                data = result
+        spare = 1 - self._current
+        if data is None:
+            data = self._read_into(spare, begin, length)
+        self._current = spare
+        self.wait_seconds = time.monotonic() - start
+
+        # The previous chunk's request has completed by now, so its buffer is
+        # free for the next one.
+        next_begin = begin + length
+        next_length = min(self._chunksize, self._size - next_begin)
+        if next_length > 0:
+            future = self._pool.submit(self._read_into, 1 - spare, next_begin, next_length)
+            self._prefetch = (next_begin, next_length, future)
+        return data
+
+    def close(self):
+        self._pool.shutdown(wait=True)
+        self._prefetch = None
+        self._fd.close()
+
+    def __del__(self):
+        if getattr(self, "_pool", None):
+            self._pool.shutdown(wait=False)
+        if getattr(self, "_fd", None):
+            self._fd.close()
+
+
+def _win32_open_for_writing(path):
+    """
+    Windows: whether some handle has `path` open with write access. Asks for
+    a read handle that only shares reading, which the system refuses with a
+    sharing violation while any writer has it open, whatever share mode the
+    writer chose (CRT fopen-based writers such as ffmpeg share by default).
+    Returns None if that can't be told (e.g. the file is gone).
+    """
+    import ctypes
+    from ctypes import wintypes
+
+    GENERIC_READ = 0x80000000
+    FILE_SHARE_READ = 0x1
+    OPEN_EXISTING = 3
+    ERROR_SHARING_VIOLATION = 32
+
+    kernel32 = ctypes.WinDLL("kernel32", use_last_error=True)
+    create_file = kernel32.CreateFileW
+    create_file.restype = wintypes.HANDLE
+    create_file.argtypes = [
+        wintypes.LPCWSTR, wintypes.DWORD, wintypes.DWORD, wintypes.LPVOID,
+        wintypes.DWORD, wintypes.DWORD, wintypes.HANDLE,
+    ]
+    handle = create_file(path, GENERIC_READ, FILE_SHARE_READ, None, OPEN_EXISTING, 0, None)
+    if handle is None or handle == ctypes.c_void_p(-1).value:
+        return True if ctypes.get_last_error() == ERROR_SHARING_VIOLATION else None
+    kernel32.CloseHandle(wintypes.HANDLE(handle))
+    return False
+
+
+class GrowingFileUpload(_ChunkedUpload):
+    """
+    Resumable media for a file that is still being written, e.g. a recording
+    in progress. size() stays None (the session is started with an unknown
+    length) and getbytes() blocks until a whole chunk exists on disk. Once the
+    writer is done, size() returns the final length and the short last read
+    finalizes the upload.
+
+    The writer counts as done when finish() is called, when it closes the file
+    (detected on Linux and Windows), or when the file has not grown for
+    `idle_seconds`. Bytes already sent are never re-read, so the container
+    must not rewrite its start on close (MKV, fragmented MP4 or MPEG-TS are
+    fine; a plain MP4 with the index at the front is not).
+    """
+
+    def __init__(self, file_path, mimetype, chunksize, idle_seconds=FOLLOW_IDLE_SECONDS):
+        super().__init__(mimetype, chunksize)
+        self._file_path = file_path
+        self._idle_seconds = idle_seconds
+        self._fd = open(file_path, "rb")
+        self._size = None
+        self._finish_requested = False
+        self._header = self._fd.read(HEADER_CHECK_BYTES)
+        self._last_size = os.fstat(self._fd.fileno()).st_size
+        self._last_growth = time.monotonic()
+        self._inotify = None
+        self._closed_seen = False
+        if sys.platform.startswith("linux"):
+            try:
+                from lib.watcher import IN_CLOSE_WRITE, _Inotify
+
+                self._inotify = _Inotify()
+                self._inotify.add_watch(file_path, IN_CLOSE_WRITE)
+            except (OSError, AttributeError) as e:
+                logging.debug("No close notification for %s: %s", file_path, e)
+                self._inotify = None
+
+    def size(self):
+        return self._size
+
+    def _hash_range(self, start, end):
+        _hash_file_range(self._fd, self.content_hash, start, end)
+
+    def current_size(self):
+        """
+        Bytes on disk so far (the final size once finished).
+        """
+        if self._size is not None:
+            return self._size
+        return os.fstat(self._fd.fileno()).st_size
+
+    def finish(self):
+        """
+        Marks the file as complete; the upload finalizes at its current length.
+        """
+        self._finish_requested = True
+
+    def _writer_closed(self):
+        if self._inotify:
+            if self._inotify.read_events() or self._closed_seen:
+                self._closed_seen = True
+                return True
+            return False
+        if sys.platform == "win32":
+            # Our own handle only reads, so it doesn't count as a writer.
+            return _win32_open_for_writing(self._file_path) is False
+        return False
+
+    def _check_finished(self, size):
+        now = time.monotonic()
+        if size != self._last_size:
+            self._last_size = size
+            self._last_growth = now
+            return self._finish_requested
+        if self._finish_requested or self._writer_closed():
+            return True
+        return now - self._last_growth >= self._idle_seconds
+
+    def _finalize(self, size):
+        self._size = size
+        if self._inotify:
+            self._inotify.close()
+            self._inotify = None
+        self._fd.seek(0)
+        if self._fd.read(len(self._header)) != self._header:
+            logging.warning(
+                "%s was rewritten at its start after upload began; the uploaded copy may not play",
+                self._file_path,
+            )
+        logging.info("%s finished growing at %d bytes", self._file_path, size)
+
+    def _read(self, begin, length):
+        """
+        Returns `length` bytes from `begin`, waiting for the writer if needed.
+        Returns fewer only once the file is finished (the final chunk).
+
+        A chunk ending exactly at the current end of file is held back until
+        more data arrives, so a full read is never the last one while the
+        length is still unknown.
+        """
+        start = time.monotonic()
+        while self._size is None:
+            size = os.fstat(self._fd.fileno()).st_size
+            if size > begin + length:
+                break
+            if self._check_finished(size):
+                self._finalize(size)
+                break
+            time.sleep(FOLLOW_POLL_INTERVAL)
+        self.wait_seconds = time.monotonic() - start
+        self._fd.seek(begin)
+        return self._fd.read(length)
+
+    def close(self):
+        if self._inotify:
+            self._inotify.close()
+            self._inotify = None
+        self._fd.close()
+
+    def __del__(self):
+        if getattr(self, "_inotify", None):
+            self._inotify.close()
+        if getattr(self, "_fd", None):
+            self._fd.close()
+
+
+class StreamUpload(_ChunkedUpload):
+    """
+    Resumable media read from any binary stream (pipe, socket, file object)
+    in constant memory. Only the chunk in flight is buffered, which is all a
+    retry can ask for again: the server never confirms less than the previous
+    chunk. Pass `size` if the length is known; otherwise it is sent as unknown
+    and the end of the stream finalizes the upload.
+    """
+
+    def __init__(self, stream, mimetype, chunksize, size=None):
+        super().__init__(mimetype, chunksize)
+        self._stream = stream
+        self._size = size
+        self._buf = bytearray()
+        self._buf_start = 0  # Stream offset of self._buf[0]
+        self._eof = False
+
+    def size(self):
+        return self._size
+
+    def bytes_read(self):
+        return self._buf_start + len(self._buf)
+
+    def _fill(self, want):
+        # Pipes return short reads, so keep reading until `want` bytes are
+        # buffered or the stream ends.
+        while len(self._buf) < want and not self._eof:
+            data = self._stream.read(want - len(self._buf))
+            if not data:
+                self._eof = True
+                break
+            self._buf += data
+
+    def _read(self, begin, length):
+        """
+        Returns `length` bytes from offset `begin` (fewer at the end of the
+        stream). Offsets before the chunk in flight can't be re-read.
+        """
+        if begin < self._buf_start:
+            raise IOError(
+                f"Stream can't rewind to byte {begin}; only bytes from {self._buf_start} are kept"
+            )
+        del self._buf[: begin - self._buf_start]
+        self._buf_start = begin
+        start = time.monotonic()
+        # One byte past the chunk tells whether the stream ends right there.
+        self._fill(length + 1)
+        self.wait_seconds = time.monotonic() - start
+        if self._eof and self._size is None and len(self._buf) <= length:
+            self._size = begin + len(self._buf)
+        return bytes(self._buf[:length])
@@ -0,0 +1,164 @@
+import logging
+import random
+import threading
+import time
+
+MAX_IDS_PER_CALL = 50  # videos.list accepts at most 50 IDs
+MIN_DELAY = 2
+MAX_DELAY = 60
+BACKOFF = 1.5
+JITTER = 0.2
+COALESCE_WINDOW = MIN_DELAY  # Videos due this soon ride along with the current call
+MAX_POLL_ERRORS = 5
+
+
+class _Watch:
+    def __init__(self, video_id, callback, on_error, reservation):
+        self.video_id = video_id
+        self.callback = callback
+        self.on_error = on_error
+        self.reservation = reservation
+        self.delay = MIN_DELAY
+        self.next_poll = time.monotonic()
+        self.errors = 0
+
+
+def next_delay(item, previous):
+    """
+    Picks the wait before the next poll of one video from its processingDetails.
+    Uses the server's own estimate when there is one, and otherwise backs off
+    from the previous delay. Once the video is processed (only the embed check
+    is left) it goes back to polling quickly.
+    """
+    if item:
+        if item.get("status", {}).get("uploadStatus") == "processed":
+            return MIN_DELAY
+        progress = item.get("processingDetails", {}).get("processingProgress", {})
+        try:
+            time_left = int(progress.get("timeLeftMs")) / 1000
+        except (TypeError, ValueError):
+            time_left = None
+        if time_left is not None:
+            return max(MIN_DELAY, min(time_left / 2, MAX_DELAY))
+    return min(previous * BACKOFF, MAX_DELAY)
+
+
+class ProcessingPoller:
+    """
+    Tracks server-side processing of many videos with as few videos.list calls
+    as possible.
+
+    Every video that is due is polled in one call of up to 50 IDs, and each
+    video is rescheduled on its own backoff (with jitter so videos uploaded
+    together drift apart). Videos that are due shortly are pulled forward into
+    the current call, so the call rate stays roughly flat however many videos
+    are in flight.
+
+    `callback(item)` receives the video's videos.list item (None if the API did
+    not return it) on the poller thread and returns True once the video no
+    longer needs polling.
+    """
+
+    def __init__(self, service_factory, ledger=None):
+        self._service_factory = service_factory
+        self._ledger = ledger  # lib.quota.QuotaLedger charged for the calls; get_ledger() if None
+        self._cond = threading.Condition()
+        self._watches = {}
+        self._stopping = False
+        self._thread = threading.Thread(target=self._run, name="processing-poller", daemon=True)
+        self._thread.start()
+
+    def watch(self, video_id, callback, on_error=None, reservation=None):
+        """
+        Starts polling `video_id`. The calls are taken out of `reservation`
+        (lib.quota.Reservation) if given, which already budgets for them.
+        """
+        with self._cond:
+            self._watches[video_id] = _Watch(video_id, callback, on_error, reservation)
+            self._cond.notify_all()
+
+    def unwatch(self, video_id):
+        with self._cond:
+            self._watches.pop(video_id, None)
+
+    def watch_count(self):
+        with self._cond:
+            return len(self._watches)
+
+    def stop(self):
+        with self._cond:
+            self._stopping = True
+            self._cond.notify_all()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._stopping:
+                    if self._watches:
+                        wait = min(w.next_poll for w in self._watches.values()) - time.monotonic()
+                        if wait <= 0:
+                            break
+                        self._cond.wait(wait)
+                    else:
+                        self._cond.wait()
+                if self._stopping:
+                    return
+                horizon = time.monotonic() + COALESCE_WINDOW
+                due = [w for w in self._watches.values() if w.next_poll <= horizon]
+            for i in range(0, len(due), MAX_IDS_PER_CALL):
+                self._poll(due[i:i + MAX_IDS_PER_CALL])
+
+    def _poll(self, batch):
+        from lib.quota import get_ledger, is_quota_exceeded, next_reset
+
+        ledger = self._ledger or get_ledger()
+        # One call serves the whole batch; any of their reservations can pay for it.
+        reservation = max(
+            (w.reservation for w in batch if w.reservation is not None), key=lambda r: r.units, default=None
+        )
+        try:
+            with ledger.charging(reservation):
+                resp = self._service_factory().videos().list(
+                    part="status,processingDetails,player",
+                    id=",".join(w.video_id for w in batch),
+                ).execute()
+        except Exception as e:
+            if is_quota_exceeded(e):
+                # Not the video's fault; check again once the quota resets.
+                logging.warning("Processing checks paused until the quota resets")
+                ledger.exhaust()
+                resume = time.monotonic() + max(0, next_reset() - time.time())
+                for w in batch:
+                    w.next_poll = resume + random.uniform(0, MIN_DELAY)
+                return
+            logging.error("HTTP error during processing check: %s", e)
+            for w in batch:
+                w.errors += 1
+                if w.errors >= MAX_POLL_ERRORS:
+                    self.unwatch(w.video_id)
+                    if w.on_error:
+                        w.on_error(e)
+                else:
+                    self._reschedule(w, None)
+            return
+
+        items = {item.get("id"): item for item in resp.get("items", [])}
+        for w in batch:
+            w.errors = 0
+            item = items.get(w.video_id)
+            try:
+                done = w.callback(item)
+            except Exception as e:
+                logging.error("Processing callback error for %s: %s", w.video_id, e)
+                self.unwatch(w.video_id)
+                if w.on_error:
+                    w.on_error(e)  # The owner still has to see the video leave processing
+                continue
+            if done:
+                self.unwatch(w.video_id)
+            else:
+                self._reschedule(w, item)
+
+    def _reschedule(self, w, item):
+        w.delay = next_delay(item, w.delay)
+        w.next_poll = time.monotonic() + w.delay * random.uniform(1 - JITTER, 1 + JITTER)
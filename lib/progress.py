@@ -0,0 +1,100 @@
+"""
+Rate limiting for status callbacks. An upload reports after every chunk and
+every processing poll; with many jobs in flight that is more updates than a
+GUI needs. ProgressCoalescer passes on at most a few per second per job,
+always the latest, and never holds back a change of step.
+"""
+import threading
+import time
+
+PROGRESS_RATE = 5  # Default updates per second per job
+
+
+class ProgressCoalescer:
+    """
+    Delivers `deliver(job, snapshot)` at most `max_rate` times per second per
+    job. An update arriving sooner replaces any update still waiting for
+    that job; the latest one goes out once the job's interval is up. An
+    update whose step differs from the last delivered one goes out at once.
+    max_rate=None (or 0) delivers every update.
+
+    Deliveries are serialized and, per job, in order. They happen on the
+    reporting thread or on the coalescer's own thread, so `deliver` should be
+    quick (e.g. emit a Qt signal).
+    """
+
+    def __init__(self, deliver, max_rate=PROGRESS_RATE):
+        self.deliver = deliver
+        self.interval = 1.0 / max_rate if max_rate else 0
+        self._cond = threading.Condition(threading.RLock())
+        self._last = {}  # job -> (monotonic time, step) of its last delivery
+        self._pending = {}  # job -> newest snapshot not delivered yet
+        self._thread = None
+        self._stopping = False
+
+    def submit(self, job, snapshot):
+        now = time.monotonic()
+        with self._cond:
+            last = self._last.get(job)
+            if (
+                last is None
+                or not self.interval
+                or snapshot.step != last[1]
+                or now - last[0] >= self.interval
+            ):
+                self._pending.pop(job, None)  # Superseded
+                self._send(job, snapshot, now)
+                return
+            self._pending[job] = snapshot
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="progress-coalescer", daemon=True)
+                self._thread.start()
+            self._cond.notify()
+
+    def forget(self, job):
+        """
+        Drops the job's state once it will report no more.
+        """
+        with self._cond:
+            if job in self._pending:
+                self._send(job, self._pending.pop(job), time.monotonic())
+            self._last.pop(job, None)
+
+    def flush(self):
+        """
+        Delivers every pending update now.
+        """
+        with self._cond:
+            now = time.monotonic()
+            for job, snapshot in list(self._pending.items()):
+                del self._pending[job]
+                self._send(job, snapshot, now)
+
+    def close(self):
+        self.flush()
+        with self._cond:
+            self._stopping = True
+            self._cond.notify()
+
+    def _send(self, job, snapshot, now):
+        # Called with self._cond held, which keeps deliveries in order.
+        self._last[job] = (now, snapshot.step)
+        self.deliver(job, snapshot)
+
+    def _run(self):
+        with self._cond:
+            while not self._stopping:
+                if not self._pending:
+                    self._cond.wait()
+                    continue
+                now = time.monotonic()
+                next_due = None
+                for job, snapshot in list(self._pending.items()):
+                    due = self._last[job][0] + self.interval
+                    if due <= now:
+                        del self._pending[job]
+                        self._send(job, snapshot, now)
+                    elif next_due is None or due < next_due:
+                        next_due = due
+                if next_due is not None:
+                    self._cond.wait(next_due - now)
@@ -0,0 +1,357 @@
+"""
+YouTube Data API quota accounting. Every call the uploader makes is charged
+to a ledger in uploads.db, per day in Pacific time (when Google resets the
+quota), so the queue can tell whether the next upload still fits and hold it
+until the reset instead of letting it fail.
+"""
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+
+from lib.uploader import get_appdata_dir
+
+QUOTA_DB = os.path.join(get_appdata_dir(), "uploads.db")
+QUOTA_FILE = os.path.join(get_appdata_dir(), "quota.json")
+DEFAULT_DAILY_LIMIT = 10000  # Units per day for a project without a quota increase
+
+# Units per call, from the YouTube Data API quota calculator.
+API_COSTS = {
+    "youtube.videos.insert": 1600,
+    "youtube.videos.list": 1,
+    "youtube.videos.update": 50,
+    "youtube.videos.delete": 50,
+    "youtube.playlists.list": 1,
+    "youtube.playlistItems.insert": 50,
+    "youtube.playlistItems.list": 1,
+    "youtube.channels.list": 1,
+    "youtube.thumbnails.set": 50,
+}
+PROCESSING_POLL_UNITS = 10  # videos.list calls budgeted per video while it processes
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS quota_usage (
+    day TEXT NOT NULL,
+    method TEXT NOT NULL,
+    calls INTEGER NOT NULL,
+    units INTEGER NOT NULL,
+    PRIMARY KEY (day, method)
+);
+"""
+
+
+_active = threading.local()  # (ledger, reservation) inside QuotaLedger.charging()
+
+
+class QuotaExceeded(Exception):
+    """
+    The API refused a call because the daily quota is used up.
+    """
+
+
+_pacific = None
+
+
+def _pacific_zone():
+    global _pacific
+    if _pacific is None:
+        try:
+            from zoneinfo import ZoneInfo
+
+            _pacific = ZoneInfo("America/Los_Angeles")
+        except Exception:  # No tz database (Windows without the tzdata package)
+            _pacific = False
+    return _pacific or None
+
+
+def _us_pacific_offset(utc):
+    """
+    Hours from UTC in US Pacific time: daylight time from the second Sunday
+    of March to the first Sunday of November, switching at 02:00 local.
+    """
+    year = utc.year
+    march_8 = datetime(year, 3, 8, tzinfo=timezone.utc)
+    dst_start = march_8 + timedelta(days=(6 - march_8.weekday()) % 7, hours=10)
+    november_1 = datetime(year, 11, 1, tzinfo=timezone.utc)
+    dst_end = november_1 + timedelta(days=(6 - november_1.weekday()) % 7, hours=9)
+    return -7 if dst_start <= utc < dst_end else -8
+
+
+def pacific_time(timestamp=None):
+    timestamp = time.time() if timestamp is None else timestamp
+    zone = _pacific_zone()
+    if zone is not None:
+        return datetime.fromtimestamp(timestamp, zone)
+    utc = datetime.fromtimestamp(timestamp, timezone.utc)
+    return utc.astimezone(timezone(timedelta(hours=_us_pacific_offset(utc))))
+
+
+def quota_day(timestamp=None):
+    """
+    The quota day ("YYYY-MM-DD", Pacific time) that `timestamp` falls in.
+    """
+    return pacific_time(timestamp).strftime("%Y-%m-%d")
+
+
+def next_reset(timestamp=None):
+    """
+    Epoch time of the next quota reset (midnight Pacific time).
+    """
+    local = pacific_time(timestamp)
+    midnight = (local + timedelta(days=1)).replace(hour=0, minute=0, second=0, microsecond=0)
+    if _pacific_zone() is None:
+        # A fixed offset: daylight time may start or end before that midnight.
+        utc = (midnight.replace(tzinfo=None) - midnight.utcoffset()).replace(tzinfo=timezone.utc)
+        midnight = midnight.replace(tzinfo=timezone(timedelta(hours=_us_pacific_offset(utc))))
+    return midnight.timestamp()
+
+
+def call_cost(method_id):
+    if method_id in API_COSTS:
+        return API_COSTS[method_id]
+    return 1 if (method_id or "").endswith(".list") else 50
+
+
+def upload_cost(playlist_count=0, resuming=False):
+    """
+    Units one upload is expected to use: the insert (already paid for when
+    resuming a session), processing polls and one insert per playlist.
+    """
+    insert = 0 if resuming else API_COSTS["youtube.videos.insert"]
+    return insert + PROCESSING_POLL_UNITS + playlist_count * API_COSTS["youtube.playlistItems.insert"]
+
+
+def is_quota_exceeded(error):
+    from googleapiclient.errors import HttpError
+
+    if not isinstance(error, HttpError) or getattr(error.resp, "status", None) != 403:
+        return False
+    content = error.content or b""
+    return b"quotaExceeded" in content or b"dailyLimitExceeded" in content
+
+
+def load_settings(path=QUOTA_FILE):
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            settings = json.load(f)
+    except FileNotFoundError:
+        return {}
+    except (OSError, ValueError) as e:
+        logging.warning("Ignoring unreadable quota settings %s: %s", path, e)
+        return {}
+    return settings if isinstance(settings, dict) else {}
+
+
+def save_settings(settings, path=QUOTA_FILE):
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(settings, f, indent=2)
+    os.replace(tmp, path)
+
+
+class Reservation:
+    """
+    Units set aside for one job's remaining calls. Calls charged while the
+    reservation is active (see QuotaLedger.charging) are taken out of it.
+    """
+
+    def __init__(self, ledger, units):
+        self.ledger = ledger
+        self.units = units
+
+    def release(self):
+        self.ledger._release(self)
+
+
+class QuotaLedger:
+    """
+    Daily API usage per method, shared by every process using the same
+    uploads.db, plus this process's reservations for jobs in flight.
+    remaining() is what is left for new work today.
+    """
+
+    def __init__(self, path=QUOTA_DB, settings_path=QUOTA_FILE):
+        self.path = path
+        self.settings_path = settings_path
+        self._lock = threading.Lock()
+        self._reservations = set()
+        self._exhausted_until = 0  # Set when the API itself reports the quota gone
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.executescript(_SCHEMA)
+        settings = load_settings(settings_path) if settings_path else {}
+        self.daily_limit = int(settings.get("daily_limit") or DEFAULT_DAILY_LIMIT)
+
+    def configure(self, daily_limit):
+        """
+        Sets and saves the project's daily quota (after a quota increase).
+        """
+        self.daily_limit = int(daily_limit)
+        if self.settings_path:
+            save_settings({"daily_limit": self.daily_limit}, self.settings_path)
+
+    def charge(self, method_id, units=None):
+        """
+        Records one API call. Never raises: accounting must not break uploads.
+        """
+        units = call_cost(method_id) if units is None else units
+        try:
+            with self._lock, self._db:
+                self._db.execute(
+                    "INSERT INTO quota_usage VALUES (?, ?, 1, ?) ON CONFLICT (day, method)"
+                    " DO UPDATE SET calls = calls + 1, units = units + excluded.units",
+                    (quota_day(), method_id or "unknown", units),
+                )
+                active = getattr(_active, "value", None)
+                reservation = active[1] if active and active[0] is self else None
+                if reservation is not None:
+                    reservation.units = max(0, reservation.units - units)
+        except sqlite3.Error as e:
+            logging.warning("Could not record quota use of %s: %s", method_id, e)
+
+    def charging(self, reservation):
+        """
+        Context manager: API calls made by this thread inside it are charged
+        to this ledger and taken out of `reservation` (may be None).
+        """
+        return _Charging(self, reservation)
+
+    def _used(self, day):
+        row = self._db.execute("SELECT SUM(units) FROM quota_usage WHERE day = ?", (day,)).fetchone()
+        return row[0] or 0
+
+    def used(self, day=None):
+        with self._lock:
+            return self._used(day or quota_day())
+
+    def usage(self, day=None):
+        """
+        Returns {method: (calls, units)} for `day` (today by default).
+        """
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT method, calls, units FROM quota_usage WHERE day = ?", (day or quota_day(),)
+            ).fetchall()
+        return {method: (calls, units) for method, calls, units in rows}
+
+    def _remaining(self):
+        if time.time() < self._exhausted_until:
+            return 0
+        reserved = sum(r.units for r in self._reservations)
+        return max(0, self.daily_limit - self._used(quota_day()) - reserved)
+
+    def remaining(self):
+        with self._lock:
+            return self._remaining()
+
+    def reserve(self, units):
+        """
+        Sets `units` aside for a job if they fit in what is left today.
+        Returns the Reservation, or None if the job has to wait for the reset.
+        """
+        with self._lock:
+            if units > self._remaining():
+                return None
+            reservation = Reservation(self, units)
+            self._reservations.add(reservation)
+            return reservation
+
+    def _release(self, reservation):
+        with self._lock:
+            self._reservations.discard(reservation)
+
+    def exhaust(self):
+        """
+        The API said the quota is used up, whatever the ledger thinks (other
+        apps may share the project): nothing more fits until the reset.
+        """
+        with self._lock:
+            self._exhausted_until = next_reset()
+        logging.warning("API quota exhausted until %s", time.strftime("%H:%M", time.localtime(next_reset())))
+
+    def forecast(self, costs):
+        """
+        Given the expected cost of each waiting job in queue order, returns
+        how many of them fit in what is left today.
+        """
+        left = self.remaining()
+        fitting = 0
+        for cost in costs:
+            if cost > left:
+                break
+            left -= cost
+            fitting += 1
+        return fitting
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+
+class _Charging:
+    def __init__(self, ledger, reservation):
+        self.ledger = ledger
+        self.reservation = reservation
+
+    def __enter__(self):
+        self.previous = getattr(_active, "value", None)
+        _active.value = (self.ledger, self.reservation)
+        return self.reservation
+
+    def __exit__(self, *exc):
+        _active.value = self.previous
+        return False
+
+
+_ledger = None
+_ledger_lock = threading.Lock()
+
+
+def get_ledger():
+    """
+    The process-wide ledger that API requests are charged to.
+    """
+    global _ledger
+    with _ledger_lock:
+        if _ledger is None:
+            _ledger = QuotaLedger()
+        return _ledger
+
+
+def current_ledger():
+    """
+    The ledger API calls on this thread are charged to: the one of the
+    enclosing QuotaLedger.charging() block, otherwise get_ledger().
+    """
+    active = getattr(_active, "value", None)
+    return active[0] if active else get_ledger()
+
+
+_request_class = None
+
+
+def metered_request_class():
+    """
+    An HttpRequest subclass that charges current_ledger() for each API call.
+    A resumable upload is charged once, when its session is created;
+    resuming a saved session and sending chunks cost nothing.
+    """
+    global _request_class
+    if _request_class is None:
+        from googleapiclient.http import HttpRequest
+
+        class MeteredRequest(HttpRequest):
+            def execute(self, *args, **kwargs):
+                if self.resumable is None:  # Resumable ones are charged in next_chunk
+                    current_ledger().charge(self.methodId)
+                return super().execute(*args, **kwargs)
+
+            def next_chunk(self, *args, **kwargs):
+                if self.resumable_uri is None:
+                    current_ledger().charge(self.methodId)
+                return super().next_chunk(*args, **kwargs)
+
+        _request_class = MeteredRequest
+    return _request_class
@@ -0,0 +1,56 @@
+import errno
+import random
+
+MAX_RETRIES = 8  # Consecutive failures before an upload is given up
+BASE_DELAY = 1
+MAX_DELAY = 64
+
+RETRYABLE_STATUS = {408, 429, 500, 502, 503, 504}
+RETRYABLE_REASONS = (b"rateLimitExceeded", b"userRateLimitExceeded", b"backendError")
+NETWORK_ERRNOS = {errno.ENETDOWN, errno.ENETUNREACH, errno.EHOSTUNREACH}  # e.g. Wi-Fi dropped
+
+
+def is_retryable(error):
+    """
+    Sorts upload errors into transient ones worth retrying (server 5xx, rate
+    limiting, dropped connections, timeouts) and fatal ones (bad requests,
+    auth failures, exhausted quota, expired sessions). Local I/O errors (a
+    file deleted or locked mid-upload, a stream that can't rewind) are fatal.
+    """
+    import http.client
+    import socket
+    import ssl
+
+    from googleapiclient.errors import HttpError
+    import httplib2
+
+    if isinstance(error, HttpError):
+        status = getattr(error.resp, "status", None)
+        if status in RETRYABLE_STATUS:
+            return True
+        if status == 403:
+            content = error.content or b""
+            return any(reason in content for reason in RETRYABLE_REASONS)
+        return False
+    if isinstance(error, httplib2.RedirectMissingLocation):
+        return False
+    if isinstance(error, OSError) and error.errno in NETWORK_ERRNOS:
+        return True
+    return isinstance(
+        error,
+        (
+            httplib2.HttpLib2Error,
+            http.client.HTTPException,  # Connection cut mid-response
+            ConnectionError,
+            TimeoutError,
+            socket.timeout,
+            ssl.SSLError,
+        ),
+    )
+
+
+def backoff_delay(attempt):
+    """
+    Exponential backoff with full jitter for the given 1-based attempt.
+    """
+    return random.uniform(0, min(MAX_DELAY, BASE_DELAY * 2 ** attempt))
@@ -0,0 +1,140 @@
+import hashlib
+import json
+import logging
+import os
+import time
+
+from lib.uploader import get_appdata_dir
+
+SESSIONS_DIR = os.path.join(get_appdata_dir(), "sessions")
+
+
+def session_key(file_path):
+    path = os.path.normcase(os.path.abspath(file_path))
+    return hashlib.sha1(path.encode("utf-8")).hexdigest()
+
+
+class UploadSession:
+    """
+    On-disk record of one resumable upload: the session URI the server handed
+    out, the last byte offset it acknowledged, and the settings the upload was
+    started with so it can be finished after a restart.
+    """
+
+    FIELDS = (
+        "file_path",
+        "file_size",
+        "file_mtime",
+        "resumable_uri",
+        "offset",
+        "privacy",
+        "title",
+        "description",
+        "tags",
+        "playlist_ids",
+        "growing",
+        "created",
+    )
+
+    def __init__(self, file_path, **kwargs):
+        self.file_path = os.path.abspath(file_path)
+        self.file_size = None
+        self.file_mtime = None
+        self.resumable_uri = None
+        self.offset = 0
+        self.privacy = "unlisted"
+        self.title = None
+        self.description = None
+        self.tags = None
+        self.playlist_ids = []
+        self.growing = False  # Started while the file was still being written
+        self.created = time.time()
+        for name, value in kwargs.items():
+            if name in self.FIELDS:
+                setattr(self, name, value)
+        if self.file_size is None and os.path.exists(self.file_path):
+            st = os.stat(self.file_path)
+            self.file_size = st.st_size
+            self.file_mtime = st.st_mtime
+
+    @property
+    def path(self):
+        return os.path.join(SESSIONS_DIR, session_key(self.file_path) + ".json")
+
+    def is_stale(self):
+        """
+        True if the file is gone or changed since the session was started, in
+        which case the bytes already on the server no longer match it. A file
+        that was still growing only has to still hold the bytes sent so far.
+        """
+        try:
+            st = os.stat(self.file_path)
+        except OSError:
+            return True
+        if self.growing:
+            return st.st_size < self.offset
+        return st.st_size != self.file_size or st.st_mtime != self.file_mtime
+
+    def save(self):
+        os.makedirs(SESSIONS_DIR, exist_ok=True)
+        data = {name: getattr(self, name) for name in self.FIELDS}
+        tmp = self.path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(data, f)
+        os.replace(tmp, self.path)
+
+    def delete(self):
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
+
+
+def _read(path):
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        return UploadSession(**data)
+    except Exception as e:
+        logging.error("Discarding unreadable upload session %s: %s", path, e)
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+        return None
+
+
+def load_session(file_path):
+    """
+    Returns the saved session for `file_path`, or None if there is none or it
+    no longer matches the file.
+    """
+    path = os.path.join(SESSIONS_DIR, session_key(file_path) + ".json")
+    if not os.path.exists(path):
+        return None
+    session = _read(path)
+    if session and session.is_stale():
+        session.delete()
+        return None
+    return session
+
+
+def pending_sessions():
+    """
+    Returns every unfinished upload that can still be resumed. Sessions whose
+    file is gone or changed are removed.
+    """
+    if not os.path.isdir(SESSIONS_DIR):
+        return []
+    sessions = []
+    for name in sorted(os.listdir(SESSIONS_DIR)):
+        if not name.endswith(".json"):
+            continue
+        session = _read(os.path.join(SESSIONS_DIR, name))
+        if session is None:
+            continue
+        if session.is_stale() or not session.resumable_uri:
+            session.delete()
+            continue
+        sessions.append(session)
+    return sessions
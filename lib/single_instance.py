@@ -0,0 +1,181 @@
+import logging
+import os
+import secrets
+import sys
+import threading
+import time
+from multiprocessing.connection import Client, Listener
+
+CONNECT_TIMEOUT = 2  # Seconds to wait for an instance that is still starting up
+
+
+def _address(folder):
+    if sys.platform == "win32":
+        user = os.environ.get("USERNAME", "user")
+        return rf"\\.\pipe\YouTubeUploader-{user}"
+    return os.path.join(folder, "instance.sock")
+
+
+def _key_path(folder):
+    return os.path.join(folder, "instance.key")
+
+
+def _read_key(folder):
+    with open(_key_path(folder), "rb") as f:
+        return f.read()
+
+
+def _write_key(folder, key):
+    tmp = _key_path(folder) + ".tmp"
+    fd = os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+    with os.fdopen(fd, "wb") as f:
+        f.write(key)
+    os.replace(tmp, _key_path(folder))  # Clients never read a half-written key
+
+
+def send_to_instance(folder, file_paths):
+    """
+    Hands `file_paths` to the resident uploader, if one is running.
+    Returns True if it accepted them, in which case this process can exit.
+    """
+    try:
+        key = _read_key(folder)
+        conn = Client(_address(folder), authkey=key)
+    except (OSError, EOFError):
+        return False
+    except Exception as e:
+        logging.debug("No resident instance: %s", e)
+        return False
+    try:
+        conn.send({"files": [os.path.abspath(p) for p in file_paths]})
+        return conn.recv() == "ok"
+    except (OSError, EOFError):
+        return False
+    finally:
+        conn.close()
+
+
+class InstanceServer:
+    """
+    Makes this process the resident uploader: listens on a per-user local
+    socket (a named pipe on Windows) for later launches that forward their
+    files. Files that arrive before attach() is called are kept and handed
+    over then, so the server can start before the window exists.
+
+    Connections are authenticated with a random key kept in a file only the
+    user can read. start() returns False if another instance already owns the
+    address.
+    """
+
+    def __init__(self, folder):
+        self.folder = folder
+        self._on_files = None
+        self._pending = []
+        self._lock = threading.Lock()
+        self._listener = None
+        self._lock_file = None
+
+    def start(self):
+        if not self._acquire():
+            return False
+        address = _address(self.folder)
+        if sys.platform != "win32" and os.path.exists(address):
+            os.remove(address)  # Left behind by an instance that crashed
+        # The key file is only replaced once the address is ours: a launch
+        # that loses the race must not lock clients out of the running one.
+        key = secrets.token_bytes(32)
+        try:
+            self._listener = Listener(address, authkey=key)
+        except OSError as e:
+            logging.warning("Could not start single-instance listener: %s", e)
+            return False
+        try:
+            _write_key(self.folder, key)
+        except OSError as e:
+            logging.warning("Could not write single-instance key: %s", e)
+            self.close()
+            return False
+        threading.Thread(target=self._serve, name="instance-server", daemon=True).start()
+        return True
+
+    def attach(self, on_files):
+        """
+        Sets the handler called (from the server thread) with each list of
+        forwarded paths, and hands it anything that arrived before.
+        """
+        with self._lock:
+            self._on_files = on_files
+            pending, self._pending = self._pending, []
+        for files in pending:
+            on_files(files)
+
+    def _deliver(self, files):
+        with self._lock:
+            if self._on_files is None:
+                self._pending.append(files)
+                return
+            on_files = self._on_files
+        on_files(files)
+
+    def _acquire(self):
+        # On Windows the first pipe instance is exclusive by itself; elsewhere
+        # hold a lock file for the life of the process.
+        if sys.platform == "win32":
+            return True
+        import fcntl
+
+        self._lock_file = open(os.path.join(self.folder, "instance.lock"), "w")
+        try:
+            fcntl.flock(self._lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            self._lock_file.close()
+            self._lock_file = None
+            return False
+        return True
+
+    def _serve(self):
+        while True:
+            try:
+                conn = self._listener.accept()
+            except OSError:
+                return  # Listener closed
+            except Exception as e:
+                logging.warning("Rejected instance connection: %s", e)
+                continue
+            try:
+                message = conn.recv()
+                files = [p for p in message.get("files", []) if isinstance(p, str)]
+                conn.send("ok")
+                self._deliver(files)
+            except Exception as e:
+                logging.error("Instance message error: %s", e)
+            finally:
+                conn.close()
+
+    def close(self):
+        if self._listener:
+            self._listener.close()
+            self._listener = None
+        if self._lock_file:
+            self._lock_file.close()
+            self._lock_file = None
+
+
+def forward_or_serve(folder, file_paths):
+    """
+    Single-instance entry point. Returns (True, None) if a resident instance
+    took `file_paths` and this process should exit. Otherwise returns
+    (False, server) with this process now the resident instance, or
+    (False, None) if it could not become one either.
+    """
+    deadline = time.monotonic() + CONNECT_TIMEOUT
+    while True:
+        if send_to_instance(folder, file_paths):
+            return True, None
+        server = InstanceServer(folder)
+        if server.start():
+            return False, server
+        if time.monotonic() >= deadline:
+            return False, None
+        # Another instance holds the lock but isn't listening yet.
+        time.sleep(0.05)
@@ -0,0 +1,261 @@
+"""
+Upload bandwidth limit shared by every job: a token bucket the upload
+sources draw from before each chunk goes out, with an optional time-of-day
+schedule. Settings live in throttle.json under the app data folder, so the
+GUI, the CLI and a running watch daemon all follow the same limit and pick up
+changes within a few seconds.
+"""
+import json
+import logging
+import os
+import re
+import threading
+import time
+from collections import deque
+
+from lib.chunking import align_chunk_size
+from lib.uploader import get_appdata_dir
+
+THROTTLE_FILE = os.path.join(get_appdata_dir(), "throttle.json")
+BURST_SECONDS = 1.0  # Bucket capacity, in seconds of the current rate
+RELOAD_INTERVAL = 2  # How often throttle.json is checked for changes
+RATE_WINDOW = 10  # Seconds of acknowledged bytes behind measured_rate()
+
+_WINDOW_RE = re.compile(r"^\s*(\d{1,2}):(\d{2})\s*-\s*(\d{1,2}):(\d{2})\s*=\s*([\d.]+)\s*$")
+
+
+def mbit_to_bytes(mbit):
+    """
+    Mbit/s to bytes/s; None or 0 means unlimited (None).
+    """
+    return int(mbit * 1_000_000 / 8) if mbit else None
+
+
+def parse_schedule(spec):
+    """
+    Parses "09:00-18:00=20,22:00-06:00=50" into a list of windows
+    {"start": "09:00", "end": "18:00", "limit_mbit": 20}. A window may wrap
+    past midnight; a limit of 0 means unlimited.
+    """
+    windows = []
+    for part in filter(None, (p.strip() for p in spec.split(","))):
+        match = _WINDOW_RE.match(part)
+        if not match:
+            raise ValueError(f"Invalid schedule window {part!r}, expected HH:MM-HH:MM=MBIT")
+        h1, m1, h2, m2, mbit = match.groups()
+        if int(h1) > 23 or int(h2) > 23 or int(m1) > 59 or int(m2) > 59:
+            raise ValueError(f"Invalid time in schedule window {part!r}")
+        windows.append(
+            {
+                "start": f"{int(h1):02d}:{m1}",
+                "end": f"{int(h2):02d}:{m2}",
+                "limit_mbit": float(mbit),
+            }
+        )
+    return windows
+
+
+def _minutes(hhmm):
+    hours, minutes = hhmm.split(":")
+    return int(hours) * 60 + int(minutes)
+
+
+def scheduled_limit(settings, now=None):
+    """
+    Returns the limit in Mbit/s (0 for unlimited) that applies at `now`
+    (a struct_time, local time by default): the first matching schedule
+    window, otherwise the plain limit.
+    """
+    now = now or time.localtime()
+    minute = now.tm_hour * 60 + now.tm_min
+    for window in settings.get("schedule") or []:
+        start, end = _minutes(window["start"]), _minutes(window["end"])
+        inside = start <= minute < end if start <= end else minute >= start or minute < end
+        if inside:
+            return window.get("limit_mbit") or 0
+    return settings.get("limit_mbit") or 0
+
+
+def load_settings(path=THROTTLE_FILE):
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            settings = json.load(f)
+    except FileNotFoundError:
+        return {}
+    except (OSError, ValueError) as e:
+        logging.warning("Ignoring unreadable throttle settings %s: %s", path, e)
+        return {}
+    return settings if isinstance(settings, dict) else {}
+
+
+def save_settings(settings, path=THROTTLE_FILE):
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(settings, f, indent=2)
+    os.replace(tmp, path)
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket in bytes. consume() blocks until the bytes may
+    be sent; a request larger than the bucket waits for a full bucket and
+    then runs the balance negative, so the average still holds. set_rate()
+    takes effect immediately, including for threads already waiting.
+    """
+
+    def __init__(self, rate=None):
+        self._cond = threading.Condition()
+        self._rate = rate
+        self._tokens = self._capacity()
+        self._stamp = time.monotonic()
+
+    @property
+    def rate(self):
+        return self._rate
+
+    def _capacity(self):
+        return self._rate * BURST_SECONDS if self._rate else 0
+
+    def _refill(self, now):
+        if self._rate:
+            self._tokens = min(self._capacity(), self._tokens + (now - self._stamp) * self._rate)
+        self._stamp = now
+
+    def set_rate(self, rate):
+        with self._cond:
+            self._refill(time.monotonic())
+            self._rate = rate or None
+            self._tokens = min(self._tokens, self._capacity())
+            self._cond.notify_all()
+
+    def consume(self, nbytes):
+        """
+        Takes `nbytes` tokens, waiting as long as needed. Returns the seconds waited.
+        """
+        start = time.monotonic()
+        with self._cond:
+            while True:
+                now = time.monotonic()
+                self._refill(now)
+                if not self._rate:
+                    break
+                needed = min(nbytes, self._capacity())
+                if self._tokens >= needed:
+                    self._tokens -= nbytes
+                    break
+                self._cond.wait((needed - self._tokens) / self._rate)
+        return time.monotonic() - start
+
+
+class Throttle:
+    """
+    The shared upload limit: a TokenBucket whose rate follows the settings
+    file (plain limit or schedule) and that tracks the rate actually achieved.
+    With path=None the settings are kept in memory only.
+    """
+
+    def __init__(self, path=THROTTLE_FILE):
+        self.path = path
+        self.bucket = TokenBucket()
+        self._lock = threading.Lock()
+        self._settings = {}
+        self._mtime = None
+        self._checked = 0
+        self._sent = deque()  # (send started, acknowledged, bytes) in monotonic time
+        self._reload(force=True)
+
+    def _reload(self, force=False):
+        now = time.monotonic()
+        with self._lock:
+            if not force and now - self._checked < RELOAD_INTERVAL:
+                return
+            self._checked = now
+            if self.path:
+                try:
+                    mtime = os.stat(self.path).st_mtime_ns
+                except OSError:
+                    mtime = None
+                if mtime != self._mtime:
+                    self._mtime = mtime
+                    self._settings = load_settings(self.path)
+            rate = mbit_to_bytes(scheduled_limit(self._settings))
+        if rate != self.bucket.rate:
+            logging.info("Upload limit now %s", f"{rate * 8 / 1e6:g} Mbit/s" if rate else "off")
+            self.bucket.set_rate(rate)
+
+    @property
+    def settings(self):
+        with self._lock:
+            return dict(self._settings)
+
+    def configure(self, limit_mbit=None, schedule=None):
+        """
+        Changes the limit and/or schedule, saves them for every running
+        uploader and applies them at once. Leaves out what is passed as None.
+        """
+        with self._lock:
+            settings = dict(self._settings)
+            if limit_mbit is not None:
+                settings["limit_mbit"] = limit_mbit
+            if schedule is not None:
+                settings["schedule"] = schedule
+            self._settings = settings
+            if self.path:
+                save_settings(settings, self.path)
+                self._mtime = os.stat(self.path).st_mtime_ns
+        self._reload(force=True)
+
+    def current_limit(self):
+        """
+        The limit in force right now, in bytes/s (None when unlimited).
+        """
+        self._reload()
+        return self.bucket.rate
+
+    def max_chunk_size(self):
+        """
+        The largest chunk worth sending under the current limit (None when
+        unlimited): the bucket only spaces chunks out, and each one leaves at
+        line rate, so chunks are kept to about BURST_SECONDS of the limit.
+        """
+        limit = self.current_limit()
+        return align_chunk_size(limit * BURST_SECONDS) if limit else None
+
+    def consume(self, nbytes):
+        """
+        Waits until `nbytes` may be sent. Returns the seconds waited.
+        """
+        self._reload()
+        return self.bucket.consume(nbytes)
+
+    def record(self, nbytes, seconds):
+        """
+        Counts `nbytes` the server acknowledged after `seconds` of sending,
+        for measured_rate().
+        """
+        now = time.monotonic()
+        with self._lock:
+            self._sent.append((now - seconds, now, nbytes))
+            while self._sent and now - self._sent[0][1] > RATE_WINDOW:
+                self._sent.popleft()
+
+    def measured_rate(self):
+        """
+        Upload rate achieved over the last RATE_WINDOW seconds, in bytes/s,
+        across all jobs. Each chunk's bytes are spread over the time it took
+        to send.
+        """
+        now = time.monotonic()
+        window_start = now - RATE_WINDOW
+        with self._lock:
+            while self._sent and self._sent[0][1] < window_start:
+                self._sent.popleft()
+            if not self._sent:
+                return 0.0
+            span_start = max(window_start, min(start for start, _, _ in self._sent))
+            total = 0.0
+            for start, end, nbytes in self._sent:
+                duration = max(end - start, 1e-6)
+                overlap = end - max(start, span_start)
+                total += nbytes * min(1.0, overlap / duration)
+        return total / max(now - span_start, 1e-3)
@@ -0,0 +1,174 @@
+"""
+Per-stage timing of uploads. Each job is a trace made of consecutive stage
+spans (preflight, auth, upload, processing, verification, playlist). Spans
+are appended to a rotating JSON-lines file and summed into a Prometheus
+textfile (for node_exporter's textfile collector), both in the app data
+folder.
+
+Off unless YTUPLOAD_TRACE=1 is set or enable() is called; while off, traces
+are a shared no-op object and cost a method call per stage.
+"""
+import itertools
+import json
+import logging
+import logging.handlers
+import os
+import threading
+import time
+
+from lib.uploader import get_appdata_dir
+
+TRACE_ENV = "YTUPLOAD_TRACE"
+TRACE_FILE = os.path.join(get_appdata_dir(), "traces.jsonl")
+METRICS_FILE = os.path.join(get_appdata_dir(), "ytupload.prom")
+TRACE_MAX_BYTES = 10 * 1024 * 1024
+TRACE_BACKUPS = 3  # Rotated files kept: traces.jsonl.1 ... .3
+STAGES = ("preflight", "auth", "upload", "processing", "verification", "playlist")
+DURATION_BUCKETS = (0.1, 0.5, 1, 5, 10, 30, 60, 300, 900, 1800, 3600)
+
+
+class _NoTrace:
+    """
+    Stand-in for Trace while tracing is off.
+    """
+
+    def stage(self, name):
+        pass
+
+    def end(self, outcome="ok"):
+        pass
+
+
+NO_TRACE = _NoTrace()
+
+
+class Trace:
+    """
+    The stage spans of one job. stage() closes the running span (if any)
+    and opens the next; end() closes the last one with an outcome. Stages
+    of one job run one after another, possibly on different threads.
+    """
+
+    def __init__(self, tracer, trace_id, file_path):
+        self.tracer = tracer
+        self.trace_id = trace_id
+        self.file_path = file_path
+        self._stage = None
+        self._started = None  # (epoch time, perf_counter)
+
+    def stage(self, name):
+        if name == self._stage:
+            return
+        self.end()
+        self._stage = name
+        self._started = (time.time(), time.perf_counter())
+
+    def end(self, outcome="ok"):
+        if self._stage is None:
+            return
+        wall, start = self._started
+        self.tracer._record(
+            {
+                "time": round(wall, 3),
+                "trace": self.trace_id,
+                "file": self.file_path,
+                "stage": self._stage,
+                "duration": round(time.perf_counter() - start, 4),
+                "outcome": outcome,
+            }
+        )
+        self._stage = None
+
+
+class Tracer:
+    """
+    Hands out traces and exports their spans. The metrics file holds totals
+    since this process started and is rewritten atomically after each span.
+    """
+
+    def __init__(self, trace_path=TRACE_FILE, metrics_path=METRICS_FILE, enabled=False):
+        self.trace_path = trace_path
+        self.metrics_path = metrics_path
+        self.enabled = False
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self._log = None
+        self._durations = {}  # stage -> [bucket counts..., sum, count]
+        self._outcomes = {}  # (stage, outcome) -> count
+        if enabled:
+            self.enable()
+
+    def enable(self):
+        with self._lock:
+            if self._log is None:
+                handler = logging.handlers.RotatingFileHandler(
+                    self.trace_path, maxBytes=TRACE_MAX_BYTES, backupCount=TRACE_BACKUPS, encoding="utf-8"
+                )
+                handler.setFormatter(logging.Formatter("%(message)s"))
+                self._log = logging.getLogger(f"ytupload.trace.{id(self)}")
+                self._log.propagate = False
+                self._log.setLevel(logging.INFO)
+                self._log.addHandler(handler)
+            self.enabled = True
+
+    def disable(self):
+        self.enabled = False
+
+    def trace(self, file_path, job_id=None):
+        """
+        A new Trace for one job, or NO_TRACE while tracing is off.
+        """
+        if not self.enabled:
+            return NO_TRACE
+        job_id = next(self._ids) if job_id is None else job_id
+        return Trace(self, f"{os.getpid()}-{job_id}", file_path)
+
+    def _record(self, span):
+        with self._lock:
+            if self._log is None:
+                return
+            self._log.info(json.dumps(span))
+            stage, duration = span["stage"], span["duration"]
+            counts = self._durations.setdefault(stage, [0] * (len(DURATION_BUCKETS) + 2))
+            for i, bound in enumerate(DURATION_BUCKETS):
+                if duration <= bound:
+                    counts[i] += 1
+            counts[-2] += duration
+            counts[-1] += 1
+            key = (stage, span["outcome"])
+            self._outcomes[key] = self._outcomes.get(key, 0) + 1
+            try:
+                self._write_metrics()
+            except OSError as e:
+                logging.warning("Could not write %s: %s", self.metrics_path, e)
+
+    def _write_metrics(self):
+        # Called with self._lock held.
+        lines = [
+            "# HELP ytupload_stage_duration_seconds Wall-clock time of each upload stage.",
+            "# TYPE ytupload_stage_duration_seconds histogram",
+        ]
+        for stage, counts in sorted(self._durations.items()):
+            for bound, count in zip(DURATION_BUCKETS, counts):
+                lines.append(f'ytupload_stage_duration_seconds_bucket{{stage="{stage}",le="{bound}"}} {count}')
+            lines.append(f'ytupload_stage_duration_seconds_bucket{{stage="{stage}",le="+Inf"}} {counts[-1]}')
+            lines.append(f'ytupload_stage_duration_seconds_sum{{stage="{stage}"}} {counts[-2]:.4f}')
+            lines.append(f'ytupload_stage_duration_seconds_count{{stage="{stage}"}} {counts[-1]}')
+        lines += [
+            "# HELP ytupload_stage_total Upload stages completed, by outcome.",
+            "# TYPE ytupload_stage_total counter",
+        ]
+        for (stage, outcome), count in sorted(self._outcomes.items()):
+            lines.append(f'ytupload_stage_total{{stage="{stage}",outcome="{outcome}"}} {count}')
+        lines += [
+            "# HELP ytupload_metrics_timestamp_seconds When these metrics were written.",
+            "# TYPE ytupload_metrics_timestamp_seconds gauge",
+            f"ytupload_metrics_timestamp_seconds {time.time():.3f}",
+        ]
+        tmp = self.metrics_path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write("\n".join(lines) + "\n")
+        os.replace(tmp, self.metrics_path)  # The collector must never see a partial file
+
+
+tracer = Tracer(enabled=os.environ.get(TRACE_ENV) == "1")
@@ -0,0 +1,512 @@
+import itertools
+import logging
+import threading
+import time
+from collections import deque
+
+from lib.chunking import ChunkTuner
+from lib.dedup import DedupIndex, file_sha256
+from lib.history import History, HistoryRecorder
+from lib.poller import ProcessingPoller
+from lib.progress import PROGRESS_RATE, ProgressCoalescer
+from lib.quota import QuotaExceeded, get_ledger, next_reset, upload_cost
+from lib.sessions import load_session, pending_sessions
+from lib.tracing import NO_TRACE, tracer as default_tracer
+from lib.throttle import Throttle
+from lib.uploader import (
+    UploadStatus,
+    add_to_playlists,
+    authenticate,
+    check_processing,
+    check_video_file,
+    fetch_processing,
+    send_video,
+)
+
+DEFAULT_WORKERS = 2
+MAX_WORKERS = 8
+RESET_CHECK_INTERVAL = 60  # Deferred jobs check the wall clock this often (survives sleep)
+
+
+class UploadJob:
+    """
+    One file waiting in (or running through) the upload queue.
+    """
+
+    _ids = itertools.count(1)
+
+    def __init__(
+        self,
+        file_path,
+        playlist_ids=None,
+        privacy="unlisted",
+        title=None,
+        description=None,
+        tags=None,
+        growing=False,
+        follow_idle=None,
+        stream=None,
+        stream_size=None,
+        force=False,
+    ):
+        self.id = next(UploadJob._ids)
+        self.file_path = file_path
+        self.playlist_ids = playlist_ids or []
+        self.privacy = privacy
+        self.title = title
+        self.description = description
+        self.tags = tags
+        self.growing = growing  # Still being written; see send_video
+        self.follow_idle = follow_idle
+        self.stream = stream  # Read instead of file_path, which then only names it
+        self.stream_size = stream_size
+        self.force = force  # Upload even if the same content was uploaded before
+        self.content_hash = None  # SHA-256 of what was uploaded
+        self.status = UploadStatus()
+        self.status.step = "Queued"
+        self.video_id = None
+        self.chunk_tuner = None
+        self.history_id = None  # Row in lib.history, once submitted
+        self.quota_reservation = None  # lib.quota.Reservation while the job runs
+        self.deferred_until = None  # Epoch time of the quota reset it waits for
+        self.quota_cost = None  # Expected API quota units, see UploadQueue._quota_cost
+        self.trace = NO_TRACE  # lib.tracing.Trace of its stages, once submitted
+
+
+def resumable_jobs():
+    """
+    Returns a job for every unfinished upload left over from a previous run,
+    set up with the settings it was started with.
+    """
+    return [
+        UploadJob(
+            file_path=session.file_path,
+            playlist_ids=session.playlist_ids,
+            privacy=session.privacy,
+            title=session.title,
+            description=session.description,
+            tags=session.tags,
+            growing=session.growing,
+        )
+        for session in pending_sessions()
+    ]
+
+
+class UploadQueue:
+    """
+    Runs upload jobs as a staged pipeline.
+
+    The upload stage is a bounded pool of worker threads that only send bytes.
+    As soon as a video's bytes are acknowledged the worker hands it to the
+    shared ProcessingPoller, which tracks processing for every in-flight video
+    in batched videos.list calls, and moves on to the next queued file. Videos
+    that finish processing go to the post stage, a single lightweight thread
+    that adds them to their playlists.
+
+    `callback(job, snapshot)` is invoked from the pipeline threads with a
+    lib.uploader.StatusSnapshot of the job's status: at most `progress_rate`
+    times per second per job (the latest status wins), and at once whenever
+    the job's step changes. The pool size can be changed while jobs are
+    running; shrinking it lets running uploads finish and only limits what
+    starts next. With `adaptive_chunks` every job gets its own ChunkTuner
+    (reachable as job.chunk_tuner). All uploads draw from `throttle`
+    (lib.throttle.Throttle), which can be reconfigured while they run.
+
+    Before uploading a file the queue checks `dedup` (lib.dedup.DedupIndex)
+    for the same content. If it is already on YouTube the job ends as
+    "Duplicate" with that video's URL instead; submit it again with
+    force=True to upload anyway.
+
+    Every submitted job gets a row in `history` (lib.history.History),
+    updated on each stage change.
+
+    Each job reserves its expected API cost in `quota` (lib.quota.QuotaLedger)
+    before it starts. A job that doesn't fit in what is left of today's quota,
+    or that the API refuses for lack of quota, is "Deferred" until the quota
+    resets at midnight Pacific time and then queued again at the front.
+
+    The stages of each job are timed as spans by `tracer`
+    (lib.tracing.Tracer; by default the process-wide one, off unless
+    enabled).
+    """
+
+    def __init__(
+        self,
+        max_workers=DEFAULT_WORKERS,
+        callback=None,
+        adaptive_chunks=True,
+        throttle=None,
+        dedup=None,
+        history=None,
+        quota=None,
+        progress_rate=PROGRESS_RATE,
+        tracer=None,
+    ):
+        self.callback = callback
+        self._progress = ProgressCoalescer(self._deliver, progress_rate)
+        self.adaptive_chunks = adaptive_chunks
+        # One bandwidth limit for every job; by default the saved, shared one.
+        self.throttle = throttle or Throttle()
+        self.dedup = dedup or DedupIndex()
+        self.history = HistoryRecorder(history or History())
+        self.quota = quota or get_ledger()
+        self.tracer = tracer or default_tracer
+        self._cond = threading.Condition()
+        self._pending = deque()
+        self._threads = []
+        self._running = 0
+        self._max_workers = 0
+        self._stopping = False
+        self._outstanding = 0  # Submitted jobs that have not finished or failed yet
+        self._processing = 0  # Jobs waiting on server-side processing
+        self._finishing = deque()  # Jobs in the post stage
+        self._deferred = []  # Jobs waiting for the quota reset
+        self._reset_timer = None
+        self.poller = ProcessingPoller(authenticate, ledger=self.quota)
+        self._post_thread = threading.Thread(target=self._post_worker, name="upload-post", daemon=True)
+        self._post_thread.start()
+        self.set_max_workers(max_workers)
+
+    @property
+    def max_workers(self):
+        return self._max_workers
+
+    def set_max_workers(self, count):
+        count = max(1, min(int(count), MAX_WORKERS))
+        with self._cond:
+            self._max_workers = count
+            while len(self._threads) < count:
+                t = threading.Thread(
+                    target=self._worker, name=f"upload-{len(self._threads) + 1}", daemon=True
+                )
+                self._threads.append(t)
+                t.start()
+            self._cond.notify_all()
+
+    def submit(self, job):
+        job.trace = self.tracer.trace(job.file_path, job.id)
+        self.history.track(job)
+        with self._cond:
+            self._pending.append(job)
+            self._outstanding += 1
+            self._cond.notify_all()
+        self._notify(job, job.status)
+        return job
+
+    def pending_count(self):
+        with self._cond:
+            return len(self._pending)
+
+    def active_count(self):
+        with self._cond:
+            return self._running
+
+    def processing_count(self):
+        with self._cond:
+            return self._processing + len(self._finishing)
+
+    def deferred_count(self):
+        with self._cond:
+            return len(self._deferred)
+
+    def quota_forecast(self):
+        """
+        Returns (fitting, waiting): how many of the jobs not started yet
+        (queued or deferred) fit in what is left of today's API quota.
+        """
+        with self._cond:
+            waiting = list(self._deferred) + list(self._pending)
+        return self.quota.forecast(self._quota_cost(job) for job in waiting), len(waiting)
+
+    def wait(self, timeout=None):
+        """
+        Blocks until every submitted job has finished or failed.
+        Returns False if `timeout` ran out first.
+        """
+        with self._cond:
+            return self._cond.wait_for(lambda: self._outstanding == 0, timeout)
+
+    def shutdown(self):
+        """
+        Stops the workers after their current job. Queued jobs are dropped.
+        """
+        with self._cond:
+            self._stopping = True
+            self._pending.clear()
+            self._deferred.clear()
+            if self._reset_timer:
+                self._reset_timer.cancel()
+            self._cond.notify_all()
+        self.poller.stop()
+        self._progress.close()
+
+    def _notify(self, job, status):
+        snapshot = status.snapshot()
+        self.history.report(job, snapshot)
+        if self.callback:
+            self._progress.submit(job, snapshot)
+
+    def _deliver(self, job, snapshot):
+        try:
+            self.callback(job, snapshot)
+        except Exception as e:
+            logging.error("Queue callback error: %s", e)
+
+    def _worker(self):
+        while True:
+            with self._cond:
+                while not self._stopping and (
+                    not self._pending or self._running >= self._max_workers
+                ):
+                    self._cond.wait()
+                if self._stopping:
+                    return
+                job = self._pending.popleft()
+                self._running += 1
+            try:
+                self._run_job(job)
+            finally:
+                with self._cond:
+                    self._running -= 1
+                    self._cond.notify_all()
+
+    def _finish(self, job):
+        self._progress.forget(job)
+        if job.quota_reservation:
+            job.quota_reservation.release()
+            job.quota_reservation = None
+        with self._cond:
+            self._outstanding -= 1
+            self._cond.notify_all()
+
+    def _fail(self, job, error):
+        job.status.error = str(error)
+        job.status.step = "Error"
+        self._notify(job, job.status)
+        self._finish(job)
+
+    def _quota_cost(self, job):
+        if job.quota_cost is None:
+            session = load_session(job.file_path) if job.stream is None else None
+            resuming = bool(session and session.resumable_uri)
+            job.quota_cost = upload_cost(len(job.playlist_ids), resuming=resuming)
+        return job.quota_cost
+
+    def _reserve_quota(self, job):
+        """
+        Sets the job's expected API cost aside. Returns False (and defers the
+        job) if it doesn't fit in what is left today.
+        """
+        cost = self._quota_cost(job)
+        if cost > self.quota.daily_limit:
+            # Never fits; waiting would not help, so let the API decide.
+            logging.warning("Upload of %s needs %d quota units, more than a day's", job.file_path, cost)
+            return True
+        job.quota_reservation = self.quota.reserve(cost)
+        if job.quota_reservation is None:
+            self._defer(job, f"Needs {cost} API quota units, {self.quota.remaining()} left today")
+            return False
+        return True
+
+    def _defer(self, job, reason):
+        if job.quota_reservation:
+            job.quota_reservation.release()
+            job.quota_reservation = None
+        job.deferred_until = next_reset()
+        reset = time.strftime("%H:%M", time.localtime(job.deferred_until))
+        logging.warning("Deferring %s until the quota reset at %s: %s", job.file_path, reset, reason)
+        job.status.error = f"{reason}; waiting for the quota reset at {reset}"
+        job.status.step = "Deferred"
+        job.status.progress = 0
+        self._notify(job, job.status)
+        with self._cond:
+            if self._stopping:
+                return
+            self._deferred.append(job)
+            if self._reset_timer is None:
+                self._schedule_reset_check()
+
+    def _schedule_reset_check(self):
+        # Called with self._cond held.
+        wait = min(self._deferred[0].deferred_until - time.time(), RESET_CHECK_INTERVAL)
+        self._reset_timer = threading.Timer(max(wait, 0), self._requeue_deferred)
+        self._reset_timer.daemon = True
+        self._reset_timer.start()
+
+    def _requeue_deferred(self):
+        """
+        Puts deferred jobs whose quota reset has come back at the front of
+        the queue, in their original order.
+        """
+        now = time.time()
+        with self._cond:
+            self._reset_timer = None
+            if self._stopping:
+                return
+            due = [job for job in self._deferred if job.deferred_until <= now]
+            self._deferred = [job for job in self._deferred if job.deferred_until > now]
+            if self._deferred:
+                self._schedule_reset_check()
+        for job in due:
+            job.deferred_until = None
+            job.status.error = None
+            job.status.step = "Queued"
+            self._notify(job, job.status)
+        with self._cond:
+            self._pending.extendleft(reversed(due))
+            self._cond.notify_all()
+
+    def _find_duplicate(self, job):
+        """
+        Returns True (and ends the job as "Duplicate") if the file's content
+        is already on the channel. Entries for videos deleted since are
+        dropped, which costs one videos.list call instead of an upload.
+        """
+        try:
+            found = self.dedup.lookup(job.file_path)
+            if not found:
+                return False
+            video_id, sha256 = found
+            if fetch_processing(authenticate(), video_id) is None:
+                logging.info("Indexed video %s is gone, uploading %s again", video_id, job.file_path)
+                self.dedup.forget(video_id)
+                return False
+        except Exception as e:
+            logging.warning("Duplicate check failed for %s: %s", job.file_path, e)
+            return False
+        job.video_id = video_id
+        job.content_hash = job.status.sha256 = sha256
+        job.status.video_url = f"https://www.youtube.com/watch?v={video_id}"
+        job.status.step = "Duplicate"
+        job.status.progress = 100
+        self._notify(job, job.status)
+        self._finish(job)
+        return True
+
+    def _index(self, job):
+        try:
+            # The hash normally comes from the upload itself; only an upload
+            # that was already complete on resume needs a separate read.
+            job.content_hash = job.status.sha256 or file_sha256(job.file_path)
+            self.dedup.record(job.file_path, job.video_id, job.content_hash)
+        except Exception as e:
+            logging.warning("Could not index %s: %s", job.file_path, e)
+
+    def _run_job(self, job):
+        def report(status):
+            self._notify(job, status)
+
+        trace = job.trace
+        is_file = job.stream is None
+        try:
+            trace.stage("preflight")  # First, so a bad file never triggers sign-in
+            if is_file:
+                check_video_file(job.file_path, job.growing)
+            if not self._reserve_quota(job):
+                trace.end("deferred")
+                return
+            with self.quota.charging(job.quota_reservation):
+                if is_file and not job.growing and not job.force and self._find_duplicate(job):
+                    trace.end("duplicate")
+                    return
+                trace.stage("auth")
+                youtube = authenticate()
+                if self.adaptive_chunks:
+                    job.chunk_tuner = ChunkTuner()
+                trace.stage("upload")
+                job.video_id = send_video(
+                    youtube,
+                    job.file_path,
+                    job.status,
+                    privacy=job.privacy,
+                    title=job.title,
+                    description=job.description,
+                    tags=job.tags,
+                    callback=report,
+                    playlist_ids=job.playlist_ids,
+                    chunk_tuner=job.chunk_tuner,
+                    growing=job.growing,
+                    follow_idle=job.follow_idle,
+                    stream=job.stream,
+                    stream_size=job.stream_size,
+                    throttle=self.throttle,
+                )
+        except QuotaExceeded as e:
+            trace.end("deferred")
+            logging.warning("Upload job %s refused: %s", job.id, e)
+            self.quota.exhaust()
+            self._defer(job, "The API reports today's quota used up")
+            return
+        except Exception as e:
+            trace.end("error")
+            logging.error("Upload job %s failed: %s", job.id, e)
+            self._fail(job, e)
+            return
+        if not job.video_id:
+            trace.end("error")
+            self._finish(job)  # send_video already reported the error
+            return
+        if is_file:
+            # Indexed right away so a copy queued meanwhile is caught too.
+            self._index(job)
+        with self._cond:
+            self._processing += 1
+        trace.stage("processing")
+        self.poller.watch(
+            job.video_id,
+            lambda item: self._on_processing(job, item),
+            lambda error: self._on_processing_error(job, error),
+            reservation=job.quota_reservation,
+        )
+
+    def _on_processing(self, job, item):
+        """
+        Poller callback for one job. Returns True when the job leaves the
+        processing stage (playable or failed).
+        """
+        status = job.status
+        done = check_processing(item, status)
+        self._notify(job, status)
+        if status.step == "Verifying":
+            job.trace.stage("verification")  # Processed; waiting for the embed to work
+        if not done and status.step != "Error":
+            return False
+        job.trace.end("ok" if done else "error")
+        with self._cond:
+            self._processing -= 1
+            if done:
+                self._finishing.append(job)
+            self._cond.notify_all()
+        if not done:
+            if job.content_hash:
+                self.dedup.forget(job.video_id)  # Rejected; let it be uploaded again
+            self._finish(job)
+        return True
+
+    def _on_processing_error(self, job, error):
+        job.trace.end("error")
+        with self._cond:
+            self._processing -= 1
+        self._fail(job, error)
+
+    def _post_worker(self):
+        while True:
+            with self._cond:
+                while not self._stopping and not self._finishing:
+                    self._cond.wait()
+                if self._stopping:
+                    return
+                job = self._finishing.popleft()
+            if job.playlist_ids:
+                job.trace.stage("playlist")
+            try:
+                with self.quota.charging(job.quota_reservation):
+                    add_to_playlists(authenticate(), job.video_id, job.playlist_ids)
+                job.trace.end()
+            except Exception as e:
+                job.trace.end("error")
+                logging.warning("Playlist stage failed for job %s: %s", job.id, e)
+            job.status.step = "Finished"
+            job.status.progress = 100
+            self._notify(job, job.status)
+            self._finish(job)
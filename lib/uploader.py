@@ -1,10 +1,12 @@
 import os
-import pickle
+import bisect
 import logging
+import math
+import threading
 import time
 import sys
-import requests
-import win32crypt
+
+from lib.credentials import CredentialManager, default_token_store
 
 SCOPES = [
     "https://www.googleapis.com/auth/youtube.upload",
@@ -37,72 +39,191 @@ def get_appdata_dir():
 
 
 CLIENT_SECRET_FILE = resource_path(os.path.join("lib", "client_secret.json"))
-ENCRYPTED_TOKEN_FILE = os.path.join(get_appdata_dir(), "token.enc")
+DISCOVERY_FILE = resource_path(os.path.join("lib", "youtube.v3.json"))
+
+credential_manager = CredentialManager(
+    default_token_store(get_appdata_dir()), CLIENT_SECRET_FILE, SCOPES
+)
+
+
+STATUS_FIELDS = (
+    "progress", "step", "video_url", "error", "retries", "wasted_bytes", "chunk_size", "sha256",
+    "bytes_sent", "total_bytes", "rate", "smoothed_rate", "eta", "chunk_latency",
+)
+RATE_SMOOTHING_SECONDS = 5  # Time constant of UploadStatus.smoothed_rate
+# Upper bounds (seconds) of the next_chunk() latency buckets; one more bucket holds the rest.
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2, 5, 10, 30, 60)
+
+
+def latency_percentile(counts, fraction):
+    """
+    Upper bound of the latency bucket holding the given fraction (0-1) of
+    the chunks counted in `counts`; inf for the overflow bucket, None if
+    nothing was counted.
+    """
+    total = sum(counts)
+    if not total:
+        return None
+    seen = 0
+    for bound, count in zip(LATENCY_BUCKETS + (math.inf,), counts):
+        seen += count
+        if seen >= fraction * total:
+            return bound
+    return math.inf
 
 
 class UploadStatus:
+    """
+    Live status of one upload, updated in place by the thread running it.
+    Other threads should only see snapshot()s of it.
+    """
+
     def __init__(self):
         self.progress = 0
         self.step = ""
         self.video_url = ""
         self.error = None
+        self.retries = 0  # Chunk attempts that failed and were retried
+        self.wasted_bytes = 0  # Bytes sent that the server did not keep
+        self.chunk_size = 0  # Current resumable chunk size
+        self.sha256 = None  # Hex SHA-256 of the uploaded bytes, once complete
+        self.bytes_sent = 0  # Bytes the server has acknowledged
+        self.total_bytes = None  # Upload size, None while unknown
+        self.rate = 0.0  # Bytes/s of the last chunk
+        self.smoothed_rate = 0.0  # Bytes/s, averaged over about RATE_SMOOTHING_SECONDS
+        self.eta = None  # Seconds left at the smoothed rate, None while unknown
+        self.chunk_latency = (0,) * (len(LATENCY_BUCKETS) + 1)  # next_chunk() calls per bucket
+
+    def snapshot(self):
+        return StatusSnapshot(self)
+
+    def record_chunk(self, nbytes, seconds, offset, total):
+        """
+        Updates the transfer figures after a next_chunk() call that took
+        `seconds` and got `nbytes` acknowledged; the server now holds
+        `offset` bytes of `total` (None if not known yet).
+        """
+        self.bytes_sent = offset
+        self.total_bytes = total
+        counts = list(self.chunk_latency)
+        counts[bisect.bisect_left(LATENCY_BUCKETS, seconds)] += 1
+        self.chunk_latency = tuple(counts)  # Replaced, not mutated: snapshots share it
+        if seconds > 0 and nbytes > 0:
+            self.rate = nbytes / seconds
+            if self.smoothed_rate:
+                weight = 1 - math.exp(-seconds / RATE_SMOOTHING_SECONDS)
+                self.smoothed_rate += weight * (self.rate - self.smoothed_rate)
+            else:
+                self.smoothed_rate = self.rate
+        if total is not None and self.smoothed_rate:
+            self.eta = max(0, total - offset) / self.smoothed_rate
+        else:
+            self.eta = None
 
 
-def encrypt_token(creds):
-    data = pickle.dumps(creds)
-    encrypted = win32crypt.CryptProtectData(data, None, None, None, None, 0)
-    with open(ENCRYPTED_TOKEN_FILE, "wb") as f:
-        f.write(encrypted)
+class StatusSnapshot:
+    """
+    Read-only copy of an UploadStatus at one moment, safe to pass between
+    threads.
+    """
 
+    __slots__ = STATUS_FIELDS
 
-def decrypt_token():
-    with open(ENCRYPTED_TOKEN_FILE, "rb") as f:
-        encrypted = f.read()
-    decrypted = win32crypt.CryptUnprotectData(encrypted, None, None, None, 0)[1]
-    return pickle.loads(decrypted)
+    def __init__(self, status):
+        for name in STATUS_FIELDS:
+            object.__setattr__(self, name, getattr(status, name))
 
+    def __setattr__(self, name, value):
+        raise AttributeError("StatusSnapshot is read-only")
 
-def authenticate():
+    def __delattr__(self, name):
+        raise AttributeError("StatusSnapshot is read-only")
+
+    def snapshot(self):
+        return self
+
+
+_service_lock = threading.Lock()
+_service = None
+_thread_http = threading.local()
+_discovery_document = None
+
+
+def load_credentials():
     """
-    Authenticates with Google using OAuth2 and DPAPI-protected token.
+    Returns the signed-in user's credentials, running the OAuth flow if needed.
     """
-    from googleapiclient.discovery import build
-    from google_auth_oauthlib.flow import InstalledAppFlow
-    from google.auth.transport.requests import Request
+    return credential_manager.get()
 
-    creds = None
-    if os.path.exists(ENCRYPTED_TOKEN_FILE):
-        try:
-            creds = decrypt_token()
-        except Exception as e:
-            logging.error("Failed to decrypt token: %s", e)
-            os.remove(ENCRYPTED_TOKEN_FILE)
 
-    if not creds or not creds.valid:
-        if creds and creds.expired and creds.refresh_token:
-            try:
-                creds.refresh(Request())
-            except Exception as e:
-                logging.error("Error refreshing credentials: %s", e)
-                os.remove(ENCRYPTED_TOKEN_FILE)
-                creds = None
+def load_discovery_document():
+    """
+    Returns the YouTube Data API discovery document bundled in lib/, parsed
+    once per process, or None if the app was shipped without it.
+    """
+    global _discovery_document
+    if _discovery_document is None and os.path.exists(DISCOVERY_FILE):
+        import json
 
-        if not creds:
-            try:
-                if not os.path.exists(CLIENT_SECRET_FILE):
-                    raise FileNotFoundError(f"client_secret.json not found at {CLIENT_SECRET_FILE}")
-                flow = InstalledAppFlow.from_client_secrets_file(CLIENT_SECRET_FILE, SCOPES)
-                creds = flow.run_local_server(port=0, authorization_url_params={"access_type": "online"})
-            except FileNotFoundError as e:
-                logging.error(f"Client secret file not found: {e}")
-                raise
-            except Exception as e:
-                logging.error(f"Auth error: {e}")
-                raise
+        with open(DISCOVERY_FILE, "r", encoding="utf-8") as f:
+            _discovery_document = json.load(f)
+    return _discovery_document
+
+
+def _build_service(creds):
+    """
+    Builds the YouTube client once for the whole process from the bundled
+    discovery document, so no network round trip is needed. httplib2
+    connections are not thread-safe, so every request is sent over an
+    authorized connection owned by the calling thread instead of one shared
+    connection.
+    """
+    from googleapiclient.discovery import build, build_from_document
+    from googleapiclient.http import build_http
+    from google_auth_httplib2 import AuthorizedHttp
+
+    from lib.quota import metered_request_class
+
+    def thread_http():
+        cached = getattr(_thread_http, "value", None)
+        if cached is None or cached[0] is not creds:
+            cached = _thread_http.value = (creds, AuthorizedHttp(creds, http=build_http()))
+        return cached[1]
+
+    def request_builder(http, *args, **kwargs):
+        # Every call is charged to the quota ledger (lib.quota).
+        return metered_request_class()(thread_http(), *args, **kwargs)
+
+    document = load_discovery_document()
+    if document is not None:
+        return build_from_document(document, credentials=creds, requestBuilder=request_builder)
+    return build(
+        "youtube", "v3", credentials=creds, requestBuilder=request_builder, static_discovery=True
+    )
+
+
+def authenticate():
+    """
+    Returns the process-wide YouTube service, authenticating on first use.
+    The service can be shared by any number of threads. Later calls skip the
+    token decrypt and client build until invalidate_service() is called.
+    """
+    global _service
+    with _service_lock:
+        if _service is None:
+            _service = _build_service(load_credentials())
+        return _service
 
-        encrypt_token(creds)
 
-    return build("youtube", "v3", credentials=creds)
+def invalidate_service():
+    """
+    Drops the cached service so the next authenticate() builds a new one
+    from the current credentials, e.g. after signing out. The credentials
+    themselves belong to credential_manager.
+    """
+    global _service
+    with _service_lock:
+        _service = None
 
 
 def get_playlists():
@@ -129,43 +250,242 @@ def add_video_to_playlist(youtube, video_id, playlist_id):
         return None
 
 
-def upload_to_youtube(
+def check_video_file(file_path, growing=False):
+    """
+    Preflight check of a file before anything is sent. Raises
+    FileNotFoundError if it is missing and ValueError if it is empty (unless
+    `growing`, where the writer may not have written anything yet).
+    """
+    if not os.path.exists(file_path):
+        raise FileNotFoundError("Video file not found: " + file_path)
+    if not growing and os.path.getsize(file_path) == 0:
+        raise ValueError("File is empty: " + file_path)
+
+
+def guess_mime_type(file_path):
+    ext = os.path.splitext(file_path)[1].lower()
+    return (
+        "video/mp4"
+        if ext == ".mp4"
+        else "video/x-matroska"
+        if ext == ".mkv"
+        else "video/*"
+    )
+
+
+def query_upload_offset(req):
+    """
+    Asks the server how much of a resumable upload it already holds.
+    Moves req.resumable_progress to the server-confirmed offset and returns
+    None, or returns the API response if the server already has every byte.
+    Raises HttpError if the session is unknown or expired (404/410).
+
+    This is the same status query next_chunk() makes after a failed chunk, so
+    the request's error state is cleared to keep it from asking twice.
+    """
+    from googleapiclient.errors import HttpError
+
+    size = req.resumable.size()
+    headers = {
+        "Content-Range": "bytes */%s" % ("*" if size is None else size),
+        "Content-Length": "0",
+    }
+    resp, content = req.http.request(req.resumable_uri, "PUT", headers=headers)
+    if resp.status in (200, 201):
+        req._in_error_state = False
+        return req.postproc(resp, content)
+    if resp.status == 308:
+        req._in_error_state = False
+        byte_range = resp.get("range")
+        req.resumable_progress = int(byte_range.split("-")[1]) + 1 if byte_range else 0
+        if "location" in resp:
+            req.resumable_uri = resp["location"]
+        return None
+    raise HttpError(resp, content, uri=req.resumable_uri)
+
+
+def _recover_upload(req, status, error, failures, callback=None):
+    """
+    Handles an exception from next_chunk(). Retryable errors are waited out
+    with exponential backoff, then the upload is re-synced to the offset the
+    server confirms. `failures` counts the consecutive failed attempts before
+    this one.
+
+    Returns (response, failures): the API response if the server turns out to
+    hold every byte (None to carry on sending) and the updated failure count.
+    Re-raises once the error is fatal or MAX_RETRIES consecutive attempts have
+    failed.
+    """
+    from lib.retry import MAX_RETRIES, backoff_delay, is_retryable
+
+    sent_from = req.resumable_progress
+    size = req.resumable.size()
+    chunk_len = req.resumable.chunksize()
+    if size is not None:
+        chunk_len = min(chunk_len, size - sent_from)
+
+    while True:
+        if not is_retryable(error) or failures >= MAX_RETRIES:
+            raise error
+        failures += 1
+        status.retries += 1
+        delay = backoff_delay(failures)
+        logging.warning(
+            "Retryable upload error (attempt %d/%d, retrying in %.1fs): %s",
+            failures, MAX_RETRIES, delay, error,
+        )
+        if callback:
+            callback(status)
+        time.sleep(delay)
+
+        if req.resumable_uri is None:
+            # The session was never created; next_chunk() starts it again.
+            return None, failures
+        try:
+            response = query_upload_offset(req)
+        except Exception as e:
+            error = e
+            continue
+        # An upper bound when the connection dropped part way through the chunk.
+        status.wasted_bytes += max(0, chunk_len - (req.resumable_progress - sent_from))
+        return response, failures
+
+
+def _resume_session(req, session):
+    """
+    Points `req` at a saved session. Returns the API response if that upload
+    had already completed, otherwise None. Falls back to a fresh session if
+    the saved one has expired.
+    """
+    from googleapiclient.errors import HttpError
+
+    req.resumable_uri = session.resumable_uri
+    try:
+        response = query_upload_offset(req)
+    except HttpError as e:
+        logging.warning("Saved upload session expired, starting over: %s", e)
+        req.resumable_uri = None
+        req.resumable_progress = 0
+        session.resumable_uri = None
+        session.offset = 0
+        return None
+    logging.info(
+        "Resuming %s at byte %d of %s", session.file_path, req.resumable_progress, session.file_size
+    )
+    return response
+
+
+def _measure_rtt(req, chunk_tuner):
+    """
+    Times a bare offset query to give the tuner a round-trip estimate. The
+    first chunk can't be used for that since it also created the session.
+    """
+    start = time.perf_counter()
+    try:
+        query_upload_offset(req)
+    except Exception as e:
+        logging.debug("RTT probe failed: %s", e)
+        return
+    chunk_tuner.record_rtt(time.perf_counter() - start)
+
+
+def send_video(
+    youtube,
     file_path,
-    playlist_ids=None,
+    status,
     privacy="unlisted",
     title=None,
     description=None,
     tags=None,
     callback=None,
+    playlist_ids=None,
+    chunk_tuner=None,
+    growing=False,
+    follow_idle=None,
+    stream=None,
+    stream_size=None,
+    throttle=None,
 ):
-    status = UploadStatus()
+    """
+    Upload stage: sends the file's bytes and returns the new video ID.
+    Returns None (with status.step set to "Error") if the upload failed.
 
-    if not os.path.exists(file_path):
-        raise FileNotFoundError("Video file not found: " + file_path)
+    The resumable session is saved to disk after every acknowledged chunk, so
+    an interrupted upload of the same file continues from the server-confirmed
+    offset with the settings (including `playlist_ids`) it was started with.
+
+    With a `chunk_tuner` (lib.chunking.ChunkTuner) the chunk size adapts to
+    the measured throughput and RTT; otherwise it stays at 2 MiB.
+
+    With `growing` the file may still be being written: the upload starts with
+    an unknown length, follows the file as it grows and finalizes once the
+    writer closes it or it stops growing for `follow_idle` seconds
+    (lib.media.GrowingFileUpload).
+
+    With a `stream` (any readable binary file object) the bytes come from it
+    instead, in constant memory, and `file_path` only names the upload (title
+    and MIME type). `stream_size` is its length if known. A stream can't be
+    re-read, so its session is not saved for resuming after a restart.
+
+    A `throttle` (lib.throttle.Throttle) paces the chunks to its bandwidth
+    limit, keeps them small enough not to burst past it, and is told how
+    fast they actually went.
+
+    The SHA-256 of the bytes sent is computed on the way (no extra read of
+    the file) and left in status.sha256. After every chunk `status` also gets
+    the bytes sent, throughput, ETA and next_chunk() latency
+    (UploadStatus.record_chunk).
 
-    from googleapiclient.http import MediaFileUpload
+    Raises lib.quota.QuotaExceeded if the API refuses the upload because the
+    daily quota is used up, so the caller can retry it after the reset.
+    """
+    from lib.chunking import DEFAULT_CHUNK_SIZE
+    from lib.media import FOLLOW_IDLE_SECONDS, GrowingFileUpload, PrefetchFileUpload, StreamUpload
+    from lib.quota import QuotaExceeded, is_quota_exceeded
+    from lib.sessions import UploadSession, load_session
+
+    session = load_session(file_path) if stream is None else None
+    if session:
+        privacy = session.privacy
+        title = session.title
+        description = session.description
+        tags = session.tags
+        growing = session.growing
+    else:
+        session = UploadSession(
+            file_path,
+            privacy=privacy,
+            title=title,
+            description=description,
+            tags=tags,
+            playlist_ids=playlist_ids or [],
+            growing=growing,
+        )
 
     title = title or os.path.basename(file_path).split(".")[0]
     description = description or ""
     tags = tags or ["video"]
-    ext = os.path.splitext(file_path)[1].lower()
-    mime_type = (
-        "video/mp4"
-        if ext == ".mp4"
-        else "video/x-matroska"
-        if ext == ".mkv"
-        else "video/*"
-    )
-    youtube = authenticate()
 
     status.step = "Uploading"
     status.progress = 0
     if callback:
         callback(status)
 
-    media = MediaFileUpload(
-        file_path, mimetype=mime_type, chunksize=2 * 1024 * 1024, resumable=True
-    )
+    chunk_size = chunk_tuner.chunk_size if chunk_tuner else DEFAULT_CHUNK_SIZE
+    if stream is not None:
+        media = StreamUpload(stream, guess_mime_type(file_path), chunk_size, size=stream_size)
+    elif growing:
+        media = GrowingFileUpload(
+            file_path,
+            guess_mime_type(file_path),
+            chunk_size,
+            idle_seconds=FOLLOW_IDLE_SECONDS if follow_idle is None else follow_idle,
+        )
+    else:
+        media = PrefetchFileUpload(file_path, guess_mime_type(file_path), chunk_size)
+    media.throttle = throttle
+    status.chunk_size = media.chunksize()
+    status.total_bytes = media.size()
     body = {
         "snippet": {
             "title": title,
@@ -178,121 +498,266 @@ def upload_to_youtube(
     try:
         req = youtube.videos().insert(part="snippet,status", body=body, media_body=media)
         response = None
+        failures = 0
+        if session.resumable_uri:
+            response = _resume_session(req, session)
+            status.bytes_sent = req.resumable_progress
+            if media.size():
+                status.progress = int(req.resumable_progress * 100 / media.size())
+            if callback:
+                callback(status)
         while response is None:
+            if media.size() is not None and req.resumable_progress == media.size():
+                # A growing file or stream ended exactly on a chunk boundary:
+                # its last chunk went out with an unknown length, so finalize.
+                response = query_upload_offset(req)
+                if response is not None:
+                    break
+            if throttle:
+                # Big chunks would go out as line-rate bursts however the bucket spaces them.
+                cap = throttle.max_chunk_size()
+                if chunk_tuner:
+                    media.set_chunksize(chunk_tuner.cap(cap))
+                else:
+                    media.set_chunksize(min(chunk_size, cap) if cap else chunk_size)
+                status.chunk_size = media.chunksize()
+            sent_from = req.resumable_progress
+            session_started = req.resumable_uri is not None
+            chunk_start = time.perf_counter()
             try:
                 stat_obj, response = req.next_chunk()
+                failures = 0
+                wall = time.perf_counter() - chunk_start
+                elapsed = wall - media.wait_seconds  # Sending only, for the tuner
+                done = media.size() if response is not None else req.resumable_progress
+                status.record_chunk(done - sent_from, wall, done, media.size())
+                if throttle:
+                    throttle.record(done - sent_from, wall)
             except Exception as e:
-                logging.error("HTTP error during upload: %s", e)
-                status.error = str(e)
-                status.step = "Error"
-                if callback:
-                    callback(status)
-                return status
+                try:
+                    response, failures = _recover_upload(req, status, e, failures, callback)
+                except Exception as fatal:
+                    if is_quota_exceeded(fatal):
+                        raise QuotaExceeded(str(fatal)) from fatal
+                    logging.error("HTTP error during upload: %s", fatal)
+                    status.error = str(fatal)
+                    status.step = "Error"
+                    if callback:
+                        callback(status)
+                    return None
+                stat_obj = None
+            if stat_obj and chunk_tuner:
+                if session_started:
+                    media.set_chunksize(
+                        chunk_tuner.record(req.resumable_progress - sent_from, elapsed)
+                    )
+                    status.chunk_size = media.chunksize()
+                else:
+                    _measure_rtt(req, chunk_tuner)
             if stat_obj:
-                percent = int(stat_obj.progress() * 100)
-                status.progress = min(percent, 100)
+                session.resumable_uri = req.resumable_uri
+                session.offset = req.resumable_progress
+                if stream is None:
+                    session.save()
+                if growing:
+                    # The total is unknown until the writer is done; report the
+                    # share of what is on disk so far.
+                    percent = int(req.resumable_progress * 100 / max(media.current_size(), 1))
+                    status.progress = min(percent, 99)
+                else:
+                    percent = int(stat_obj.progress() * 100)
+                    status.progress = min(percent, 100)
                 if callback:
                     callback(status)
+        session.delete()
+        status.sha256 = media.sha256()
         video_id = response.get("id")
         if not video_id:
             raise Exception("Upload failed: No video ID returned.")
+    except QuotaExceeded:
+        raise
     except Exception as e:
         logging.error("Upload exception: %s", e)
         status.error = str(e)
         status.step = "Error"
         if callback:
             callback(status)
-        return status
+        return None
+    finally:
+        media.close()
 
+    status.progress = 100
     status.video_url = f"https://www.youtube.com/watch?v={video_id}"
-    if callback:
-        callback(status)
-
     status.step = "Processing"
     if callback:
         callback(status)
+    return video_id
+
+
+def fetch_processing(youtube, video_id):
+    """
+    Returns the videos.list item used to track processing, or None.
+    """
+    req = youtube.videos().list(part="status,processingDetails,player", id=video_id)
+    items = req.execute().get("items", [])
+    return items[0] if items else None
+
+
+def check_processing(item, status):
+    """
+    Applies one processing poll result to `status`.
+    Returns True once the video is playable, False while still processing.
+    Sets status.step to "Error" (and returns False) if processing failed.
+    """
+    if not item:
+        status.error = "No processing details returned."
+        status.step = "Error"
+        return False
+    upload_status = item.get("status", {}).get("uploadStatus")
+    if upload_status == "uploaded":
+        status.step = "Processing"
+    elif upload_status == "processed":
+        status.step = "Verifying"
+    elif upload_status in ["failed", "rejected", "deleted"]:
+        status.error = f"Video processing failed: {upload_status}"
+        status.step = "Error"
+        return False
+    if status.step == "Verifying":
+        embed_html = item.get("player", {}).get("embedHtml", "").strip()
+        if "iframe" in embed_html:
+            return True
+    return False
+
+
+def wait_for_processing(youtube, video_id, status, callback=None, interval=3):
+    """
+    Processing stage: polls the video until it is playable.
+    Returns True on success, False (with status.step set to "Error") otherwise.
+    """
     while True:
         try:
-            req = youtube.videos().list(
-                part="status,processingDetails,player", id=video_id
-            )
-            resp = req.execute()
+            item = fetch_processing(youtube, video_id)
         except Exception as e:
             logging.error("HTTP error during processing check: %s", e)
             status.error = str(e)
             status.step = "Error"
             if callback:
                 callback(status)
+            return False
+        done = check_processing(item, status)
+        if callback and not done:
+            callback(status)
+        if done:
+            return True
+        if status.step == "Error":
+            return False
+        time.sleep(interval)
+
+
+def add_to_playlists(youtube, video_id, playlist_ids):
+    """
+    Playlist stage: adds the video to every playlist in `playlist_ids`.
+    """
+    for pid in playlist_ids or []:
+        try:
+            add_video_to_playlist(youtube, video_id, pid)
+        except Exception as e:
+            logging.warning(f"Failed to add video to playlist {pid}: {e}")
+
+
+def upload_to_youtube(
+    file_path,
+    playlist_ids=None,
+    privacy="unlisted",
+    title=None,
+    description=None,
+    tags=None,
+    callback=None,
+    chunk_tuner=None,
+    growing=False,
+    stream=None,
+    stream_size=None,
+):
+    """
+    Runs every stage for one video in sequence: upload, processing, playlists.
+    With a `stream`, `file_path` only names the upload (see send_video).
+    Raises lib.quota.QuotaExceeded if the daily API quota is used up.
+    `callback` receives StatusSnapshots.
+    """
+    from lib.tracing import tracer
+
+    status = UploadStatus()
+    trace = tracer.trace(file_path)
+
+    def report(live):
+        if live.step == "Verifying":
+            trace.stage("verification")
+        if callback:
+            callback(live.snapshot())
+
+    try:
+        trace.stage("preflight")
+        if stream is None:
+            check_video_file(file_path, growing)
+
+        trace.stage("auth")
+        youtube = authenticate()
+        trace.stage("upload")
+        video_id = send_video(
+            youtube, file_path, status, privacy, title, description, tags, report, playlist_ids,
+            chunk_tuner, growing, stream=stream, stream_size=stream_size,
+        )
+        if not video_id:
+            trace.end("error")
             return status
-        items = resp.get("items", [])
-        if items:
-            item = items[0]
-            proc_details = item.get("processingDetails", {})
-            stat_details = item.get("status", {})
-            player_details = item.get("player", {})
-            upload_status = stat_details.get("uploadStatus")
-            if upload_status == "uploaded":
-                status.step = "Processing"
-            elif upload_status == "processed":
-                status.step = "Verifying"
-            elif upload_status in ["failed", "rejected", "deleted"]:
-                status.error = f"Video processing failed: {upload_status}"
-                status.step = "Error"
-                if callback:
-                    callback(status)
-                return status
-            if callback:
-                callback(status)
-            if status.step == "Verifying":
-                embed_html = player_details.get("embedHtml", "").strip()
-                if "iframe" in embed_html:
-                    status.step = "Finished"
-                    status.progress = 100
-                    if callback:
-                        callback(status)
-                    break
-        else:
-            status.error = "No processing details returned."
-            status.step = "Error"
-            if callback:
-                callback(status)
+        trace.stage("processing")
+        if not wait_for_processing(youtube, video_id, status, report):
+            trace.end("error")
             return status
-        time.sleep(3)
-
-    if playlist_ids:
-        for pid in playlist_ids:
-            try:
-                add_video_to_playlist(youtube, video_id, pid)
-            except Exception as e:
-                logging.warning(f"Failed to add video to playlist {pid}: {e}")
 
+        if playlist_ids:
+            trace.stage("playlist")
+        add_to_playlists(youtube, video_id, playlist_ids)
+        trace.end()
+    except Exception:
+        trace.end("error")
+        raise
+
+    status.step = "Finished"
+    status.progress = 100
+    report(status)
     return status
 
 
 def revoke_auth():
     """
-    Revokes the current OAuth2 credentials and removes the encrypted token file.
-    Returns True if revocation succeeded, False otherwise.
+    Revokes the current OAuth2 credentials and removes the stored token.
+    Returns True if revocation succeeded, False otherwise. Either way this
+    process forgets the credentials, so nothing more runs as that account.
     """
-    if not os.path.exists(ENCRYPTED_TOKEN_FILE):
+    import requests
+
+    invalidate_service()
+    store = credential_manager.store
+    if not store.exists():
+        credential_manager.clear()
         return True
     try:
-        creds = decrypt_token()
+        creds = store.load()
     except Exception as e:
         logging.error("Failed to decrypt token for revocation: %s", e)
-        os.remove(ENCRYPTED_TOKEN_FILE)
+        credential_manager.clear()
         return False
 
     revoke_url = "https://accounts.google.com/o/oauth2/revoke"
     params = {"token": creds.token}
-    response = requests.post(
-        revoke_url, params=params, headers={"content-type": "application/x-www-form-urlencoded"}
-    )
-    if response.status_code == 200:
-        os.remove(ENCRYPTED_TOKEN_FILE)
-        return True
-    else:
-        return False
+    try:
+        response = requests.post(
+            revoke_url, params=params, headers={"content-type": "application/x-www-form-urlencoded"}
+        )
+    finally:
+        credential_manager.clear()
+    return response.status_code == 200
 
 
 def get_channel_info():
@@ -0,0 +1,258 @@
+"""
+Watch folders for finished recordings. New video files are reported once
+their size and mtime have stopped changing, so half-written files are never
+uploaded. Uses inotify on Linux and falls back to polling elsewhere; polling
+only lists the folder when its mtime changes, so idle cost stays flat no
+matter how many files the folder already holds.
+"""
+import json
+import logging
+import os
+import select
+import struct
+import sys
+import threading
+import time
+
+VIDEO_EXTENSIONS = (".mp4", ".mkv")
+SETTLE_SECONDS = 5  # How long size and mtime must stay unchanged
+CHECK_INTERVAL = 1  # How often unsettled files are re-checked
+POLL_INTERVAL = 2  # Folder mtime check interval for the polling backend
+RESCAN_INTERVAL = 300  # Full listing for filesystems with unreliable folder mtimes
+DEFAULTS_FILE = ".ytupload.json"
+
+# inotify(7)
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+_EVENT_HEADER = struct.Struct("iIII")
+
+
+def load_folder_defaults(folder):
+    """
+    Reads per-folder upload settings (privacy, playlists, description, tags)
+    from `.ytupload.json` in `folder`. Returns {} if there is none.
+    """
+    path = os.path.join(folder, DEFAULTS_FILE)
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            defaults = json.load(f)
+    except FileNotFoundError:
+        return {}
+    except (OSError, ValueError) as e:
+        logging.warning("Ignoring %s: %s", path, e)
+        return {}
+    return defaults if isinstance(defaults, dict) else {}
+
+
+class _Inotify:
+    """
+    Minimal ctypes binding; raises OSError where inotify is unavailable.
+    """
+
+    def __init__(self):
+        import ctypes
+        import ctypes.util
+
+        libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+        self._libc = libc
+        self.fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self._ctypes = ctypes
+
+    def add_watch(self, path, mask):
+        wd = self._libc.inotify_add_watch(self.fd, os.fsencode(path), mask)
+        if wd < 0:
+            raise OSError(self._ctypes.get_errno(), f"inotify_add_watch failed for {path}")
+        return wd
+
+    def read_events(self):
+        """
+        Returns a list of (wd, mask, name) for the events waiting on the
+        descriptor. `name` is empty for events on a watched file itself.
+        """
+        try:
+            data = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return []
+        events = []
+        offset = 0
+        while offset + _EVENT_HEADER.size <= len(data):
+            wd, mask, _cookie, length = _EVENT_HEADER.unpack_from(data, offset)
+            offset += _EVENT_HEADER.size
+            name = data[offset : offset + length].rstrip(b"\0")
+            offset += length
+            events.append((wd, mask, os.fsdecode(name)))
+        return events
+
+    def close(self):
+        os.close(self.fd)
+
+
+class FolderWatcher:
+    """
+    Calls `on_ready(path)` from a background thread for each new video file
+    in `folders` once it has settled. Files present at start() are ignored,
+    and each path is reported at most once: later writes to it (an append,
+    a touch) are not a new file.
+
+    With wait_for_settle=False a file is reported as soon as it has any data,
+    for callers that follow files while they are written.
+    """
+
+    def __init__(
+        self,
+        folders,
+        on_ready,
+        extensions=VIDEO_EXTENSIONS,
+        settle_seconds=SETTLE_SECONDS,
+        use_inotify=True,
+        wait_for_settle=True,
+    ):
+        self.folders = [os.path.abspath(f) for f in folders]
+        self.on_ready = on_ready
+        self.extensions = tuple(e.lower() for e in extensions)
+        self.settle_seconds = settle_seconds
+        self.wait_for_settle = wait_for_settle
+        self.use_inotify = use_inotify and sys.platform.startswith("linux")
+        self._known = {}  # folder -> set of names already seen
+        self._folder_mtimes = {}
+        self._candidates = {}  # path -> (size, mtime, unchanged since)
+        self._reported = set()  # Paths already passed to on_ready
+        self._stop = threading.Event()
+        self._wake_r, self._wake_w = os.pipe()
+        self._thread = None
+        self.backend = None
+
+    def start(self):
+        for folder in self.folders:
+            if not os.path.isdir(folder):
+                raise FileNotFoundError(f"Not a folder: {folder}")
+            self._known[folder] = set(self._list(folder))
+            self._folder_mtimes[folder] = self._mtime(folder)
+
+        inotify = None
+        if self.use_inotify:
+            try:
+                inotify = _Inotify()
+                self._wds = {
+                    inotify.add_watch(folder, IN_CREATE | IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_TO): folder
+                    for folder in self.folders
+                }
+            except (OSError, AttributeError) as e:
+                logging.info("inotify unavailable, polling instead: %s", e)
+                if inotify:
+                    inotify.close()
+                inotify = None
+        self.backend = "inotify" if inotify else "polling"
+        target = self._run_inotify if inotify else self._run_polling
+        self._thread = threading.Thread(
+            target=target, args=(inotify,) if inotify else (), name="folder-watcher", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        os.write(self._wake_w, b"x")
+        if self._thread:
+            self._thread.join()
+        os.close(self._wake_r)
+        os.close(self._wake_w)
+
+    def _is_video(self, name):
+        return name.lower().endswith(self.extensions) and not name.startswith(".")
+
+    def _list(self, folder):
+        try:
+            with os.scandir(folder) as entries:
+                return [e.name for e in entries if self._is_video(e.name)]
+        except OSError as e:
+            logging.warning("Could not list %s: %s", folder, e)
+            return []
+
+    @staticmethod
+    def _mtime(path):
+        try:
+            return os.stat(path).st_mtime_ns
+        except OSError:
+            return None
+
+    def _add_candidate(self, path):
+        if path not in self._candidates and path not in self._reported:
+            logging.info("New file, waiting for it to settle: %s", path)
+            self._candidates[path] = (None, None, time.monotonic())
+
+    def _scan(self, folder):
+        names = set(self._list(folder))
+        known = self._known[folder]
+        for name in names - known:
+            self._add_candidate(os.path.join(folder, name))
+        self._known[folder] = names
+
+    def _check_candidates(self):
+        """
+        Stats only the unsettled files and reports the ones that have been
+        unchanged for settle_seconds.
+        """
+        now = time.monotonic()
+        for path, (size, mtime, since) in list(self._candidates.items()):
+            try:
+                st = os.stat(path)
+            except OSError:
+                del self._candidates[path]  # Deleted or moved away
+                continue
+            if st.st_size == 0:
+                continue
+            if self.wait_for_settle and (st.st_size, st.st_mtime_ns) != (size, mtime):
+                self._candidates[path] = (st.st_size, st.st_mtime_ns, now)
+            elif not self.wait_for_settle or now - since >= self.settle_seconds:
+                del self._candidates[path]
+                self._reported.add(path)
+                try:
+                    self.on_ready(path)
+                except Exception as e:
+                    logging.error("Watch handler failed for %s: %s", path, e)
+
+    def _run_inotify(self, inotify):
+        try:
+            while not self._stop.is_set():
+                # Block indefinitely while idle; tick only while files settle.
+                timeout = CHECK_INTERVAL if self._candidates else None
+                readable, _, _ = select.select([inotify.fd, self._wake_r], [], [], timeout)
+                if inotify.fd in readable:
+                    for wd, mask, name in inotify.read_events():
+                        folder = self._wds.get(wd)
+                        if not folder or not self._is_video(name):
+                            continue
+                        # Like _scan: only names not seen before are new files.
+                        is_new = mask & (IN_CREATE | IN_MOVED_TO) or name not in self._known[folder]
+                        self._known[folder].add(name)
+                        path = os.path.join(folder, name)
+                        if path in self._candidates:
+                            # Still being written: restart the settle timer.
+                            self._candidates[path] = (None, None, time.monotonic())
+                        elif is_new:
+                            self._add_candidate(path)
+                self._check_candidates()
+        finally:
+            inotify.close()
+
+    def _run_polling(self):
+        last_rescan = time.monotonic()
+        while not self._stop.is_set():
+            interval = CHECK_INTERVAL if self._candidates else POLL_INTERVAL
+            if self._stop.wait(interval):
+                break
+            rescan = time.monotonic() - last_rescan >= RESCAN_INTERVAL
+            for folder in self.folders:
+                mtime = self._mtime(folder)
+                if rescan or mtime != self._folder_mtimes[folder]:
+                    self._folder_mtimes[folder] = mtime
+                    self._scan(folder)
+            if rescan:
+                last_rescan = time.monotonic()
+            self._check_candidates()